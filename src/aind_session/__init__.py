@@ -1,25 +1,88 @@
 """
 User-friendly tools for accessing paths, metadata and assets related to AIND sessions.
+
+- submodules, extensions and their dependencies are imported on first access of
+  an attribute that needs them, so `import aind_session` is fast
 """
 
+from __future__ import annotations
+
 import doctest
+import importlib
 import importlib.metadata
 import logging
+from typing import TYPE_CHECKING
+
+import dotenv
 
-import npc_io  # ensures .env files are read
+from aind_session import utils
 
-# import functions from submodules here:
-from aind_session.extension import *
-from aind_session.extensions import *
-from aind_session.session import *
-from aind_session.subject import *
-from aind_session.utils import *
+if TYPE_CHECKING:
+    from aind_session.extension import ExtensionBaseClass, register_namespace
+    from aind_session.extensions import ecephys, lims
+    from aind_session.session import (
+        RESOLVABLE_SESSION_FIELDS,
+        Session,
+        get_sessions,
+        resolve_sessions,
+    )
+    from aind_session.subject import Subject
+    from aind_session.utils import *
 
 logger = logging.getLogger(__name__)
 
+# read .env files, as `import npc_io` does, without importing npc_io:
+dotenv.load_dotenv(dotenv.find_dotenv(usecwd=True))
+
 __version__ = importlib.metadata.version("aind_session")
 logger.debug(f"{__name__}.{__version__ = }")
 
+# functions and classes from submodules available here, by the module that
+# defines them (everything in `aind_session.utils` is also available here):
+_EXPORTS = {
+    "ExtensionBaseClass": ("aind_session.extension", "ExtensionBaseClass"),
+    "register_namespace": ("aind_session.extension", "register_namespace"),
+    # classes with staticmethods/classmethods, re-exported from `extensions`:
+    "ecephys": ("aind_session.extensions.ecephys", "EcephysExtension"),
+    "lims": ("aind_session.extensions.lims", "LimsExtension"),
+    "RESOLVABLE_SESSION_FIELDS": ("aind_session.session", "RESOLVABLE_SESSION_FIELDS"),
+    "Session": ("aind_session.session", "Session"),
+    "get_sessions": ("aind_session.session", "get_sessions"),
+    "resolve_sessions": ("aind_session.session", "resolve_sessions"),
+    "Subject": ("aind_session.subject", "Subject"),
+}
+
+if not TYPE_CHECKING:  # type checkers use the imports above
+    __all__ = [*_EXPORTS, "testmod", *utils._SUBMODULE_BY_NAME]
+
+_SUBMODULES = (
+    "aio",
+    "extension",
+    "extensions",
+    "scripts",
+    "session",
+    "subject",
+    "utils",
+)
+
+
+def __getattr__(name: str) -> object:
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in _EXPORTS:
+        module_name, attr = _EXPORTS[name]
+        value = getattr(importlib.import_module(module_name), attr)
+    elif name in utils._SUBMODULE_BY_NAME:
+        value = getattr(utils, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # skip this lookup next time
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_EXPORTS, *_SUBMODULES, *dir(utils)})
+
 
 def testmod(**testmod_kwargs) -> doctest.TestResults:
     """
@@ -0,0 +1,335 @@
+"""
+Asynchronous interface to sessions, subjects and lookup functions, for use in an
+event loop.
+
+- blocking calls are run in a shared, bounded thread pool, so one event loop can
+  drive many lookups concurrently without blocking
+    - the pool runs up to `aind_session.utils.get_max_concurrency()` calls at
+      once (8 by default, or set with the `AIND_SESSION_MAX_CONCURRENCY`
+      environment variable), or a number set with `set_max_workers()`
+- results are shared with the synchronous API: the same caches and HTTP/S3
+  clients (with their connection pools) are used
+
+Examples
+--------
+>>> import asyncio
+>>> import aind_session.aio
+>>> async def get_raw_asset_id(session_id):
+...     session = aind_session.aio.Session(session_id)
+...     return await session.raw_data_asset.id
+>>> asyncio.run(get_raw_asset_id('ecephys_676909_2023-12-13_13-43-40'))
+'16d46411-540a-4122-b47f-8cb2a15d593a'
+
+Many lookups can be made concurrently:
+>>> async def get_raw_assets(session_ids):
+...     sessions = [aind_session.aio.Session(s) for s in session_ids]
+...     return await asyncio.gather(*(s.raw_data_asset for s in sessions))
+>>> session_ids = ['ecephys_676909_2023-12-13_13-43-40', 'ecephys_676909_2023-12-14_12-43-11']
+>>> assets = asyncio.run(get_raw_assets(session_ids))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
+import datetime
+import functools
+import logging
+import threading
+import uuid
+from collections.abc import Callable, Generator
+from typing import Any, Generic, TypeVar
+
+import codeocean.computation
+import codeocean.data_asset
+import upath
+
+import aind_session.session
+import aind_session.subject
+import aind_session.utils
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: concurrent.futures.ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_max_workers: int | None = None
+
+
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """The thread pool used to run blocking calls, created on first use.
+
+    - the number of blocking calls that can run at the same time defaults to
+      `aind_session.utils.get_max_concurrency()`
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=_max_workers or aind_session.utils.get_max_concurrency(),
+                thread_name_prefix="aind_session.aio",
+            )
+        return _executor
+
+
+def set_max_workers(max_workers: int) -> None:
+    """Change the number of blocking calls that can run at the same time,
+    instead of using `aind_session.utils.get_max_concurrency()`.
+
+    - calls already running in the current thread pool are allowed to finish
+    """
+    global _executor, _max_workers
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1: {max_workers=}")
+    with _executor_lock:
+        _max_workers = max_workers
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+async def run(func: Callable[..., T], /, *args: object, **kwargs: object) -> T:
+    """Run a blocking function in the shared thread pool and await its result.
+
+    - context variables are propagated to the thread, as with `asyncio.to_thread`
+
+    Examples
+    --------
+    >>> asyncio.run(run(sum, [1, 2, 3]))
+    6
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(context.run, func, *args, **kwargs)
+    )
+
+
+class _AsyncAttribute:
+    """An attribute of an object, looked up (and optionally called) in the shared
+    thread pool when awaited.
+
+    - attributes of the attribute can be chained before awaiting, so nested
+      lookups happen in a single call: `await session.ecephys.sorted_data_assets`
+    """
+
+    __slots__ = ("_names", "_obj")
+
+    def __init__(self, obj: object, names: tuple[str, ...]) -> None:
+        self._obj = obj
+        self._names = names
+
+    def __repr__(self) -> str:
+        return f"<awaitable {self._obj!r}.{'.'.join(self._names)}>"
+
+    def _resolve(self) -> object:
+        value = self._obj
+        for name in self._names:
+            value = getattr(value, name)
+        return value
+
+    def __getattr__(self, name: str) -> _AsyncAttribute:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _AsyncAttribute(self._obj, (*self._names, name))
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        return run(self._resolve).__await__()
+
+    async def __call__(self, *args: object, **kwargs: object) -> object:
+        def call() -> object:
+            func = self._resolve()
+            if not callable(func):
+                raise TypeError(f"{self!r} is not callable")
+            return func(*args, **kwargs)
+
+        return await run(call)
+
+
+class _AsyncWrapper(Generic[T]):
+    """Makes every attribute of the wrapped object awaitable."""
+
+    __slots__ = ("sync",)
+
+    def __init__(self, sync: T) -> None:
+        self.sync = sync
+        """The wrapped synchronous object."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__module__}.{self.sync!r}"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, _AsyncWrapper):
+            return self.sync == other.sync
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.sync)
+
+    def __getattr__(self, name: str) -> _AsyncAttribute:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _AsyncAttribute(self.sync, (name,))
+
+
+class Session(_AsyncWrapper[aind_session.session.Session]):
+    """An `aind_session.Session` whose attributes are awaited.
+
+    - the session ID is parsed immediately: attributes, properties and
+      extension namespaces are evaluated in the shared thread pool when awaited
+    - `session.sync` is the underlying `aind_session.Session`
+
+    Examples
+    --------
+    >>> session = Session('ecephys_676909_2023-12-13_13-43-40')
+    >>> session.sync.id
+    'ecephys_676909_2023-12-13_13-43-40'
+    >>> async def get_platform():
+    ...     return await session.platform
+    >>> asyncio.run(get_platform())
+    'ecephys'
+    """
+
+    __slots__ = ()
+
+    def __init__(self, session_id: str | aind_session.session.Session) -> None:
+        if not isinstance(session_id, aind_session.session.Session):
+            session_id = aind_session.session.Session(session_id)
+        super().__init__(session_id)
+
+
+class Subject(_AsyncWrapper[aind_session.subject.Subject]):
+    """An `aind_session.Subject` whose attributes are awaited.
+
+    Examples
+    --------
+    >>> async def get_subject_id():
+    ...     return await Subject(676909).id
+    >>> asyncio.run(get_subject_id())
+    '676909'
+    """
+
+    __slots__ = ()
+
+    def __init__(self, subject_id: str | int | aind_session.subject.Subject) -> None:
+        if not isinstance(subject_id, aind_session.subject.Subject):
+            subject_id = aind_session.subject.Subject(subject_id)
+        super().__init__(subject_id)
+
+
+async def get_sessions(
+    subject_id: int | str,
+    date: str | datetime.date | datetime.datetime | None = None,
+    platform: str | None = None,
+    start_date: str | datetime.date | datetime.datetime | None = None,
+    end_date: str | datetime.date | datetime.datetime | None = None,
+) -> tuple[Session, ...]:
+    """Async version of `aind_session.get_sessions`.
+
+    Examples
+    --------
+    >>> sessions = asyncio.run(get_sessions(676909, platform='ecephys'))
+    >>> sessions[0].sync.platform
+    'ecephys'
+    """
+    sessions = await run(
+        aind_session.session.get_sessions,
+        subject_id,
+        date=date,
+        platform=platform,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    return tuple(Session(session) for session in sessions)
+
+
+async def get_data_assets(
+    name_startswith: str,
+    ttl_hash: int | None = None,
+    **search_params: object,
+) -> tuple[codeocean.data_asset.DataAsset, ...]:
+    """Async version of `aind_session.get_data_assets`.
+
+    Examples
+    --------
+    >>> assets = asyncio.run(get_data_assets('ecephys_676909_2023-12-13_13-43-40'))
+    >>> assets[0].name
+    'ecephys_676909_2023-12-13_13-43-40'
+    """
+    return await run(
+        aind_session.utils.codeocean_utils.get_data_assets,
+        name_startswith,
+        ttl_hash=ttl_hash,
+        **search_params,
+    )
+
+
+async def get_data_asset_model(
+    asset_id: str | uuid.UUID,
+) -> codeocean.data_asset.DataAsset:
+    """Async version of `aind_session.get_data_asset_model`."""
+    return await run(aind_session.utils.codeocean_utils.get_data_asset_model, asset_id)
+
+
+async def get_subject_data_assets(
+    subject_id: str | int,
+    ttl_hash: int | None = None,
+    **search_params: object,
+) -> tuple[codeocean.data_asset.DataAsset, ...]:
+    """Async version of `aind_session.get_subject_data_assets`."""
+    return await run(
+        aind_session.utils.codeocean_utils.get_subject_data_assets,
+        subject_id,
+        ttl_hash=ttl_hash,
+        **search_params,
+    )
+
+
+async def search_computations(
+    capsule_or_pipeline_id: str | uuid.UUID,
+    **kwargs: object,
+) -> tuple[codeocean.computation.Computation, ...]:
+    """Async version of `aind_session.search_computations`: accepts the same
+    keyword arguments."""
+    return await run(
+        aind_session.utils.codeocean_utils.search_computations,
+        capsule_or_pipeline_id,
+        **kwargs,
+    )
+
+
+async def get_docdb_record(
+    data_asset_name_or_id: str | uuid.UUID,
+    ttl_hash: int | None = None,
+    fields: tuple[str, ...] | None = None,
+) -> dict[str, Any]:
+    """Async version of `aind_session.get_docdb_record`.
+
+    Examples
+    --------
+    >>> record = asyncio.run(get_docdb_record('ecephys_676909_2023-12-13_13-43-40'))
+    >>> assert record
+    >>> session_id = 'ecephys_676909_2023-12-13_13-43-40'
+    >>> record = asyncio.run(get_docdb_record(session_id, fields=('location',)))
+    >>> record['location']
+    's3://aind-ephys-data/ecephys_676909_2023-12-13_13-43-40'
+    """
+    return await run(
+        aind_session.utils.docdb_utils.get_docdb_record,
+        data_asset_name_or_id,
+        ttl_hash=ttl_hash,
+        fields=fields,
+    )
+
+
+async def get_source_dir_by_name(name: str) -> upath.UPath:
+    """Async version of `aind_session.get_source_dir_by_name`."""
+    return await run(aind_session.utils.s3_utils.get_source_dir_by_name, name)
+
+
+if __name__ == "__main__":
+    from aind_session import testmod
+
+    testmod()
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
+import importlib
 import logging
 from typing import Any, Callable
 
 from typing_extensions import TypeVar
 
-import aind_session.session
-import aind_session.utils.codeocean_utils
+import aind_session
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +17,17 @@ _NS = TypeVar("_NS")
 
 
 def register_namespace(
-    name: str, cls: type = aind_session.session.Session
+    name: str, cls: type | None = None
 ) -> Callable[[type[_NS]], type[_NS]]:
     """
     Decorator for registering custom functionality with Session or Subject objects.
 
+    - `cls` defaults to `aind_session.Session`
+
     Copied from https://github.com/pola-rs/polars/blob/py-1.5.0/py-polars/polars/api.py#L124-L219
     """
+    if cls is None:
+        cls = aind_session.Session
     return _create_namespace(name, cls)
 
 
@@ -88,6 +92,36 @@ class _NameSpace:
         return ns_instance  # type: ignore[return-value]
 
 
+class _LazyNameSpace:
+    """Placeholder for a namespace registered in a module that hasn't been
+    imported yet: the module is imported on first access, which registers the
+    real namespace in place of this one.
+    """
+
+    def __init__(self, name: str, module_name: str) -> None:
+        self._accessor = name
+        self._module_name = module_name
+
+    def __get__(self, instance: object, cls: type) -> object:
+        logger.debug(f"Importing {self._module_name} for {self._accessor!r} namespace")
+        importlib.import_module(self._module_name)
+        if vars(cls).get(self._accessor) is self:
+            raise AttributeError(
+                f"{self._module_name} did not register a {self._accessor!r} namespace"
+                f" on {cls.__name__}"
+            )
+        return getattr(cls if instance is None else instance, self._accessor)
+
+
+def _register_lazy_namespace(name: str, module_name: str, cls: type) -> None:
+    """Make a namespace available on `cls` without importing the module that
+    defines it until it's first accessed.
+
+    - the module must register the namespace with `register_namespace(name, cls)`
+    """
+    setattr(cls, name, _LazyNameSpace(name, module_name))
+
+
 def _create_namespace(name: str, cls: type) -> Callable[[type[_NS]], type[_NS]]:
     """Register custom namespace against the underlying class.
 
@@ -97,7 +131,7 @@ def _create_namespace(name: str, cls: type) -> Callable[[type[_NS]], type[_NS]]:
     def namespace(ns_class: type[_NS]) -> type[_NS]:
         if name in _reserved_namespaces:
             raise AttributeError(f"cannot override reserved namespace {name!r}")
-        elif hasattr(cls, name):
+        elif not isinstance(vars(cls).get(name), _LazyNameSpace) and hasattr(cls, name):
             logger.warning(
                 f"Overriding existing custom namespace {name!r} (on {cls.__name__!r})",
             )
@@ -1,5 +1,46 @@
 # explicitly re-export classes with staticmethods/classmethods to make them available via the package namespace
-from aind_session.extensions.ecephys import EcephysExtension as ecephys
-from aind_session.extensions.lims import LimsExtension as lims
+# - imported on first access, as each extension imports its own dependencies
+# - importing an extension's submodule doesn't replace the class here with the
+#   submodule, as it otherwise would
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from aind_session.extensions.ecephys import EcephysExtension as ecephys
+    from aind_session.extensions.lims import LimsExtension as lims
 
 __all__ = ["ecephys", "lims"]
+
+_EXPORTS = {
+    "ecephys": ("aind_session.extensions.ecephys", "EcephysExtension"),
+    "lims": ("aind_session.extensions.lims", "LimsExtension"),
+}
+
+
+def __getattr__(name: str) -> object:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attr = _EXPORTS[name]
+    value = getattr(importlib.import_module(module_name), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
+
+
+class _ExtensionsModule(types.ModuleType):
+    def __setattr__(self, name: str, value: object) -> None:
+        # the import system sets each imported submodule as an attribute of the
+        # package: ignore it, so `__getattr__` provides the class instead
+        if name in _EXPORTS and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _ExtensionsModule
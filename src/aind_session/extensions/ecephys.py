@@ -3,11 +3,10 @@ from __future__ import annotations
 import concurrent.futures
 import contextlib
 import datetime
-import functools
 import itertools
 import json
 import logging
-from collections.abc import Mapping
+from collections.abc import Iterable, Mapping
 from typing import Any, ClassVar, Literal
 
 import codeocean.computation
@@ -16,6 +15,7 @@ import npc_session
 import upath
 
 import aind_session.extension
+import aind_session.utils.cache_utils
 import aind_session.utils.codeocean_utils
 import aind_session.utils.docdb_utils
 
@@ -288,6 +288,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
         )
 
     @property
+    @aind_session.utils.explain_step
     def clipped_dir(self) -> upath.UPath:
         """Path to the dir containing original Open Ephys recording data, with
         truncated `continuous.dat` files.
@@ -312,6 +313,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
         return path
 
     @property
+    @aind_session.utils.explain_step
     def compressed_dir(self) -> upath.UPath:
         """
         Path to the dir containing compressed zarr format versions of Open Ephys
@@ -346,6 +348,9 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
 
         - originally located in the root of the session's raw data dir
         - for later sessions (2024 onwards), located in an `ecephys` subdirectory
+        - dirs are found with a listing of the raw data dir (shared with
+          `Session.modalities`), plus a listing of the `ecephys` subdirectory if
+          it exists
 
         Examples
         --------
@@ -357,14 +362,32 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             raw_data_asset_id_or_model
         )
         raw_data_dir = aind_session.utils.get_data_asset_source_dir(asset_id=asset_id)
-        candidate_parent_dirs = (
-            raw_data_dir / "ecephys",  # newer location in dedicated modality folder
-            raw_data_dir,  # original location in root if upload folder
-        )
+        ttl_hash = aind_session.utils.get_ttl_hash()
+        try:
+            root_dir_names = aind_session.utils.get_subdir_names(
+                raw_data_dir, ttl_hash=ttl_hash
+            )
+        except FileNotFoundError:
+            logger.info(f"Raw data dir not found: {raw_data_dir.as_posix()}")
+            return None, None
+        candidate_parent_dirs: list[tuple[upath.UPath, tuple[str, ...]]] = []
+        if "ecephys" in root_dir_names:
+            # newer location in dedicated modality folder
+            candidate_parent_dirs.append(
+                (
+                    raw_data_dir / "ecephys",
+                    aind_session.utils.get_subdir_names(
+                        raw_data_dir / "ecephys", ttl_hash=ttl_hash
+                    ),
+                )
+            )
+        # original location in root if upload folder
+        candidate_parent_dirs.append((raw_data_dir, root_dir_names))
         return_paths: list[upath.UPath | None] = [None, None]
-        for parent_dir in candidate_parent_dirs:
+        for parent_dir, dir_names in candidate_parent_dirs:
             for i, name in enumerate(("clipped", "compressed")):
-                if (path := parent_dir / f"ecephys_{name}").exists():
+                if f"ecephys_{name}" in dir_names:
+                    path = parent_dir / f"ecephys_{name}"
                     if (existing_path := return_paths[i]) is None:
                         return_paths[i] = path
                         logger.debug(f"Found {path.as_posix()}")
@@ -377,6 +400,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
         return return_paths[0], return_paths[1]
 
     @property
+    @aind_session.utils.explain_step
     def is_sorted(self) -> bool:
         """A sorted data asset exists, and it is in an error-free state.
 
@@ -396,6 +420,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
         return True
 
     @property
+    @aind_session.utils.explain_step
     def sorted_data_assets(self) -> tuple[SortedDataAsset, ...]:
         """All sorted data assets associated with the session (may be empty).
 
@@ -429,6 +454,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
         getters related to output from the spike sorting pipeline"""
 
         @property
+        @aind_session.utils.explain_step
         def path(self) -> upath.UPath:
             """Path to source dir (likely on S3).
 
@@ -453,6 +479,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             return aind_session.utils.codeocean_utils.get_output_text(self)
 
         @property
+        @aind_session.utils.explain_step
         def sorted_probes(self) -> tuple[str, ...]:
             """Names of probes that reached the final stage of the sorting pipeline.
 
@@ -486,6 +513,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             return EcephysExtension.get_sorter_name(self.id)
 
         @property
+        @aind_session.utils.explain_step
         def is_sorting_error(self) -> bool:
             """The sorting pipeline failed for one or more probes, determined by the
             files available in the asset's data dir and the presence of certain keywords
@@ -507,6 +535,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             return EcephysExtension.is_sorting_analyzer_asset(self.id)
 
     @staticmethod
+    @aind_session.utils.explain_step
     def get_sorted_data_asset_model(
         asset_id: str | codeocean.data_asset.DataAsset,
     ) -> SortedDataAsset:
@@ -525,7 +554,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
         )
 
     @staticmethod
-    @functools.cache
+    @aind_session.utils.cache_utils.ttl_cache(ttl=None, maxsize=4096)
     def is_sorted_data_asset(asset_id: str) -> bool:
         """Check if the asset is a sorted data asset.
 
@@ -560,7 +589,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             return False
 
     @staticmethod
-    @functools.cache
+    @aind_session.utils.cache_utils.ttl_cache(ttl=None, maxsize=4096)
     def is_sorting_analyzer_asset(
         asset_id: str,
     ) -> bool:
@@ -624,6 +653,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             )
 
         @property
+        @aind_session.utils.explain_step
         def names(self) -> tuple[str, ...]:
             """Names of spike-sorters used across all of the session's sorted data
             assets.
@@ -637,12 +667,16 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             >>> session.ecephys.sorter.names   # doctest: +SKIP
             ('kilosort2_5', 'kilosort4')
             """
-            with concurrent.futures.ThreadPoolExecutor() as executor:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=aind_session.utils.get_max_concurrency()
+            ) as executor:
                 return tuple(
                     sorted(
                         set(
                             executor.map(
-                                EcephysExtension.get_sorter_name,
+                                aind_session.utils.bind_context(
+                                    EcephysExtension.get_sorter_name
+                                ),
                                 (asset.id for asset in self._base.sorted_data_assets),
                             )
                         )
@@ -660,6 +694,7 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             self._sorter_name = sorter_name
 
         @property
+        @aind_session.utils.explain_step
         def sorted_data_assets(self) -> tuple[EcephysExtension.SortedDataAsset, ...]:
             """All data assets produced using the given SpikeInterface `sorter_name`
             associated with the session (may be empty).
@@ -679,9 +714,16 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
             >>> session.ecephys.sorter.kilosort2_5.sorted_data_assets
             ()
             """
-            with concurrent.futures.ThreadPoolExecutor() as executor:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=aind_session.utils.get_max_concurrency()
+            ) as executor:
                 future_to_asset = {
-                    executor.submit(EcephysExtension.get_sorter_name, asset.id): asset
+                    executor.submit(
+                        aind_session.utils.bind_context(
+                            EcephysExtension.get_sorter_name
+                        ),
+                        asset.id,
+                    ): asset
                     for asset in self._ecephys.sorted_data_assets
                 }
             assets = []
@@ -883,7 +925,43 @@ class EcephysExtension(aind_session.extension.ExtensionBaseClass):
         )
 
     @staticmethod
-    @functools.cache
+    def get_current_sorting_pipeline_computations_by_data_asset(
+        raw_data_asset_ids_or_models: Iterable[str | codeocean.data_asset.DataAsset],
+        pipeline_id: str = "1f8f159a-7670-47a9-baf1-078905fc9c2e",
+    ) -> dict[str, tuple[codeocean.computation.Computation, ...]]:
+        """
+        Sorting pipeline computations that are still in progress for each of the
+        given raw data assets, with one request for all data assets.
+
+        - returns a dict mapping each normalized raw data asset ID to its
+          computations (empty if it isn't being sorted)
+        - "in progress" defined as `computation.end_status is None`
+        - sorted by ascending creation time
+        - always checks the latest computations: use for checking many sessions at
+          once, rather than `get_current_sorting_pipeline_computations` for each
+        - checks https://codeocean.allenneuraldynamics.org/capsule/8510735/tree by default
+
+        Examples
+        --------
+        >>> asset_id = '16d46411-540a-4122-b47f-8cb2a15d593a'
+        >>> ecephys = aind_session.ecephys
+        >>> computations = ecephys.get_current_sorting_pipeline_computations_by_data_asset(
+        ...     [asset_id]
+        ... )
+        >>> list(computations)
+        ['16d46411-540a-4122-b47f-8cb2a15d593a']
+        """
+        return aind_session.utils.codeocean_utils.search_computations_by_data_asset(
+            pipeline_id,
+            (
+                aind_session.utils.codeocean_utils.get_normalized_uuid(asset)
+                for asset in raw_data_asset_ids_or_models
+            ),
+            in_progress=True,
+        )
+
+    @staticmethod
+    @aind_session.utils.cache_utils.ttl_cache(ttl=None, maxsize=4096)
     def get_sorter_name(sorted_data_asset_id: str) -> str:
         """
         Get the version of the Kilosort pipeline used to create the sorted data asset.
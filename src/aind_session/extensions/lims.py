@@ -3,8 +3,10 @@ from __future__ import annotations
 import logging
 
 import npc_session
+import upath
 
 import aind_session.extension
+import aind_session.utils
 import aind_session.utils.codeocean_utils
 
 logger = logging.getLogger(__name__)
@@ -58,9 +60,7 @@ class LimsExtension(aind_session.extension.ExtensionBaseClass):
             )
         for session in subject_sessions:
             logger.debug(f"Checking raw data folder: {session.raw_data_dir.as_posix()}")
-            for modality_folder in (
-                p for p in session.raw_data_dir.iterdir() if p.is_dir()
-            ):
+            for modality_folder in LimsExtension._get_modality_dirs(session):
                 try:
                     matching_path = next(modality_folder.glob(f"*{lims_session_id}*"))
                 except StopIteration:
@@ -79,6 +79,18 @@ class LimsExtension(aind_session.extension.ExtensionBaseClass):
                 f"No raw data paths containing {lims_session_id} found in raw data dirs in S3 for {labtracks_mouse_id} - has raw data been uploaded?"
             )
 
+    @staticmethod
+    def _get_modality_dirs(session: aind_session.Session) -> tuple[upath.UPath, ...]:
+        """Dirs in the session's raw data dir, from the same cached listing used by
+        `Session.modalities`."""
+        raw_data_dir = session.raw_data_dir
+        return tuple(
+            raw_data_dir / name
+            for name in aind_session.utils.get_subdir_names(
+                raw_data_dir, ttl_hash=aind_session.utils.get_ttl_hash()
+            )
+        )
+
     @staticmethod
     def extract_id(value: str) -> int:
         """Attempt to extract a lims session ID from a string and return it as an
@@ -137,9 +149,7 @@ class LimsExtension(aind_session.extension.ExtensionBaseClass):
         """
         session = aind_session.Session(aind_session_id)
         logger.debug(f"Checking raw data folder: {session.raw_data_dir.as_posix()}")
-        for modality_folder in (
-            p for p in session.raw_data_dir.iterdir() if p.is_dir()
-        ):
+        for modality_folder in LimsExtension._get_modality_dirs(session):
             for path in modality_folder.iterdir():
                 try:
                     lims_id = LimsExtension.extract_id(
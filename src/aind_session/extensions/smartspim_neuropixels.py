@@ -401,7 +401,9 @@ class IBLDataConverterExtension(aind_session.ExtensionBaseClass):
             str, tuple[EcephysExtension.SortedDataAsset, ...]
         ] = {}
         future_to_session: dict[concurrent.futures.Future, aind_session.Session] = {}
-        with concurrent.futures.ThreadPoolExecutor() as executor:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=aind_session.utils.get_max_concurrency()
+        ) as executor:
             for session in self._base.sessions:
                 if session.platform != "ecephys":
                     continue
@@ -0,0 +1,62 @@
+"""
+Manage the local catalog of data asset metadata and DocumentDB records used by
+`aind_session` to answer queries without network requests.
+
+Usage:
+    aind-session-catalog refresh [--no-data-assets] [--no-docdb]
+    aind-session-catalog info
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+
+import aind_session.utils.catalog_utils
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="aind-session-catalog",
+        description="Manage the local catalog of data asset metadata and DocumentDB records.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    refresh = subparsers.add_parser(
+        "refresh", help="Replace the catalog contents with the latest metadata"
+    )
+    refresh.add_argument(
+        "--no-data-assets",
+        action="store_true",
+        help="Don't refresh data assets from CodeOcean",
+    )
+    refresh.add_argument(
+        "--no-docdb",
+        action="store_true",
+        help="Don't refresh records from DocumentDB",
+    )
+    subparsers.add_parser(
+        "info", help="Show when the catalog was last refreshed, and its contents"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    catalog = aind_session.utils.catalog_utils.get_catalog()
+    if args.command == "refresh":
+        catalog.refresh(
+            data_assets=not args.no_data_assets, docdb_records=not args.no_docdb
+        )
+    info = catalog.info()
+    print(f"catalog: {info.path.as_posix()}")
+    print(
+        f"data assets: {info.data_assets_count} (refreshed {info.data_assets_refreshed or 'never'})"
+    )
+    print(
+        f"DocumentDB records: {info.docdb_records_count}"
+        f" (refreshed {info.docdb_records_refreshed or 'never'})"
+    )
+    if catalog.is_stale():
+        print("catalog is stale: run `aind-session-catalog refresh` to update")
+
+
+if __name__ == "__main__":
+    main()
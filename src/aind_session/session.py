@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import concurrent.futures
 import datetime
+import functools
 import logging
-from collections.abc import Mapping
-from typing import TYPE_CHECKING, Any
+import re
+import threading
+import time
+import weakref
+from collections.abc import Callable, Iterable, Mapping
+from typing import TYPE_CHECKING, Any, ClassVar, NamedTuple, TypeVar
 
-import codeocean.data_asset
 import npc_session
+import npc_session.parsing
 import upath
 
+import aind_session.extension
 import aind_session.subject
 import aind_session.utils
 
@@ -16,10 +23,75 @@ logger = logging.getLogger(__name__)
 
 
 if TYPE_CHECKING:
+    import codeocean.data_asset
+
     import aind_session.extensions.ecephys
     import aind_session.extensions.lims
 
 
+_T = TypeVar("_T")
+
+
+class _Resolved(NamedTuple):
+    value: Any
+    expires: float
+    is_error: bool = False
+
+
+def _resolved_property(func: Callable[[Session], _T]) -> Callable[[Session], _T]:
+    """Decorator that memoizes a property's value on the session instance, so
+    repeated access doesn't resolve it again until it expires, or until
+    `Session.refresh()` is called.
+
+    - `AttributeError` (raised when a value doesn't exist yet) is also memoized,
+      for a shorter time
+    - apply beneath `@property` and `explain_step`
+    """
+    name = func.__name__
+    cache_name = f"{__name__}.Session.{name}"
+
+    @functools.wraps(func)
+    def wrapper(self: Session) -> _T:
+        entry = self._resolved.get(name)
+        if entry is not None and entry.expires <= time.monotonic():
+            entry = None
+        aind_session.utils.record_cache(cache_name, hit=entry is not None)
+        if entry is not None:
+            if entry.is_error:
+                raise entry.value.with_traceback(None)
+            return entry.value
+        try:
+            value = func(self)
+        except AttributeError as exc:
+            self._resolved[name] = _Resolved(
+                exc, time.monotonic() + self.RESOLUTION_ERROR_TTL, is_error=True
+            )
+            raise
+        self._resolved[name] = _Resolved(value, time.monotonic() + self.RESOLUTION_TTL)
+        return value
+
+    return wrapper
+
+
+@functools.lru_cache(maxsize=2**16)
+def _parse_session_id(session_id: str) -> npc_session.AINDSessionRecord:
+    """Parse an aind session ID from a string, re-using previous results for the
+    same input string.
+
+    - raises `ValueError` if no aind session ID is found in the string
+    - failed parses aren't cached, but are cheap compared to successful ones
+
+    Examples
+    --------
+    >>> _parse_session_id('ecephys_676909_2023-12-13_13-43-40_sorted_2024-03-01_16-02-45')
+    'ecephys_676909_2023-12-13_13-43-40'
+    >>> session_id = 'ecephys_676909_2023-12-13_13-43-40'
+    >>> _parse_session_id(session_id) is _parse_session_id(session_id)
+    True
+    """
+    return npc_session.AINDSessionRecord(session_id)
+
+
 class Session:
     """
     Session object for Allen Institute for Neural Dynamics sessions (all platforms).
@@ -72,8 +144,41 @@ class Session:
     >>> session = Session('ecephys_676909_2023-12-13_13-43-40')
     >>> session.ecephys.latest_ks25_sorted_data_asset.id            # doctest: +SKIP
 
+    Only one object exists per session ID at a time, so any state attached to
+    it (e.g. extension namespaces) is shared:
+    >>> session = Session('ecephys_676909_2023-12-13_13-43-40')
+    >>> session is Session('/root/capsule/ecephys_676909_2023-12-13_13-43-40')
+    True
     """
 
+    # fixed attributes are stored in slots; `__dict__` remains available for
+    # extension namespaces, which are attached to instances on first access
+    __slots__ = (
+        "__dict__",
+        "__weakref__",
+        "_resolved",
+        "date",
+        "datetime",
+        "dt",
+        "id",
+        "platform",
+        "subject_id",
+        "time",
+    )
+
+    _instances: weakref.WeakValueDictionary[tuple[type[Session], str], Session] = (
+        weakref.WeakValueDictionary()
+    )
+    _instances_lock = threading.Lock()
+
+    RESOLUTION_TTL: ClassVar[float] = 10 * 60
+    """Seconds before a resolved property (e.g. `raw_data_asset`) is looked up
+    again on access."""
+
+    RESOLUTION_ERROR_TTL: ClassVar[float] = 60
+    """Seconds before a property that couldn't be resolved (e.g. no raw data asset
+    yet) is looked up again on access."""
+
     id: str
     subject_id: str
     platform: str
@@ -87,6 +192,19 @@ class Session:
     ecephys: aind_session.extensions.ecephys.EcephysExtension  # type: ignore [name-defined]
     lims: aind_session.extensions.lims.LimsExtension  # type: ignore [name-defined]
 
+    def __new__(cls, session_id: str) -> Session:
+        # parse ID to make sure it's valid -raises ValueError if no aind session
+        # ID is found in the string:
+        record = _parse_session_id(str(session_id))
+        key = (cls, str(record.id))  # subclasses get their own instances
+        with cls._instances_lock:
+            if (instance := cls._instances.get(key)) is None:
+                instance = super().__new__(cls)
+                instance._init_from_record(record)
+                cls._instances[key] = instance
+                logger.debug(f"Created {instance!r} from {session_id}")
+        return instance
+
     def __init__(self, session_id: str) -> None:
         """
         Initialize a session object from a session ID, or a string containing one.
@@ -101,10 +219,9 @@ class Session:
         And the same session ID would be extracted from a longer string:
         >>> session = Session('ecephys_676909_2023-12-13_13-43-40_sorted_2024-03-01_16-02-45')
         """
-        # parse ID to make sure it's valid -raises ValueError if no aind session
-        # ID is found in the string:
-        record = npc_session.AINDSessionRecord(session_id)
+        # attributes are set once, in `__new__`, when the instance is created
 
+    def _init_from_record(self, record: npc_session.AINDSessionRecord) -> None:
         # get some attributes from the record before storing it as a regular string
         self.subject_id = str(record.subject)
         self.platform: str = record.platform
@@ -117,7 +234,34 @@ class Session:
         self.datetime: npc_session.DatetimeRecord = record.datetime
         self.dt: datetime.datetime = record.dt
         self.id = str(record.id)
-        logger.debug(f"Created {self!r} from {session_id}")
+        self._resolved: dict[str, _Resolved] = {}
+
+    def refresh(self) -> None:
+        """Forget resolved properties (`data_assets`, `is_uploaded`,
+        `raw_data_asset`, `raw_data_dir`, `docdb`), so they're looked up again
+        on next access.
+
+        - lookups may still be answered from shared caches: clear those with
+          their `cache_clear()` methods if necessary
+
+        Examples
+        --------
+        >>> session = Session('ecephys_676909_2023-12-13_13-43-40')
+        >>> session.refresh()
+        """
+        self._resolved.clear()
+
+    @classmethod
+    def cache_clear(cls) -> None:
+        """Forget resolved properties for all existing sessions."""
+        with cls._instances_lock:
+            instances = tuple(cls._instances.values())
+        for instance in instances:
+            instance.refresh()
+
+    def __reduce__(self) -> tuple[type[Session], tuple[str]]:
+        # re-use the live instance for the ID when unpickled or copied
+        return (self.__class__, (self.id,))
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.id!r})"
@@ -126,7 +270,7 @@ class Session:
         """
         >>> a = Session('ecephys_676909_2023-12-13_13-43-40')
         >>> b = Session('ecephys_676909_2023-12-13_13-43-40_sorted_2024-03-01_16-02-45')
-        >>> assert a == b and a is not b, "Session objects must be equal based on session ID"
+        >>> assert a == b and a is b, "Session objects must be equal based on session ID"
         """
         if not isinstance(other, Session):
             return NotImplemented
@@ -149,6 +293,8 @@ class Session:
         return self.id < other.id
 
     @property
+    @aind_session.utils.explain_step
+    @_resolved_property
     def data_assets(self) -> tuple[codeocean.data_asset.DataAsset, ...]:
         """All data assets associated with the session.
 
@@ -170,6 +316,8 @@ class Session:
         )
 
     @property
+    @aind_session.utils.explain_step
+    @_resolved_property
     def is_uploaded(self) -> bool:
         """Check if the session's raw data has been uploaded.
 
@@ -195,6 +343,8 @@ class Session:
             return True
 
     @property
+    @aind_session.utils.explain_step
+    @_resolved_property
     def raw_data_asset(self) -> codeocean.data_asset.DataAsset:
         """Latest raw data asset associated with the session.
 
@@ -212,24 +362,26 @@ class Session:
         1702620828
         """
         # try to get asset ID from external links in DocumentDB
-        if self.docdb.get("external_links"):
-            if isinstance(self.docdb["external_links"], Mapping):
+        docdb = self._get_docdb_fields()
+        if docdb.get("external_links"):
+            if isinstance(docdb["external_links"], Mapping):
                 # dict of str: list[str]
-                asset_ids = self.docdb["external_links"].get("Code Ocean", [])
+                asset_ids = docdb["external_links"].get("Code Ocean", [])
             else:
                 # list of dicts; may be empty; Code Ocean key is data asset ID;
                 # may be multiple "Code Ocean" keys with different values
-                asset_ids = [
-                    link.get("Code Ocean") for link in self.docdb["external_links"]
-                ]
+                asset_ids = [link.get("Code Ocean") for link in docdb["external_links"]]
             if len(asset_ids) > 0:
                 if len(asset_ids) > 1:
                     logger.info(
                         f"Multiple external links found for {self.id} in DocumentDB: using most-recent as raw data asset ID {asset_ids}"
                     )
-                asset = aind_session.utils.sort_by_created(asset_ids)[-1]
-                logger.debug(f"Using {asset.id=} for {self.id} raw data asset")
-                return aind_session.utils.get_data_asset_model(asset)
+                if assets := aind_session.utils.sort_by_created(
+                    aind_session.utils.get_data_asset_models(asset_ids)
+                ):
+                    asset = assets[-1]
+                    logger.debug(f"Using {asset.id=} for {self.id} raw data asset")
+                    return asset
         # if no external links are found, try to get asset ID from CodeOcean API
         assets = tuple(
             asset
@@ -260,6 +412,8 @@ class Session:
         return asset
 
     @property
+    @aind_session.utils.explain_step
+    @_resolved_property
     def raw_data_dir(self) -> upath.UPath:
         """Path to the dir containing raw data associated with the session, likely
         in an S3 bucket.
@@ -275,14 +429,14 @@ class Session:
         >>> session.raw_data_dir.as_posix()
         's3://aind-ephys-data/ecephys_676909_2023-12-13_13-43-40'
         """
-        if p := self.docdb.get("location"):
+        if p := self._get_docdb_fields().get("location"):
             return upath.UPath(p)
-        if getattr(self, "raw_data_asset", None):
+        if raw_data_asset := getattr(self, "raw_data_asset", None):
             logger.debug(
-                f"Using asset {self.raw_data_asset.id} to find raw data path for {self.id}"
+                f"Using asset {raw_data_asset.id} to find raw data path for {self.id}"
             )
             raw_data_dir = aind_session.utils.get_data_asset_source_dir(
-                asset_id=self.raw_data_asset.id,
+                asset_id=raw_data_asset.id,
                 ttl_hash=aind_session.utils.get_ttl_hash(),
             )
             logger.debug(f"Raw data dir found for {self.id}: {raw_data_dir}")
@@ -303,6 +457,7 @@ class Session:
             return path
 
     @property
+    @aind_session.utils.explain_step
     def modalities(self) -> tuple[str, ...]:
         """Names of modalities available in the session's raw data dir.
 
@@ -310,6 +465,7 @@ class Session:
             - if 'ecephys_compresed' and 'ecephys_clipped' are found, they're
             represented as 'ecephys'
         - excludes '*metadata*' folders
+        - dirs are found with a single listing of the raw data dir
 
         Examples
         --------
@@ -320,14 +476,24 @@ class Session:
         >>> session.modalities
         ('behavior',)
         """
-        if not self.is_uploaded:
+        try:
+            raw_data_dir = self.raw_data_dir
+        except AttributeError:
             logger.info(
                 f"Raw data has not been uploaded for {self.id}: no modalities available yet"
             )
             return ()
-        dir_names: set[str] = {
-            d.name for d in self.raw_data_dir.iterdir() if d.is_dir()
-        }
+        try:
+            dir_names: set[str] = set(
+                aind_session.utils.get_subdir_names(
+                    raw_data_dir, ttl_hash=aind_session.utils.get_ttl_hash()
+                )
+            )
+        except FileNotFoundError:
+            logger.info(
+                f"Raw data dir not found for {self.id}: no modalities available"
+            )
+            return ()
         for name in ("ecephys_compressed", "ecephys_clipped"):
             if name in tuple(dir_names):
                 dir_names.remove(name)
@@ -343,6 +509,8 @@ class Session:
         return tuple(sorted(dir_names))
 
     @property
+    @aind_session.utils.explain_step
+    @_resolved_property
     def docdb(self) -> dict[str, Any]:
         """Contents of the session's DocumentDB record.
 
@@ -359,6 +527,20 @@ class Session:
             self.id, ttl_hash=aind_session.utils.get_ttl_hash(12 * 3600)
         )
 
+    _DOCDB_FIELDS: tuple[str, ...] = ("external_links", "location")
+    """Fields of the DocumentDB record used to find the session's assets and
+    data."""
+
+    @aind_session.utils.explain_step
+    def _get_docdb_fields(self) -> dict[str, Any]:
+        """The fields of the session's DocumentDB record used internally, without
+        fetching the full record (unless it's already cached)."""
+        return aind_session.utils.get_docdb_record(
+            self.id,
+            ttl_hash=aind_session.utils.get_ttl_hash(12 * 3600),
+            fields=self._DOCDB_FIELDS,
+        )
+
     @property
     def subject(self) -> aind_session.subject.Subject:
         """An object containing all assets, metadata and other sessions
@@ -375,6 +557,80 @@ class Session:
         return aind_session.subject.Subject(self.subject_id)
 
 
+_SESSION_ID_PATTERN = re.compile(npc_session.parsing.PARSE_AIND_SESSION_ID)
+
+_DATETIME_GROUPS = ("year", "month", "day", "hour", "minute", "second")
+
+
+def _get_datetime_key(
+    value: str | datetime.date | datetime.datetime,
+) -> tuple[str, ...]:
+    """Zero-padded (year, month, day, hour, minute, second) strings, which compare
+    in the same order as the datetimes they represent.
+
+    >>> _get_datetime_key('2023-12-13')
+    ('2023', '12', '13', '00', '00', '00')
+    """
+    return tuple(
+        npc_session.DatetimeRecord(value).dt.strftime("%Y %m %d %H %M %S").split()
+    )
+
+
+class _SessionFilter:
+    """Filter for session IDs in asset names, with arguments parsed once.
+
+    - called with an asset name, returns the normalized session ID if the name
+      contains one that passes the filter, otherwise `None`
+    - names are matched with a single pre-compiled regex, and the session's
+      components are compared as strings, so no records or `Session` objects are
+      created
+    - raises `ValueError` if any of the filtering arguments are invalid
+
+    Examples
+    --------
+    >>> f = _SessionFilter(platform='ecephys', start_date='2023-12-13')
+    >>> f('ecephys_676909_2023-12-13_13-43-40_sorted_2024-03-01_16-02-45')
+    'ecephys_676909_2023-12-13_13-43-40'
+    >>> f('behavior_676909_2023-12-13_13-43-40') is None
+    True
+    >>> f('ecephys_676909_2023-12-12_13-43-40') is None
+    True
+    >>> f('676909_2023-12-13') is None
+    True
+    """
+
+    __slots__ = ("date", "end", "platform", "start")
+
+    def __init__(
+        self,
+        platform: str | None = None,
+        date: str | datetime.date | datetime.datetime | None = None,
+        start_date: str | datetime.date | datetime.datetime | None = None,
+        end_date: str | datetime.date | datetime.datetime | None = None,
+    ) -> None:
+        self.platform = platform or None
+        self.date = (
+            tuple(str(npc_session.DateRecord(date)).split("-")) if date else None
+        )
+        self.start = _get_datetime_key(start_date) if start_date else None
+        self.end = _get_datetime_key(end_date) if end_date else None
+
+    def __call__(self, name: str) -> str | None:
+        if (match := _SESSION_ID_PATTERN.search(name)) is None:
+            return None
+        platform = match.group("platform")
+        if self.platform and platform != self.platform:
+            return None
+        key = match.group(*_DATETIME_GROUPS)
+        if self.date and key[:3] != self.date:
+            return None
+        if self.start and key <= self.start:
+            return None
+        if self.end and key >= self.end:
+            return None
+        return "{}_{}_{}-{}-{}_{}-{}-{}".format(platform, match.group("subject"), *key)
+
+
 def get_sessions(
     subject_id: int | str,
     date: str | datetime.date | datetime.datetime | None = None,
@@ -384,11 +640,11 @@ def get_sessions(
 ) -> tuple[Session, ...]:
     """Return all sessions associated with a subject ID, sorted by ascending date.
 
-    Looks up all assets associated with the subject ID, and creates `Session`
-    objects based on their names. If successful (i.e. an aind session ID is
-    present in name of the asset), the session's attributes are checked against
-    the provided filtering arguments. If all criteria are met, the session is
-    added to a set of sessions to be returned as a sorted tuple.
+    Looks up all assets associated with the subject ID, and extracts aind
+    session IDs from their names. The components of each session ID are checked
+    against the provided filtering arguments, and `Session` objects are created
+    for the unique session IDs that meet all criteria, to be returned as a sorted
+    tuple.
 
     - optionally filter sessions by platform, date, or a range of dates or datetimes
     - date/datetime filtering with `start_date` and `end_date` are inclusive
@@ -408,6 +664,8 @@ def get_sessions(
     - note on performance and CodeOcean API calls: all assets associated with a
       subject are fetched once and cached, so subsequent calls to this function
       for the same subject are fast
+        - with the local catalog enabled, no requests are made (see
+          `aind_session.utils.get_catalog()`)
 
     Examples
     --------
@@ -443,27 +701,155 @@ def get_sessions(
             f"Cannot filter by specific date and date range at the same time: {parameters=}"
         )
 
-    sessions: set[Session] = set()
+    session_filter = _SessionFilter(platform, date, start_date, end_date)
     logger.debug(f"Getting sessions from CodeOcean with {parameters=}")
-    for asset in aind_session.utils.get_subject_data_assets(subject_id):
+    # many assets (raw, sorted, etc.) share a session: collect unique IDs first,
+    # then only create `Session` objects for those that pass the filter
+    session_ids = dict.fromkeys(
+        session_id
+        for asset in aind_session.utils.get_subject_data_assets(subject_id)
+        if (session_id := session_filter(asset.name)) is not None
+    )
+    sessions: set[Session] = set()
+    for session_id in session_ids:
         try:
-            session = Session(asset.name)
-        except ValueError:
-            continue
-        if platform and session.platform != platform:
-            continue
-        if date and session.date != npc_session.DateRecord(date):
+            sessions.add(Session(session_id))
+        except ValueError:  # e.g. subject ID out of range
             continue
-        if start_date and session.dt <= npc_session.DatetimeRecord(start_date).dt:
-            continue
-        if end_date and session.dt >= npc_session.DatetimeRecord(end_date).dt:
-            continue
-        sessions.add(session)
     if not sessions:
         logger.info(f"No sessions found matching {parameters=}")
     return tuple(sorted(sessions, key=lambda s: s.dt))
 
 
+RESOLVABLE_SESSION_FIELDS = ("docdb", "data_assets", "raw_data_asset", "raw_data_dir")
+"""Session properties that can be resolved in bulk with `resolve_sessions`."""
+
+
+def resolve_sessions(
+    session_ids: Iterable[str],
+    fields: Iterable[str] = ("docdb", "raw_data_asset", "raw_data_dir"),
+    max_workers: int | None = None,
+) -> tuple[Session, ...]:
+    """Create `Session` objects for many session IDs and look up their
+    properties in bulk, so that subsequently accessing `fields` on each session
+    doesn't make any requests.
+
+    - DocumentDB records are fetched with a few batched queries, instead of one
+      query per session
+    - data assets are found with one CodeOcean search per subject, instead of
+      one per session
+        - sessions with no matching asset in their subject's results are searched
+          for individually, in case the subject search missed them
+    - remaining lookups (e.g. data asset models, S3 dirs) are made concurrently,
+      with up to `max_workers` in flight at once (default:
+      `utils.get_max_concurrency()`)
+    - results are stored in the same caches used by `Session` properties, so
+      they expire in the same way
+    - sessions are returned in input order, without duplicates
+    - fields that can't be resolved for a session (e.g. no raw data asset) are
+      skipped: accessing them raises as usual
+
+    Examples
+    --------
+    >>> session_ids = ['ecephys_676909_2023-12-13_13-43-40', 'ecephys_676909_2023-12-14_12-43-11']
+    >>> sessions = resolve_sessions(session_ids)
+    >>> sessions[0].raw_data_dir.as_posix()       # no further requests
+    's3://aind-ephys-data/ecephys_676909_2023-12-13_13-43-40'
+    """
+    fields = tuple(fields)
+    if invalid := set(fields) - set(RESOLVABLE_SESSION_FIELDS):
+        raise ValueError(
+            f"Cannot resolve {invalid}: fields must be in {RESOLVABLE_SESSION_FIELDS}"
+        )
+    sessions = tuple(dict.fromkeys(Session(session_id) for session_id in session_ids))
+    if not sessions or not fields:
+        return sessions
+    t0 = time.time()
+
+    # all fields depend on the DocumentDB record: only fetch full records if
+    # requested
+    docdb_fields = None if "docdb" in fields else Session._DOCDB_FIELDS
+    name_to_record = aind_session.utils.get_docdb_records(
+        (session.id for session in sessions),
+        projection=None if docdb_fields is None else dict.fromkeys(docdb_fields, 1),
+    )
+    docdb_ttl_hash = aind_session.utils.get_ttl_hash(12 * 3600)
+    for session in sessions:
+        aind_session.utils.get_docdb_record.cache_prime(
+            name_to_record[session.id],
+            session.id,
+            ttl_hash=docdb_ttl_hash,
+            fields=docdb_fields,
+        )
+
+    # data assets are only needed for sessions without asset IDs in DocumentDB,
+    # unless requested:
+    sessions_needing_assets = tuple(
+        session
+        for session in sessions
+        if "data_assets" in fields
+        or not name_to_record[session.id].get("external_links")
+    )
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers or aind_session.utils.get_max_concurrency()
+    ) as executor:
+        if sessions_needing_assets:
+            subject_ids = tuple(
+                dict.fromkeys(session.subject_id for session in sessions_needing_assets)
+            )
+            subject_to_assets = dict(
+                zip(
+                    subject_ids,
+                    executor.map(
+                        aind_session.utils.get_subject_data_assets, subject_ids
+                    ),
+                )
+            )
+            ttl_hash = aind_session.utils.get_ttl_hash()
+            unmatched = []
+            for session in sessions_needing_assets:
+                assets = tuple(
+                    asset
+                    for asset in subject_to_assets[session.subject_id]
+                    if str(asset.name).startswith(session.id)
+                )
+                if assets:
+                    aind_session.utils.get_data_assets.cache_prime(
+                        assets, session.id, ttl_hash=ttl_hash
+                    )
+                else:
+                    unmatched.append(session)
+            # fill in the cache for sessions not found via their subject:
+            _ = tuple(
+                executor.map(
+                    lambda session: session.data_assets,
+                    unmatched,
+                )
+            )
+
+        # remaining lookups use the cached records and assets:
+        def resolve(session: Session) -> None:
+            for field in fields:
+                try:
+                    getattr(session, field)
+                except (AttributeError, FileNotFoundError) as exc:
+                    logger.debug(f"Could not resolve {session.id} {field}: {exc!r}")
+
+        _ = tuple(executor.map(resolve, sessions))
+    logger.debug(
+        f"Resolved {fields} for {len(sessions)} sessions in {time.time() - t0:.2f} s"
+    )
+    return sessions
+
+
+# built-in extensions are imported when their namespace is first accessed, so
+# their dependencies aren't imported with this module:
+for _name in ("ecephys", "lims"):
+    aind_session.extension._register_lazy_namespace(
+        _name, f"aind_session.extensions.{_name}", Session
+    )
+
+
 if __name__ == "__main__":
     from aind_session import testmod
 
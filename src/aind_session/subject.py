@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Sequence
 from typing import TYPE_CHECKING, Any
 
-import codeocean.data_asset
 import npc_session
 
 import aind_session.session
 import aind_session.utils
 
 if TYPE_CHECKING:
+    import codeocean.data_asset
+
     import aind_session.extensions.smartspim_neuropixels
 
 logger = logging.getLogger(__name__)
@@ -100,6 +102,8 @@ class Subject:
         """Contents of all of the DocumentDB records for assets associated with
         the subject (may be empty).
 
+        - to fetch records only as they're accessed, use `lazy_docdb`
+
         Examples
         --------
         >>> subject = Subject('676909_2023-12-13_13-43-40')
@@ -113,6 +117,23 @@ class Subject:
             self.id, ttl_hash=aind_session.utils.get_ttl_hash(12 * 3600)
         )
 
+    @property
+    def lazy_docdb(self) -> Sequence[dict[str, Any]]:
+        """The same records as `docdb`, as a read-only sequence that fetches
+        pages of records as they are accessed.
+
+        - getting the first few records of a subject with many is fast
+
+        Examples
+        --------
+        >>> subject = Subject(676909)
+        >>> subject.lazy_docdb[0]['name']
+        'behavior_676909_2023-10-24_15-15-50'
+        """
+        return aind_session.utils.get_lazy_subject_docdb_records(
+            self.id, ttl_hash=aind_session.utils.get_ttl_hash(12 * 3600)
+        )
+
     @property
     def data_assets(self) -> tuple[codeocean.data_asset.DataAsset, ...]:
         """All data assets associated with the subject.
@@ -1,4 +1,256 @@
-from aind_session.utils.codeocean_utils import *
-from aind_session.utils.docdb_utils import *
-from aind_session.utils.misc_utils import *
-from aind_session.utils.s3_utils import *
+"""
+Functions and classes from all `aind_session.utils` submodules, available
+directly from `aind_session.utils`.
+
+- submodules are imported when one of their attributes is first accessed, so
+  importing the package doesn't import heavy dependencies (e.g. codeocean,
+  s3fs, aind_data_access_api) until they're needed
+- `_EXPORTS` lists the names provided by each submodule: `__all__` (for
+  `import *`) and the submodule imported for each name are taken from it
+    - names must also be added to the imports for type checkers
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from aind_session.utils.cache_utils import (
+        DEFAULT_MODEL_CACHE_MAX_BYTES,
+        DEFAULT_MODEL_CACHE_TTL,
+        CacheInfo,
+        PersistentModelCache,
+        get_model_cache,
+        is_model_cache_enabled,
+        set_model_cache_enabled,
+        ttl_cache,
+    )
+    from aind_session.utils.catalog_utils import (
+        CATALOG_BATCH_SIZE,
+        DEFAULT_CATALOG_DOCDB_PROJECTION,
+        DEFAULT_CATALOG_MAX_AGE,
+        Catalog,
+        CatalogInfo,
+        get_catalog,
+        get_catalog_max_age,
+        get_catalog_path,
+        is_catalog_enabled,
+        set_catalog_enabled,
+        set_catalog_max_age,
+    )
+    from aind_session.utils.codeocean_utils import (
+        DEFAULT_CO_RETRY,
+        LazyDataAsset,
+        get_codeocean_client,
+        get_codeocean_model,
+        get_codeocean_models,
+        get_data_asset_model,
+        get_data_asset_models,
+        get_data_asset_search_query,
+        get_data_asset_source_dir,
+        get_data_assets,
+        get_normalized_uuid,
+        get_output_text,
+        get_subject_data_assets,
+        is_computation_error,
+        is_data_asset_error,
+        is_output_error,
+        is_output_file_from_sorting_pipeline,
+        is_raw_data_asset,
+        iter_data_assets,
+        search_computations,
+        search_computations_by_data_asset,
+        search_data_assets,
+        sort_by_created,
+        wait_until_ready,
+    )
+    from aind_session.utils.docdb_utils import (
+        DEFAULT_DOCDB_RETRY,
+        DOCDB_BATCH_SIZE,
+        extract_codeocean_data_asset_ids_from_docdb_record,
+        get_codeocean_data_asset_ids_from_docdb,
+        get_docdb_api_client,
+        get_docdb_record,
+        get_docdb_records,
+        get_lazy_subject_docdb_records,
+        get_subject_docdb_records,
+        iter_docdb_records,
+        iter_subject_docdb_records,
+    )
+    from aind_session.utils.misc_utils import (
+        DEFAULT_MAX_CONCURRENCY,
+        DEFAULT_TCP_KEEPALIVE,
+        get_cache_dir,
+        get_http_adapter,
+        get_max_concurrency,
+        get_tcp_keepalive,
+        get_ttl_hash,
+        set_max_concurrency,
+    )
+    from aind_session.utils.s3_utils import (
+        DEFAULT_BUCKET_INDEX_MAX_AGE,
+        S3_DATA_BUCKET_NAMES,
+        BucketIndex,
+        get_bucket_and_prefix,
+        get_bucket_index,
+        get_source_dir_by_name,
+        get_subdir_names,
+        is_bucket_index_enabled,
+        set_bucket_index_enabled,
+    )
+    from aind_session.utils.stats_utils import (
+        CacheStats,
+        CallStats,
+        ExplainNode,
+        Report,
+        bind_context,
+        explain,
+        explain_step,
+        get_caller,
+        get_endpoint,
+        get_response_hook,
+        get_step_name,
+        instrument_s3fs,
+        instrument_session,
+        is_stats_enabled,
+        profile,
+        record_cache,
+        record_call,
+        record_step,
+        reset_stats,
+        set_stats_enabled,
+        stats,
+    )
+
+_EXPORTS: dict[str, tuple[str, ...]] = {
+    # submodules in order of the cost of importing them (and their dependencies)
+    "misc_utils": (
+        "DEFAULT_MAX_CONCURRENCY",
+        "DEFAULT_TCP_KEEPALIVE",
+        "get_cache_dir",
+        "get_http_adapter",
+        "get_max_concurrency",
+        "get_tcp_keepalive",
+        "get_ttl_hash",
+        "set_max_concurrency",
+    ),
+    "stats_utils": (
+        "CacheStats",
+        "CallStats",
+        "ExplainNode",
+        "Report",
+        "bind_context",
+        "explain",
+        "explain_step",
+        "get_caller",
+        "get_endpoint",
+        "get_response_hook",
+        "get_step_name",
+        "instrument_s3fs",
+        "instrument_session",
+        "is_stats_enabled",
+        "profile",
+        "record_cache",
+        "record_call",
+        "record_step",
+        "reset_stats",
+        "set_stats_enabled",
+        "stats",
+    ),
+    "cache_utils": (
+        "DEFAULT_MODEL_CACHE_MAX_BYTES",
+        "DEFAULT_MODEL_CACHE_TTL",
+        "CacheInfo",
+        "PersistentModelCache",
+        "get_model_cache",
+        "is_model_cache_enabled",
+        "set_model_cache_enabled",
+        "ttl_cache",
+    ),
+    "s3_utils": (
+        "DEFAULT_BUCKET_INDEX_MAX_AGE",
+        "S3_DATA_BUCKET_NAMES",
+        "BucketIndex",
+        "get_bucket_and_prefix",
+        "get_bucket_index",
+        "get_source_dir_by_name",
+        "get_subdir_names",
+        "is_bucket_index_enabled",
+        "set_bucket_index_enabled",
+    ),
+    "docdb_utils": (
+        "DEFAULT_DOCDB_RETRY",
+        "DOCDB_BATCH_SIZE",
+        "extract_codeocean_data_asset_ids_from_docdb_record",
+        "get_codeocean_data_asset_ids_from_docdb",
+        "get_docdb_api_client",
+        "get_docdb_record",
+        "get_docdb_records",
+        "get_lazy_subject_docdb_records",
+        "get_subject_docdb_records",
+        "iter_docdb_records",
+        "iter_subject_docdb_records",
+    ),
+    "codeocean_utils": (
+        "DEFAULT_CO_RETRY",
+        "LazyDataAsset",
+        "get_codeocean_client",
+        "get_codeocean_model",
+        "get_codeocean_models",
+        "get_data_asset_model",
+        "get_data_asset_models",
+        "get_data_asset_search_query",
+        "get_data_asset_source_dir",
+        "get_data_assets",
+        "get_normalized_uuid",
+        "get_output_text",
+        "get_subject_data_assets",
+        "is_computation_error",
+        "is_data_asset_error",
+        "is_output_error",
+        "is_output_file_from_sorting_pipeline",
+        "is_raw_data_asset",
+        "iter_data_assets",
+        "search_computations",
+        "search_computations_by_data_asset",
+        "search_data_assets",
+        "sort_by_created",
+        "wait_until_ready",
+    ),
+    "catalog_utils": (
+        "CATALOG_BATCH_SIZE",
+        "DEFAULT_CATALOG_DOCDB_PROJECTION",
+        "DEFAULT_CATALOG_MAX_AGE",
+        "Catalog",
+        "CatalogInfo",
+        "get_catalog",
+        "get_catalog_max_age",
+        "get_catalog_path",
+        "is_catalog_enabled",
+        "set_catalog_enabled",
+        "set_catalog_max_age",
+    ),
+}
+
+_SUBMODULE_BY_NAME = {
+    name: submodule for submodule, names in _EXPORTS.items() for name in names
+}
+
+if not TYPE_CHECKING:  # type checkers use the re-exports above
+    __all__ = list(_SUBMODULE_BY_NAME)
+
+
+def __getattr__(name: str) -> object:
+    if name in _EXPORTS:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name not in _SUBMODULE_BY_NAME:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f"{__name__}.{_SUBMODULE_BY_NAME[name]}")
+    value = getattr(module, name)
+    globals()[name] = value  # skip this lookup next time
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_EXPORTS, *_SUBMODULE_BY_NAME})
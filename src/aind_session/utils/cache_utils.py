@@ -0,0 +1,524 @@
+from __future__ import annotations
+
+import collections
+import functools
+import inspect
+import logging
+import math
+import os
+import pathlib
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Callable, Hashable, Mapping
+from typing import TYPE_CHECKING, Any, Generic, NamedTuple, TypeVar
+
+import codeocean.data_asset
+
+import aind_session.utils.misc_utils
+from aind_session.utils.stats_utils import get_step_name, record_cache, record_step
+
+logger = logging.getLogger(__name__)
+
+_R = TypeVar("_R")
+
+if TYPE_CHECKING:
+    from typing_extensions import ParamSpec, Protocol
+
+    _P = ParamSpec("_P")
+
+    class TTLCachedFunction(Protocol[_P, _R]):
+        """A function decorated with `ttl_cache`, with the methods it gains."""
+
+        def __call__(self, *args: _P.args, **kwargs: _P.kwargs) -> _R: ...
+        def cache_info(self) -> CacheInfo: ...
+        def cache_clear(self) -> None: ...
+        def cache_invalidate(self, *args: _P.args, **kwargs: _P.kwargs) -> bool: ...
+        def cache_peek(self, *args: _P.args, **kwargs: _P.kwargs) -> _R: ...
+        def cache_prime(
+            self, value: _R, /, *args: _P.args, **kwargs: _P.kwargs
+        ) -> None: ...
+
+
+DEFAULT_MODEL_CACHE_TTL: float = 24 * 3600
+"""Seconds before a data asset model stored on disk is considered stale."""
+
+DEFAULT_MODEL_CACHE_MAX_BYTES: int = 64 * 1024**2
+"""Total size of serialized models stored on disk before the oldest are evicted."""
+
+
+class PersistentModelCache:
+    """SQLite-backed store of `codeocean.data_asset.DataAsset` models, shared
+    across processes.
+
+    - models are stored as json, keyed by data asset ID
+    - entries older than `ttl` seconds are ignored, and removed on eviction
+    - when the total size of stored json exceeds `max_bytes`, the
+      least-recently-stored entries are evicted
+    - the database uses write-ahead logging, so many processes can read while one
+      writes: each thread gets its own connection
+    - any error from SQLite is logged and treated as a cache miss, so a broken
+      or read-only cache never breaks a lookup
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> cache = PersistentModelCache(pathlib.Path(tempfile.mkdtemp()) / "models.sqlite")
+    >>> asset = codeocean.data_asset.DataAsset(
+    ...     id="16d46411-540a-4122-b47f-8cb2a15d593a", created=1702620828,
+    ...     name="ecephys_676909_2023-12-13_13-43-40", mount="ecephys",
+    ...     state=codeocean.data_asset.DataAssetState.Ready,
+    ...     type=codeocean.data_asset.DataAssetType.Dataset, last_used=0,
+    ... )
+    >>> cache.put(asset)
+    >>> cache.get(asset.id) == asset
+    True
+    >>> cache.get("00000000-0000-0000-0000-000000000000") is None
+    True
+    """
+
+    EVICTION_CHECK_INTERVAL = 50
+    """Number of puts between checks of the total size of the cache."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        ttl: float = DEFAULT_MODEL_CACHE_TTL,
+        max_bytes: int = DEFAULT_MODEL_CACHE_MAX_BYTES,
+    ) -> None:
+        self.path = pathlib.Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._puts_since_eviction_check = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS data_assets ("
+            " id TEXT PRIMARY KEY,"
+            " json TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " stored REAL NOT NULL"
+            ")"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS data_assets_stored ON data_assets (stored)"
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path.as_posix()!r})"
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            # autocommit mode: transactions are opened explicitly for writes
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    def get(self, asset_id: str) -> codeocean.data_asset.DataAsset | None:
+        """Return the stored model for `asset_id`, or None if missing or stale."""
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                "SELECT json FROM data_assets WHERE id = ? AND stored > ?",
+                (asset_id, time.time() - self.ttl),
+            ).fetchone()
+        except sqlite3.Error as exc:
+            logger.warning(f"Failed to read {asset_id} from {self!r}: {exc!r}")
+            return None
+        record_cache(f"{__name__}.{self.__class__.__name__}", hit=row is not None)
+        if row is None:
+            return None
+        logger.debug(f"Found {asset_id} in {self!r}")
+        return codeocean.data_asset.DataAsset.from_json(row[0])
+
+    def put(self, asset: codeocean.data_asset.DataAsset) -> None:
+        """Store a model, replacing any existing entry with the same ID.
+
+        - only assets in the 'ready' state are stored, as others are expected to
+          change soon
+        """
+        if asset.state != codeocean.data_asset.DataAssetState.Ready:
+            logger.debug(f"Not storing {asset.id} in {self!r}: {asset.state=}")
+            return
+        text = asset.to_json()
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO data_assets (id, json, size, stored) VALUES (?, ?, ?, ?)",
+                (asset.id, text, len(text), time.time()),
+            )
+        except sqlite3.Error as exc:
+            logger.warning(f"Failed to write {asset.id} to {self!r}: {exc!r}")
+            return
+        self._puts_since_eviction_check += 1
+        if self._puts_since_eviction_check >= self.EVICTION_CHECK_INTERVAL:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove stale entries, then the least-recently-stored entries until the
+        total size is under `max_bytes`."""
+        self._puts_since_eviction_check = 0
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "DELETE FROM data_assets WHERE stored <= ?",
+                    (time.time() - self.ttl,),
+                )
+                total = connection.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM data_assets"
+                ).fetchone()[0]
+                if total > self.max_bytes:
+                    # delete oldest rows until the running total of the
+                    # remaining (newest) rows fits
+                    connection.execute(
+                        "DELETE FROM data_assets WHERE id IN ("
+                        " SELECT id FROM ("
+                        "  SELECT id, SUM(size) OVER (ORDER BY stored DESC) AS running"
+                        "  FROM data_assets"
+                        " ) WHERE running > ?"
+                        ")",
+                        (self.max_bytes,),
+                    )
+                    logger.debug(
+                        f"Evicted oldest entries from {self!r}: total size was {total} bytes"
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as exc:
+            logger.warning(f"Failed to evict entries from {self!r}: {exc!r}")
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        connection = self._connection()
+        connection.execute("DELETE FROM data_assets")
+
+
+def is_model_cache_enabled() -> bool:
+    """Whether data asset models are cached on disk.
+
+    - enabled by default: set `AIND_SESSION_MODEL_CACHE=0` to disable, or
+      use `set_model_cache_enabled()`
+    """
+    return _model_cache_enabled
+
+
+def set_model_cache_enabled(enabled: bool) -> None:
+    """Turn caching of data asset models on disk on or off for this process.
+
+    Examples
+    --------
+    >>> set_model_cache_enabled(False)
+    >>> get_model_cache() is None
+    True
+    >>> set_model_cache_enabled(True)
+    """
+    global _model_cache_enabled
+    _model_cache_enabled = enabled
+
+
+_model_cache_enabled: bool = os.getenv("AIND_SESSION_MODEL_CACHE", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+    "off",
+)
+
+
+@functools.cache
+def _get_model_cache(path: pathlib.Path) -> PersistentModelCache | None:
+    try:
+        return PersistentModelCache(path)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning(
+            f"Failed to open model cache at {path.as_posix()}: models will not be"
+            f" cached on disk ({exc!r})"
+        )
+        return None
+
+
+def get_model_cache() -> PersistentModelCache | None:
+    """The on-disk cache of data asset models used by `get_data_asset_model`,
+    or None if disabled.
+
+    - stored in `aind_session.utils.get_cache_dir()`
+    """
+    if not is_model_cache_enabled():
+        return None
+    return _get_model_cache(
+        aind_session.utils.misc_utils.get_cache_dir() / "models.sqlite"
+    )
+
+
+class CacheInfo(NamedTuple):
+    """Statistics for a function decorated with `ttl_cache`."""
+
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+    nbytes: int | None
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    expires: float
+    nbytes: int
+    is_error: bool = False
+
+
+def _get_approximate_size(obj: object, seen: set[int] | None = None) -> int:
+    """Approximate memory used by an object and the objects it contains."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, Mapping):
+        size += sum(
+            _get_approximate_size(k, seen) + _get_approximate_size(v, seen)
+            for k, v in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_get_approximate_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _get_approximate_size(vars(obj), seen)
+    return size
+
+
+class _TTLCache(Generic[_R]):
+    """State for a single function decorated with `ttl_cache`."""
+
+    def __init__(
+        self,
+        func: Callable[..., _R],
+        ttl: float | None,
+        maxsize: int | None,
+        maxbytes: int | None,
+        cache_errors: tuple[type[Exception], ...] = (),
+        error_ttl: float | None = None,
+    ) -> None:
+        self.func = func
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.step_name = get_step_name(func)
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.cache_errors = cache_errors
+        self.error_ttl = error_ttl
+        self.signature = inspect.signature(func)
+        # keyed by (arguments, ttl_hash):
+        self.entries: collections.OrderedDict[tuple[Hashable, Any], _CacheEntry] = (
+            collections.OrderedDict()
+        )
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+
+    def make_key(self, args: tuple, kwargs: dict[str, Any]) -> tuple[Hashable, Any]:
+        """Normalize arguments to a hashable key, and the `ttl_hash` (if any),
+        which together identify a result."""
+        bound = self.signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        ttl_hash = arguments.pop("ttl_hash", None)
+        key = tuple(
+            (
+                (name, tuple(sorted(value.items())))
+                if self.signature.parameters[name].kind is inspect.Parameter.VAR_KEYWORD
+                else (name, value)
+            )
+            for name, value in arguments.items()
+        )
+        return key, ttl_hash
+
+    def get(self, key: Hashable, ttl_hash: Hashable) -> _CacheEntry | None:
+        with self.lock:
+            entry = self.entries.get((key, ttl_hash))
+            if entry is not None and entry.expires <= time.monotonic():
+                self.remove((key, ttl_hash))
+                entry = None
+            record_cache(self.name, hit=entry is not None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end((key, ttl_hash))
+            return entry
+
+    def set(
+        self, key: Hashable, ttl_hash: Hashable, value: object, is_error: bool = False
+    ) -> None:
+        nbytes = _get_approximate_size(value) if self.maxbytes is not None else 0
+        ttl = self.error_ttl if is_error else self.ttl
+        expires = math.inf if ttl is None else time.monotonic() + ttl
+        with self.lock:
+            self.remove((key, ttl_hash))
+            self.entries[key, ttl_hash] = _CacheEntry(value, expires, nbytes, is_error)
+            self.nbytes += nbytes
+            while self.entries and (
+                (self.maxsize is not None and len(self.entries) > self.maxsize)
+                or (self.maxbytes is not None and self.nbytes > self.maxbytes)
+            ):
+                oldest = next(iter(self.entries))
+                self.remove(oldest)
+
+    def remove(self, entry_key: tuple[Hashable, Any]) -> bool:
+        with self.lock:
+            entry = self.entries.pop(entry_key, None)
+            if entry is None:
+                return False
+            self.nbytes -= entry.nbytes
+            return True
+
+    def __call__(self, *args: object, **kwargs: object) -> _R:
+        with record_step(self.step_name):
+            key, ttl_hash = self.make_key(args, kwargs)
+            if (entry := self.get(key, ttl_hash)) is not None:
+                if entry.is_error:
+                    raise entry.value.with_traceback(None)
+                return entry.value
+            try:
+                value = self.func(*args, **kwargs)
+            except self.cache_errors as exc:
+                self.set(key, ttl_hash, exc, is_error=True)
+                raise
+            self.set(key, ttl_hash, value)
+            return value
+
+    def info(self) -> CacheInfo:
+        with self.lock:
+            return CacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                maxsize=self.maxsize,
+                currsize=len(self.entries),
+                nbytes=self.nbytes if self.maxbytes is not None else None,
+            )
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+
+    def invalidate(self, *args: object, **kwargs: object) -> bool:
+        key, _ = self.make_key(args, kwargs)
+        with self.lock:
+            entry_keys = [
+                entry_key for entry_key in self.entries if entry_key[0] == key
+            ]
+            for entry_key in entry_keys:
+                self.remove(entry_key)
+        return bool(entry_keys)
+
+    def peek(self, *args: object, **kwargs: object) -> _R:
+        key, ttl_hash = self.make_key(args, kwargs)
+        entry = self.get(key, ttl_hash)
+        if entry is None or entry.is_error:
+            raise KeyError(f"No cached result for {args=}, {kwargs=}")
+        return entry.value
+
+    def prime(self, value: _R, /, *args: object, **kwargs: object) -> None:
+        key, ttl_hash = self.make_key(args, kwargs)
+        self.set(key, ttl_hash, value)
+
+
+def ttl_cache(
+    ttl: float | None = 10 * 60,
+    maxsize: int | None = 256,
+    maxbytes: int | None = None,
+    cache_errors: tuple[type[Exception], ...] = (),
+    error_ttl: float | None = 60,
+) -> Callable[[Callable[_P, _R]], TTLCachedFunction[_P, _R]]:
+    """Decorator that caches function results in memory, with a time-to-live and
+    bounded size.
+
+    - results are discarded `ttl` seconds after they were computed (None means
+      no expiry)
+    - least-recently-used results are evicted when there are more than
+      `maxsize` results, or when their approximate total size exceeds `maxbytes`
+      (None means no limit)
+    - arguments are normalized against the function's signature, so `f(1)` and
+      `f(x=1)` share a result
+    - a `ttl_hash` parameter, if the function has one, is part of the key, so
+      results are kept per `ttl_hash`: callers can request fresher results with
+      `aind_session.utils.get_ttl_hash(seconds)` without evicting results for
+      other periods, and results for periods no longer requested age out
+      through LRU eviction (or when they expire)
+    - exceptions of the types in `cache_errors` are also cached, for
+      `error_ttl` seconds, and re-raised on subsequent calls: use for negative
+      results (e.g. `FileNotFoundError`) that are expensive to compute
+    - the decorated function gains methods:
+        - `cache_info()`: hit/miss statistics and current size
+        - `cache_clear()`: remove all results and reset statistics
+        - `cache_invalidate(*args, **kwargs)`: remove the results for specific
+          arguments, for any `ttl_hash`
+        - `cache_peek(*args, **kwargs)`: return the result for specific
+          arguments if it's cached, without calling the function, otherwise
+          raise `KeyError`
+        - `cache_prime(value, *args, **kwargs)`: store a result for specific
+          arguments that was obtained some other way (e.g. from a batched
+          request), as if the function had returned it
+
+    Examples
+    --------
+    >>> @ttl_cache(ttl=60, maxsize=2)
+    ... def square(x: int) -> int:
+    ...     return x * x
+    >>> square(2), square(x=2), square(3), square(4)
+    (4, 4, 9, 16)
+    >>> square.cache_info()
+    CacheInfo(hits=1, misses=3, maxsize=2, currsize=2, nbytes=None)
+    >>> square.cache_invalidate(4)
+    True
+    >>> square.cache_prime(25, 5)
+    >>> square(5), square.cache_info().hits
+    (25, 2)
+    >>> square.cache_peek(5)
+    25
+    >>> square.cache_clear()
+    >>> square.cache_info().currsize
+    0
+    """
+
+    def decorator(func: Callable[_P, _R]) -> TTLCachedFunction[_P, _R]:
+        cache = _TTLCache(
+            func,
+            ttl=ttl,
+            maxsize=maxsize,
+            maxbytes=maxbytes,
+            cache_errors=cache_errors,
+            error_ttl=error_ttl,
+        )
+
+        @functools.wraps(func)
+        def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+            return cache(*args, **kwargs)
+
+        wrapper.cache_info = cache.info  # type: ignore[attr-defined]
+        wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+        wrapper.cache_invalidate = cache.invalidate  # type: ignore[attr-defined]
+        wrapper.cache_peek = cache.peek  # type: ignore[attr-defined]
+        wrapper.cache_prime = cache.prime  # type: ignore[attr-defined]
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+if __name__ == "__main__":
+    from aind_session import testmod
+
+    testmod()
@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+import datetime
+import functools
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from typing import Any, ClassVar, NamedTuple
+
+import codeocean.data_asset
+import npc_session
+
+import aind_session.utils.codeocean_utils
+import aind_session.utils.docdb_utils
+import aind_session.utils.misc_utils
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_MAX_AGE: float = 24 * 3600
+"""Seconds after a refresh before the catalog is reported as stale, and no longer
+used to answer queries (see `get_catalog_max_age()`)."""
+
+DEFAULT_CATALOG_DOCDB_PROJECTION: dict[str, int] = {
+    "name": 1,
+    "created": 1,
+    "location": 1,
+    "external_links": 1,
+    "subject.subject_id": 1,
+    "data_description": 1,
+}
+"""Fields of DocumentDB records stored in the catalog: large fields (e.g.
+`processing`, `quality_control`) are excluded by default."""
+
+CATALOG_BATCH_SIZE = 500
+"""Maximum number of values in a single `IN` query to the catalog, within
+SQLite's limit on the number of parameters in a statement."""
+
+
+class CatalogInfo(NamedTuple):
+    """Contents and staleness of a `Catalog`."""
+
+    path: pathlib.Path
+    data_assets_refreshed: datetime.datetime | None
+    data_assets_count: int
+    docdb_records_refreshed: datetime.datetime | None
+    docdb_records_count: int
+
+
+class Catalog:
+    """Local SQLite snapshot of data asset metadata from CodeOcean and records from
+    DocumentDB, for answering common queries without network requests.
+
+    - populated and updated only by `refresh()`: each source is replaced in a
+      single transaction, so readers always see a complete snapshot
+    - `info()` reports when each source was last refreshed, and `is_stale()`
+      checks against a maximum age
+        - the result is kept for `INFO_TTL` seconds, or until the next refresh
+          in this process, so checking the catalog before each query is cheap
+    - queries return the same types as their live equivalents (data assets are
+      `LazyDataAsset` instances)
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> catalog = Catalog(pathlib.Path(tempfile.mkdtemp()) / "catalog.sqlite")
+    >>> catalog.is_refreshed()
+    False
+    >>> catalog.refresh()                                   # doctest: +SKIP
+    >>> catalog.get_data_assets('ecephys_676909_2023-12-13_13-43-40')[0].name   # doctest: +SKIP
+    'ecephys_676909_2023-12-13_13-43-40'
+    """
+
+    INFO_TTL: ClassVar[float] = 60
+    """Seconds before `info()` checks again for refreshes made by other
+    processes."""
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = pathlib.Path(path)
+        self._local = threading.local()
+        self._info: tuple[float, CatalogInfo] | None = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(
+            "CREATE TABLE IF NOT EXISTS data_assets ("
+            " id TEXT PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " created INTEGER NOT NULL,"
+            " subject_id TEXT,"
+            " json TEXT NOT NULL"
+            ");"
+            "CREATE INDEX IF NOT EXISTS data_assets_name ON data_assets (name);"
+            "CREATE INDEX IF NOT EXISTS data_assets_subject_id ON data_assets (subject_id);"
+            "CREATE TABLE IF NOT EXISTS docdb_records ("
+            " id TEXT PRIMARY KEY,"
+            " name TEXT,"
+            " created TEXT,"
+            " subject_id TEXT,"
+            " json TEXT NOT NULL"
+            ");"
+            "CREATE INDEX IF NOT EXISTS docdb_records_name ON docdb_records (name);"
+            "CREATE INDEX IF NOT EXISTS docdb_records_subject_id ON docdb_records (subject_id);"
+            "CREATE TABLE IF NOT EXISTS refreshes ("
+            " source TEXT PRIMARY KEY,"
+            " refreshed REAL NOT NULL,"
+            " count INTEGER NOT NULL"
+            ");"
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path.as_posix()!r})"
+
+    def _connection(self) -> sqlite3.Connection:
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            # autocommit mode: transactions are opened explicitly for writes
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    def _replace(
+        self, table: str, rows: Iterable[tuple[str, Any, Any, Any, str]]
+    ) -> int:
+        """Replace all rows in a table and record the refresh, in one transaction."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(f"DELETE FROM {table}")
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {table} (id, name, created, subject_id, json)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            count = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            connection.execute(
+                "INSERT OR REPLACE INTO refreshes (source, refreshed, count) VALUES (?, ?, ?)",
+                (table, time.time(), count),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            self._info = None
+        return count
+
+    def refresh_data_assets(
+        self,
+        search_params: dict[str, Any] | None = None,
+        max_concurrent_pages: int = 4,
+    ) -> int:
+        """Replace the snapshot of data assets with all assets matching
+        `search_params` (default: all non-archived assets), returning the number
+        stored."""
+
+        def rows() -> Iterator[tuple[str, str, int, str | None, str]]:
+            for asset in aind_session.utils.codeocean_utils.iter_data_assets(
+                {
+                    "sort_field": "created",
+                    "sort_order": "asc",
+                    **(search_params or {}),
+                },
+                as_dict=True,
+                max_pages=sys.maxsize,
+                max_concurrent_pages=max_concurrent_pages,
+            ):
+                yield (
+                    asset["id"],
+                    asset["name"],
+                    asset["created"],
+                    _get_data_asset_subject_id(asset),
+                    json.dumps(asset),
+                )
+
+        t0 = time.time()
+        count = self._replace("data_assets", rows())
+        logger.info(
+            f"Stored {count} data assets in {self!r} in {time.time() - t0:.1f} s"
+        )
+        return count
+
+    def refresh_docdb_records(
+        self,
+        filter_query: dict[str, Any] | None = None,
+        projection: dict[str, Any] | None = DEFAULT_CATALOG_DOCDB_PROJECTION,
+    ) -> int:
+        """Replace the snapshot of DocumentDB records with all records matching
+        `filter_query` (default: all records), returning the number stored.
+
+        - `projection` limits the fields stored: see
+          `DEFAULT_CATALOG_DOCDB_PROJECTION`
+        """
+
+        def rows() -> Iterator[tuple[str, str | None, Any, str | None, str]]:
+            for record in aind_session.utils.docdb_utils.iter_docdb_records(
+                filter_query, page_size=1000, projection=projection
+            ):
+                yield (
+                    str(record["_id"]),
+                    record.get("name"),
+                    record.get("created"),
+                    _get_docdb_record_subject_id(record),
+                    json.dumps(record, default=str),
+                )
+
+        t0 = time.time()
+        count = self._replace("docdb_records", rows())
+        logger.info(
+            f"Stored {count} DocumentDB records in {self!r} in {time.time() - t0:.1f} s"
+        )
+        return count
+
+    def refresh(self, data_assets: bool = True, docdb_records: bool = True) -> None:
+        """Replace the snapshot of data assets and/or DocumentDB records."""
+        if data_assets:
+            self.refresh_data_assets()
+        if docdb_records:
+            self.refresh_docdb_records()
+
+    def info(self) -> CatalogInfo:
+        """When each source was last refreshed, and how many items it holds."""
+        if self._info is not None and time.monotonic() < self._info[0]:
+            return self._info[1]
+        refreshes = {
+            source: (refreshed, count)
+            for source, refreshed, count in self._connection().execute(
+                "SELECT source, refreshed, count FROM refreshes"
+            )
+        }
+
+        def get_dt(source: str) -> datetime.datetime | None:
+            if source not in refreshes:
+                return None
+            return datetime.datetime.fromtimestamp(refreshes[source][0])
+
+        info = CatalogInfo(
+            path=self.path,
+            data_assets_refreshed=get_dt("data_assets"),
+            data_assets_count=refreshes.get("data_assets", (None, 0))[1],
+            docdb_records_refreshed=get_dt("docdb_records"),
+            docdb_records_count=refreshes.get("docdb_records", (None, 0))[1],
+        )
+        self._info = (time.monotonic() + self.INFO_TTL, info)
+        return info
+
+    def is_refreshed(self) -> bool:
+        """Whether data assets have been stored at least once."""
+        return self.info().data_assets_refreshed is not None
+
+    def is_stale(self, max_age: float = DEFAULT_CATALOG_MAX_AGE) -> bool:
+        """Whether any source was never refreshed, or was last refreshed more than
+        `max_age` seconds ago."""
+        info = self.info()
+        return any(
+            dt is None or time.time() - dt.timestamp() > max_age
+            for dt in (info.data_assets_refreshed, info.docdb_records_refreshed)
+        )
+
+    def _get_data_assets(
+        self, where: str, parameters: tuple[Any, ...]
+    ) -> tuple[codeocean.data_asset.DataAsset, ...]:
+        rows = self._connection().execute(
+            f"SELECT json FROM data_assets WHERE {where} ORDER BY created, id",
+            parameters,
+        )
+        return tuple(
+            aind_session.utils.codeocean_utils.LazyDataAsset(json.loads(row[0]))
+            for row in rows
+        )
+
+    def get_data_assets(
+        self, name_startswith: str
+    ) -> tuple[codeocean.data_asset.DataAsset, ...]:
+        """Data assets whose names start with the search term, sorted by
+        ascending creation date: equivalent to `get_data_assets`."""
+        return self._get_data_assets(
+            # a range on the indexed name column, rather than LIKE, which would
+            # need escaping and is case-insensitive
+            "name >= ? AND name < ?",
+            (name_startswith, name_startswith + "\U0010ffff"),
+        )
+
+    def get_subject_data_assets(
+        self, subject_id: str | int
+    ) -> tuple[codeocean.data_asset.DataAsset, ...]:
+        """Data assets associated with a subject ID, sorted by ascending creation
+        date: equivalent to `get_subject_data_assets`.
+
+        - includes assets with the subject ID in their metadata or name, and
+          assets linked from the subject's DocumentDB records
+        """
+        get_linked_ids = (
+            aind_session.utils.docdb_utils.extract_codeocean_data_asset_ids_from_docdb_record
+        )
+        linked_ids = sorted(
+            {
+                asset_id
+                for record in self.get_subject_docdb_records(subject_id)
+                if "external_links" in record
+                for asset_id in get_linked_ids(record)
+            }
+        )
+        id_to_asset = {
+            asset.id: asset
+            for asset in self._get_data_assets("subject_id = ?", (str(subject_id),))
+        }
+        for i in range(0, len(linked_ids), CATALOG_BATCH_SIZE):
+            batch = linked_ids[i : i + CATALOG_BATCH_SIZE]
+            id_to_asset.update(
+                (asset.id, asset)
+                for asset in self._get_data_assets(
+                    f"id IN ({', '.join('?' * len(batch))})", tuple(batch)
+                )
+            )
+        return tuple(
+            sorted(id_to_asset.values(), key=lambda asset: (asset.created, asset.id))
+        )
+
+    def get_subject_docdb_records(
+        self, subject_id: str | int
+    ) -> tuple[dict[str, Any], ...]:
+        """DocumentDB records associated with a subject ID, sorted by ascending
+        creation time."""
+        rows = self._connection().execute(
+            "SELECT json FROM docdb_records WHERE subject_id = ? ORDER BY created, id",
+            (str(subject_id),),
+        )
+        return tuple(json.loads(row[0]) for row in rows)
+
+
+def _get_data_asset_subject_id(asset: dict[str, Any]) -> str | None:
+    subject_id = (asset.get("custom_metadata") or {}).get("subject id")
+    if subject_id is None:
+        subject_id = npc_session.extract_subject(asset["name"])
+    return None if subject_id is None else str(subject_id)
+
+
+def _get_docdb_record_subject_id(record: dict[str, Any]) -> str | None:
+    subject_id = (record.get("subject") or {}).get("subject_id")
+    return None if subject_id is None else str(subject_id)
+
+
+def is_catalog_enabled() -> bool:
+    """Whether `get_data_assets`, `get_subject_data_assets` and `get_sessions`
+    answer from the local catalog instead of CodeOcean and DocumentDB.
+
+    - disabled by default: set `AIND_SESSION_CATALOG=1` to enable, or use
+      `set_catalog_enabled()`
+    - the catalog must be populated with `get_catalog().refresh()` or the
+      `aind-session-catalog refresh` command
+    """
+    return _catalog_enabled
+
+
+def set_catalog_enabled(enabled: bool) -> None:
+    """Turn answering queries from the local catalog on or off for this
+    process."""
+    global _catalog_enabled
+    _catalog_enabled = enabled
+
+
+_catalog_enabled: bool = os.getenv("AIND_SESSION_CATALOG", "0").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
+
+def get_catalog_max_age() -> float:
+    """Seconds after data assets were last refreshed before the catalog is too
+    stale to answer queries, which are then made live until it's refreshed.
+
+    - defaults to `DEFAULT_CATALOG_MAX_AGE`: set `AIND_SESSION_CATALOG_MAX_AGE` to
+      change the default (`inf` to always use the catalog), or use
+      `set_catalog_max_age()`
+    """
+    return _catalog_max_age
+
+
+def set_catalog_max_age(max_age: float) -> None:
+    """Change the maximum age of a catalog used to answer queries, for this
+    process."""
+    global _catalog_max_age
+    _catalog_max_age = max_age
+
+
+_catalog_max_age: float = float(
+    os.getenv("AIND_SESSION_CATALOG_MAX_AGE", DEFAULT_CATALOG_MAX_AGE)
+)
+
+
+@functools.cache
+def _get_catalog(path: pathlib.Path) -> Catalog:
+    return Catalog(path)
+
+
+def get_catalog_path() -> pathlib.Path:
+    """Location of the local catalog, in `aind_session.utils.get_cache_dir()`."""
+    return aind_session.utils.misc_utils.get_cache_dir() / "catalog.sqlite"
+
+
+def get_catalog(require_enabled: bool = False) -> Catalog | None:
+    """The local catalog, or None if `require_enabled=True` and the catalog is
+    disabled, has never been refreshed, is older than `get_catalog_max_age()`,
+    or can't be read.
+
+    - with `require_enabled=True`, the catalog file isn't opened (or created)
+      unless the catalog is enabled, and any error opening or reading it is
+      logged, so queries fall back to live requests
+
+    Examples
+    --------
+    >>> get_catalog(require_enabled=True) is None       # disabled by default
+    True
+    """
+    if not require_enabled:
+        return _get_catalog(get_catalog_path())
+    if not is_catalog_enabled():
+        return None
+    path = get_catalog_path()
+    try:
+        catalog = _get_catalog(path)
+        refreshed = catalog.info().data_assets_refreshed
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning(
+            f"Failed to open catalog at {path.as_posix()}: queries will be made live ({exc!r})"
+        )
+        return None
+    if refreshed is None:
+        logger.warning(
+            f"{catalog!r} is enabled but has never been refreshed: queries will be made live"
+        )
+        return None
+    if time.time() - refreshed.timestamp() > get_catalog_max_age():
+        logger.warning(
+            f"{catalog!r} is stale (last refreshed {refreshed}): queries will be"
+            " made live until it's refreshed"
+        )
+        return None
+    return catalog
+
+
+if __name__ == "__main__":
+    from aind_session import testmod
+
+    testmod()
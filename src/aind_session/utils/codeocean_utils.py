@@ -2,15 +2,21 @@
 # types-requests has compatibility issue with boto3 https://github.com/python/typeshed/issues/10825
 from __future__ import annotations
 
+import collections
+import concurrent.futures
 import contextlib
+import dataclasses
 import datetime
 import functools
+import itertools
 import logging
 import os
+import sqlite3
+import threading
 import time
 import uuid
-from collections.abc import Iterable
-from typing import Any, Literal, overload
+from collections.abc import Callable, Generator, Iterable, Iterator
+from typing import Any, ClassVar, Literal, overload
 
 import codeocean
 import codeocean.components
@@ -30,7 +36,18 @@ except ImportError:
 
 
 import aind_session.utils
+import aind_session.utils.cache_utils
+import aind_session.utils.catalog_utils
 import aind_session.utils.docdb_utils
+import aind_session.utils.s3_utils
+from aind_session.utils.cache_utils import ttl_cache
+from aind_session.utils.misc_utils import get_http_adapter, get_max_concurrency
+from aind_session.utils.stats_utils import (
+    bind_context,
+    explain_step,
+    get_response_hook,
+    instrument_session,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -89,6 +106,10 @@ def get_codeocean_client(
         token=token,
         retries=retries,
     )
+    # replace the default adapter, so the connection pool matches the number of
+    # concurrent requests:
+    client.session.mount(client.domain, get_http_adapter(retries))
+    instrument_session(client.session, "codeocean")
     if check_credentials:
         logger.debug(
             f"Checking CodeOcean credentials for read datasets scope on {client.domain}"
@@ -216,6 +237,7 @@ def get_codeocean_model(
             raise
 
 
+@explain_step
 def get_data_asset_model(
     asset_id_or_model: str | uuid.UUID | codeocean.data_asset.DataAsset,
 ) -> codeocean.data_asset.DataAsset:
@@ -223,6 +245,9 @@ def get_data_asset_model(
 
     - use to ensure we have a `DataAsset` object
     - if model is already a `DataAsset`, it is returned as-is
+    - models of 'ready' assets are cached on disk and shared across processes
+      (see `aind_session.utils.get_model_cache()`): set
+      `AIND_SESSION_MODEL_CACHE=0` to disable
 
     Examples
     --------
@@ -233,10 +258,12 @@ def get_data_asset_model(
     """
     if isinstance(asset_id_or_model, codeocean.data_asset.DataAsset):
         return asset_id_or_model
+    asset_id = get_normalized_uuid(asset_id_or_model)
+    model_cache = aind_session.utils.cache_utils.get_model_cache()
+    if model_cache is not None and (asset := model_cache.get(asset_id)) is not None:
+        return asset
     try:
-        return get_codeocean_client().data_assets.get_data_asset(
-            get_normalized_uuid(asset_id_or_model)
-        )
+        asset = get_codeocean_client().data_assets.get_data_asset(asset_id)
     except (requests.HTTPError, CodeOceanError) as exc:
         status_code = _get_status(exc)
         if status_code == 404:
@@ -245,8 +272,114 @@ def get_data_asset_model(
             ) from exc
         else:
             raise
+    if model_cache is not None:
+        model_cache.put(asset)
+    return asset
+
+
+def _get_models_concurrently(
+    get_model: Callable[[Any], Any],
+    ids_or_models: Iterable[Any],
+    max_workers: int | None = None,
+) -> tuple[Any, ...]:
+    """Apply `get_model` to each item in a thread pool, returning results in input
+    order and skipping items that are not accessible with current credentials
+    (401/404)."""
+    items = tuple(ids_or_models)
+    if max_workers is None:
+        max_workers = get_max_concurrency()
+    futures: dict[int, concurrent.futures.Future] = {}
+    to_fetch = [
+        i
+        for i, item in enumerate(items)
+        if not isinstance(
+            item, (codeocean.data_asset.DataAsset, codeocean.computation.Computation)
+        )
+    ]
+    if to_fetch:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(max_workers, len(to_fetch))
+        ) as executor:
+            get_model = bind_context(get_model)
+            futures = {i: executor.submit(get_model, items[i]) for i in to_fetch}
+    models = []
+    for i, item in enumerate(items):
+        if i not in futures:
+            models.append(item)
+            continue
+        try:
+            model = futures[i].result()
+        except (requests.HTTPError, CodeOceanError, ValueError) as exc:
+            # `get_data_asset_model` re-raises a 404 as ValueError:
+            http_error = exc.__cause__ if isinstance(exc, ValueError) else exc
+            if isinstance(
+                http_error, (requests.HTTPError, CodeOceanError)
+            ) and _get_status(http_error) in (401, 404):
+                logger.info(
+                    f"Skipping {item} as it is not accessible with current credentials"
+                )
+                continue
+            raise
+        models.append(model)
+    return tuple(models)
 
 
+def get_codeocean_models(
+    ids_or_models: Iterable[
+        str
+        | uuid.UUID
+        | codeocean.data_asset.DataAsset
+        | codeocean.computation.Computation
+    ],
+    is_computation: Literal[True] | None = None,
+    max_workers: int | None = None,
+) -> tuple[codeocean.data_asset.DataAsset | codeocean.computation.Computation, ...]:
+    """Fetches data asset or computation models for many IDs concurrently.
+
+    - equivalent to calling `get_codeocean_model` on each item, with up to
+      `max_workers` requests in flight at once (default: `get_max_concurrency()`)
+    - results are returned in input order
+    - IDs that are not accessible with current credentials (401/404) are skipped
+
+    Examples
+    --------
+    >>> model_ids = ['83636983-f80d-42d6-a075-09b60c6abd5e', '7646f92f-d225-464c-b7aa-87a87f34f408']
+    >>> models = get_codeocean_models(model_ids)
+    >>> [type(model).__name__ for model in models]
+    ['DataAsset', 'Computation']
+    """
+    return _get_models_concurrently(
+        functools.partial(get_codeocean_model, is_computation=is_computation),
+        ids_or_models,
+        max_workers=max_workers,
+    )
+
+
+@explain_step
+def get_data_asset_models(
+    asset_ids_or_models: Iterable[str | uuid.UUID | codeocean.data_asset.DataAsset],
+    max_workers: int | None = None,
+) -> tuple[codeocean.data_asset.DataAsset, ...]:
+    """Fetches data asset models for many IDs concurrently.
+
+    - equivalent to calling `get_data_asset_model` on each item, with up to
+      `max_workers` requests in flight at once (default: `get_max_concurrency()`)
+    - results are returned in input order
+    - IDs that are not accessible with current credentials (401/404) are skipped
+
+    Examples
+    --------
+    >>> asset_ids = ['83636983-f80d-42d6-a075-09b60c6abd5e', '16d46411-540a-4122-b47f-8cb2a15d593a']
+    >>> assets = get_data_asset_models(asset_ids)
+    >>> [asset.name for asset in assets]
+    ['ecephys_668759_2023-07-11_13-07-32', 'ecephys_676909_2023-12-13_13-43-40']
+    """
+    return _get_models_concurrently(
+        get_data_asset_model, asset_ids_or_models, max_workers=max_workers
+    )
+
+
+@explain_step
 def sort_by_created(
     ids_or_models: Iterable[
         str
@@ -255,24 +388,15 @@ def sort_by_created(
         | codeocean.computation.Computation
     ],
 ) -> tuple[codeocean.data_asset.DataAsset, ...]:
-    """Sort data assets or computations by ascending creation date. Accepts IDs or models."""
-    models = []
-    for id_or_model in ids_or_models:
-        try:
-            model = get_codeocean_model(id_or_model)
-        except (requests.HTTPError, CodeOceanError) as exc:
-            status_code = _get_status(exc)
-            if status_code in (401, 404):
-                logger.info(
-                    f"Skipping {id_or_model} as it is not accessible with current credentials"
-                )
-                continue
-            raise
-        models.append(model)
+    """Sort data assets or computations by ascending creation date. Accepts IDs or models.
+
+    - IDs are fetched concurrently with `get_codeocean_models`
+    """
+    models = get_codeocean_models(ids_or_models)
     return tuple(sorted(models, key=lambda asset: asset.created))
 
 
-@functools.cache
+@ttl_cache(ttl=None, maxsize=1024)
 def get_data_asset_source_dir(
     asset_id: (
         str | uuid.UUID
@@ -288,6 +412,8 @@ def get_data_asset_source_dir(
       buckets, and existence is checked
 
     - raises `FileNotFoundError` if a dir is not found
+    - if enabled, the S3 bucket index is checked before making any requests to S3
+      (see `aind_session.utils.get_bucket_index()`)
 
     - `ttl_hash` is used to cache the result for a given number of seconds (time-to-live)
         - default None means cache indefinitely
@@ -324,6 +450,19 @@ def get_data_asset_source_dir(
             path = upath.UPath(
                 f"{protocol}://{asset.source_bucket.bucket}/{asset.source_bucket.prefix}"
             )
+            index = aind_session.utils.s3_utils.get_bucket_index()
+            if (
+                protocol == "s3"
+                and index is not None
+                and index.contains(
+                    asset.source_bucket.bucket, asset.source_bucket.prefix.strip("/")
+                )
+            ):
+                logger.debug(
+                    f"Path for {asset.name}, {asset.id} returned (found in S3 bucket"
+                    f" index): {path.as_posix()}"
+                )
+                return path
             if not path.exists():
                 raise FileNotFoundError(
                     f"{path.as_posix()} found from data asset, but does not exist (or access is denied)"
@@ -432,6 +571,259 @@ def get_data_asset_search_query(
     return query_text
 
 
+class LazyDataAsset(codeocean.data_asset.DataAsset):
+    """A `DataAsset` built from a json search result, that only creates the full
+    model when a field other than `id`, `name`, `created` or `tags` is accessed.
+
+    - creating a `DataAsset` from json is slow relative to the request that
+      fetched it: most uses of search results (filtering by name, sorting by
+      creation date) don't need the full model
+    - behaves as a `DataAsset` in all other respects, including equality with
+      the equivalent `DataAsset`
+
+    Examples
+    --------
+    >>> result = search_data_assets({"query": "subject id:676909"}, as_dict=True)[0]
+    >>> asset = LazyDataAsset(result)
+    >>> isinstance(asset, codeocean.data_asset.DataAsset)
+    True
+    >>> asset == codeocean.data_asset.DataAsset.from_dict(result)
+    True
+    """
+
+    EAGER_FIELDS: ClassVar[tuple[str, ...]] = ("id", "name", "created", "tags")
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        # dataclass is frozen: bypass its __setattr__
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_model", None)
+        for field in self.EAGER_FIELDS:
+            object.__setattr__(self, field, data.get(field))
+
+    @property
+    def model(self) -> codeocean.data_asset.DataAsset:
+        """The full `DataAsset`, created on first access."""
+        if self._model is None:
+            object.__setattr__(
+                self, "_model", codeocean.data_asset.DataAsset.from_dict(self._data)
+            )
+        return self._model
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyDataAsset):
+            other = other.model
+        if not isinstance(other, codeocean.data_asset.DataAsset):
+            return NotImplemented
+        return self.model == other
+
+    def __hash__(self) -> int:
+        return hash(self.model)
+
+    def __repr__(self) -> str:
+        return repr(self.model)
+
+
+def _get_model_field(name: str) -> property:
+    def get(self: LazyDataAsset) -> object:
+        return getattr(self.model, name)
+
+    return property(get)
+
+
+for _field in dataclasses.fields(codeocean.data_asset.DataAsset):
+    if _field.name not in LazyDataAsset.EAGER_FIELDS:
+        setattr(LazyDataAsset, _field.name, _get_model_field(_field.name))
+del _field
+
+
+@explain_step
+def _get_data_asset_search_page(
+    search_params: dict[str, Any],
+    page: int,
+    page_size: int,
+    as_dict: bool,
+) -> tuple[list[codeocean.data_asset.DataAsset] | list[dict[str, Any]], bool]:
+    """Fetch one page of data asset search results, returning the results and
+    whether more pages follow, as reported by the API."""
+    params = codeocean.data_asset.DataAssetSearchParams(
+        limit=page_size,
+        offset=page * page_size,
+        **search_params,
+    )
+    if not as_dict:
+        search_results = get_codeocean_client().data_assets.search_data_assets(params)
+        results, has_more = search_results.results, search_results.has_more
+    else:
+        # requests session already has `raise_for_status` hook
+        json_results = (
+            get_codeocean_client()
+            .session.post("data_assets/search", json=params.to_dict())
+            .json()
+        )
+        results, has_more = json_results["results"], json_results["has_more"]
+    return results, has_more
+
+
+def _iter_data_asset_search_pages(
+    search_params: dict[str, Any],
+    as_dict: bool,
+    page_size: int,
+    max_pages: int,
+    max_concurrent_pages: int = 1,
+) -> Generator[
+    tuple[list[codeocean.data_asset.DataAsset] | list[dict[str, Any]], bool], None, None
+]:
+    """Yield pages of data asset search results in order, with a flag indicating
+    whether more pages follow, stopping after the last page or `max_pages`.
+
+    - with `max_concurrent_pages > 1`, a window of pages ahead of the current
+      page is fetched concurrently: requests for pages past the last page are
+      cancelled if not yet started, and their results discarded otherwise
+        - a page with fewer than `page_size` results is also treated as the last
+          page, so the window doesn't keep requesting empty pages past the end
+    """
+    if max_concurrent_pages <= 1:
+        for page in range(max_pages):
+            results, has_more = _get_data_asset_search_page(
+                search_params, page, page_size, as_dict
+            )
+            yield results, has_more
+            if not has_more:
+                return
+        return
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent_pages)
+    pending: collections.deque[concurrent.futures.Future] = collections.deque()
+    next_page = 0
+
+    def submit_next_page() -> None:
+        nonlocal next_page
+        pending.append(
+            executor.submit(
+                bind_context(_get_data_asset_search_page),
+                search_params,
+                next_page,
+                page_size,
+                as_dict,
+            )
+        )
+        next_page += 1
+
+    try:
+        while next_page < min(max_concurrent_pages, max_pages):
+            submit_next_page()
+        while pending:
+            results, has_more = pending.popleft().result()
+            has_more = has_more and len(results) >= page_size
+            yield results, has_more
+            if not has_more:
+                return
+            if next_page < max_pages:
+                submit_next_page()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+@overload
+def iter_data_assets(
+    search_params: dict[str, Any] | codeocean.data_asset.DataAssetSearchParams,
+    as_dict: Literal[False] = False,
+    page_size: int = 100,
+    max_pages: int = 1000,
+    raise_on_page_limit: bool = True,
+    max_concurrent_pages: int = 1,
+) -> Iterator[codeocean.data_asset.DataAsset]: ...
+@overload
+def iter_data_assets(
+    search_params: dict[str, Any] | codeocean.data_asset.DataAssetSearchParams,
+    as_dict: Literal[True] = True,
+    page_size: int = 100,
+    max_pages: int = 1000,
+    raise_on_page_limit: bool = True,
+    max_concurrent_pages: int = 1,
+) -> Iterator[dict[str, Any]]: ...
+@overload
+def iter_data_assets(
+    search_params: dict[str, Any] | codeocean.data_asset.DataAssetSearchParams,
+    as_dict: bool = False,
+    page_size: int = 100,
+    max_pages: int = 1000,
+    raise_on_page_limit: bool = True,
+    max_concurrent_pages: int = 1,
+) -> Iterator[codeocean.data_asset.DataAsset | dict[str, Any]]: ...
+def iter_data_assets(
+    search_params: dict[str, Any] | codeocean.data_asset.DataAssetSearchParams,
+    as_dict: bool = False,
+    page_size: int = 100,
+    max_pages: int = 1000,
+    raise_on_page_limit: bool = True,
+    max_concurrent_pages: int = 1,
+) -> Iterator[codeocean.data_asset.DataAsset | dict[str, Any]]:
+    """Yield data assets matching search parameters as each page of results
+    arrives. Accepts the same arguments as `search_data_assets`.
+
+    - the first results are available after one request, regardless of the
+      total number of results
+    - stopping iteration early (e.g. `break`) stops fetching pages
+    - if the page limit is reached, a `ValueError` is raised (or a warning
+      logged, with `raise_on_page_limit=False`) after all results up to the
+      limit have been yielded
+
+    Examples
+    --------
+    >>> search_params = {"query": "subject id:676909", "sort_field": "created", "sort_order": "asc"}
+    >>> assets = iter_data_assets(search_params)
+    >>> next(assets).name
+    'Example T1 and T2 MRI Images'
+    >>> assets.close()                  # stop fetching
+    """
+    if isinstance(search_params, codeocean.data_asset.DataAssetSearchParams):
+        updated_params = search_params.to_dict()
+    else:
+        updated_params = search_params.copy()
+    for key in ("limit", "offset"):
+        if key in search_params:
+            logger.info(
+                f"Removing {key} from provided search parameters: pagination is handled by this function"
+            )
+            updated_params.pop(key)
+
+    # set required fields if not provided
+    updated_params.setdefault("archived", False)
+    updated_params.setdefault("favorite", False)
+
+    logger.debug(
+        f"Fetching data assets results matching search parameters: {updated_params}"
+    )
+
+    count = 0
+    has_more = max_pages > 0
+    pages = _iter_data_asset_search_pages(
+        updated_params,
+        as_dict=as_dict,
+        page_size=page_size,
+        max_pages=max_pages,
+        max_concurrent_pages=max_concurrent_pages,
+    )
+    # close pages explicitly so in-flight requests are cancelled if iteration
+    # is stopped early
+    with contextlib.closing(pages):
+        for results, page_has_more in pages:
+            count += len(results)
+            has_more = page_has_more
+            yield from results
+    if has_more:
+        if raise_on_page_limit:
+            raise ValueError(
+                f"Reached page limit fetching data asset search results: try increasing parameters ({max_pages=}, {page_size=}), narrowing the search, or setting `raise_on_page_limit=False`"
+            )
+        logger.warning(
+            f"Reached page limit fetching data asset search results: returned {count}"
+            " assets, but others exist"
+        )
+    logger.debug(f"Search returned {count} data assets")
+
+
 @overload
 def search_data_assets(
     search_params: dict[str, Any] | codeocean.data_asset.DataAssetSearchParams,
@@ -439,6 +831,7 @@ def search_data_assets(
     page_size: int = 100,
     max_pages: int = 1000,
     raise_on_page_limit: bool = True,
+    max_concurrent_pages: int = 1,
 ) -> tuple[codeocean.data_asset.DataAsset, ...]: ...
 @overload
 def search_data_assets(
@@ -447,6 +840,7 @@ def search_data_assets(
     page_size: int = 100,
     max_pages: int = 1000,
     raise_on_page_limit: bool = True,
+    max_concurrent_pages: int = 1,
 ) -> tuple[dict[str, Any], ...]: ...
 def search_data_assets(
     search_params: dict[str, Any] | codeocean.data_asset.DataAssetSearchParams,
@@ -454,6 +848,7 @@ def search_data_assets(
     page_size: int = 100,
     max_pages: int = 1000,
     raise_on_page_limit: bool = True,
+    max_concurrent_pages: int = 1,
 ) -> tuple[codeocean.data_asset.DataAsset | dict[str, Any], ...]:
     """A wrapper around `codeocean.data_assets.search_data_assets` that makes it
     slightly easier to use.
@@ -467,6 +862,12 @@ def search_data_assets(
     - raises a `ValueError` if the page limit is reached, unless `raise_on_page_limit=False`
     - `as_dict=True` returns json results without converting to dataclasses
         - this will be much faster for large numbers of results
+    - `max_concurrent_pages > 1` fetches up to that many pages at a time,
+      speculatively requesting pages ahead of the last one received
+        - results are returned in page order, and fetching stops at the first
+          page that is short or has no more results after it
+        - useful for broad searches with many pages of results
+    - to process results as they arrive, use `iter_data_assets`
 
     Examples
     --------
@@ -478,64 +879,131 @@ def search_data_assets(
     >>> assets[0].created
     1673996872
     """
-    if isinstance(search_params, codeocean.data_asset.DataAssetSearchParams):
-        updated_params = search_params.to_dict()
-    else:
-        updated_params = search_params.copy()
-    for key in ("limit", "offset"):
-        if key in search_params:
-            logger.info(
-                f"Removing {key} from provided search parameters: pagination is handled by this function"
-            )
-            updated_params.pop(key)
+    return tuple(
+        iter_data_assets(
+            search_params,
+            as_dict=as_dict,
+            page_size=page_size,
+            max_pages=max_pages,
+            raise_on_page_limit=raise_on_page_limit,
+            max_concurrent_pages=max_concurrent_pages,
+        )
+    )
 
-    # set required fields if not provided
-    updated_params.setdefault("archived", False)
-    updated_params.setdefault("favorite", False)
 
+class _ComputationIndex:
+    """Computation records for one capsule or pipeline, with models created on
+    demand and kept until the record changes.
+
+    - `update()` replaces all records with the latest response from the server:
+      models are kept for records that are unchanged, so only new or changed
+      records (e.g. in-progress computations) are parsed again
+    - records are also indexed by the IDs of their attached data assets, so
+      computations for any number of data assets are found without scanning all
+      records for each
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[
+            str, tuple[dict[str, Any], codeocean.computation.Computation | None]
+        ] = {}
+        self._records_by_data_asset: dict[str, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, records: Iterable[dict[str, Any]]) -> None:
+        with self._lock:
+            entries = {}
+            records_by_data_asset: dict[str, list[dict[str, Any]]] = {}
+            for record in records:
+                previous_record, model = self._entries.get(record["id"], (None, None))
+                entries[record["id"]] = (
+                    record,
+                    model if previous_record == record else None,
+                )
+                for input_data_asset in record.get("data_assets") or ():
+                    records_by_data_asset.setdefault(input_data_asset["id"], []).append(
+                        record
+                    )
+            self._entries = entries
+            self._records_by_data_asset = records_by_data_asset
+
+    def get_records(self) -> list[dict[str, Any]]:
+        """All records, in server order."""
+        return [record for record, _ in self._entries.values()]
+
+    def get_records_for_data_asset(self, data_asset_id: str) -> list[dict[str, Any]]:
+        """Records of computations with the data asset attached, in server order."""
+        return list(self._records_by_data_asset.get(data_asset_id, ()))
+
+    def get_model(self, record: dict[str, Any]) -> codeocean.computation.Computation:
+        with self._lock:
+            indexed_record, model = self._entries.get(record["id"], (None, None))
+            if model is None or indexed_record != record:
+                model = codeocean.computation.Computation.from_dict(record)
+                self._entries[record["id"]] = (record, model)
+            return model
+
+
+@functools.cache
+def _get_computation_index(capsule_or_pipeline_id: str) -> _ComputationIndex:
+    return _ComputationIndex()
+
+
+def _fetch_computation_index(capsule_or_pipeline_id: str) -> _ComputationIndex:
+    """Get all computation records for a capsule or pipeline from the server and
+    update its index."""
+    t0 = time.time()
+    records = (
+        get_codeocean_client()
+        .session.get(f"capsules/{capsule_or_pipeline_id}/computations")
+        .json()
+    )
     logger.debug(
-        f"Fetching data assets results matching search parameters: {updated_params}"
+        f"{len(records)} computation records returned from server in {time.time() - t0:.3f}s"
     )
+    index = _get_computation_index(capsule_or_pipeline_id)
+    index.update(records)
+    return index
 
-    assets: list[codeocean.data_asset.DataAsset | dict[str, Any]] = []
-    page = 0
-    while page < max_pages:
-        search_params = codeocean.data_asset.DataAssetSearchParams(
-            limit=page_size,
-            offset=page * page_size,
-            **updated_params,
-        )
-        if not as_dict:
-            search_results = get_codeocean_client().data_assets.search_data_assets(
-                search_params
-            )
-            assets.extend(search_results.results)
-            if not search_results.has_more:
-                break
-        else:
-            search_results = (
-                get_codeocean_client()
-                .session.post("data_assets/search", json=search_params.to_dict())
-                .json()
+
+def _filter_computation_records(
+    records: Iterable[dict[str, Any]],
+    has_results: bool | None = None,
+    in_progress: bool | None = None,
+    computation_state: codeocean.computation.ComputationState | None = None,
+) -> list[dict[str, Any]]:
+    """Filter computation records on their status, before creating models."""
+    records = list(records)
+    if has_results is not None:
+        records = [record for record in records if record["has_results"]]
+    if in_progress is not None:
+        records = [
+            record
+            for record in records
+            if (
+                record["state"]
+                in (
+                    codeocean.computation.ComputationState.Completed,
+                    codeocean.computation.ComputationState.Failed,
+                )
+                and in_progress is False
             )
-            # requests session already has `raise_for_status` hook
-            assets.extend(search_results["results"])
-            if not search_results["has_more"]:
-                break
-        page += 1
-    else:
-        if raise_on_page_limit:
-            raise ValueError(
-                f"Reached page limit fetching data asset search results: try increasing parameters ({max_pages=}, {page_size=}), narrowing the search, or setting `raise_on_page_limit=False`"
+            or (
+                record["state"]
+                in (
+                    codeocean.computation.ComputationState.Running,
+                    codeocean.computation.ComputationState.Initializing,
+                    codeocean.computation.ComputationState.Finalizing,
+                )
+                and in_progress is True
             )
-        logger.warning(
-            f"Reached page limit fetching data asset search results: returning {len(assets)} assets, but others exist"
-        )
-    logger.debug(f"Search returned {len(assets)} data assets")
-    return tuple(assets)
+        ]
+    if computation_state is not None:
+        records = [record for record in records if record["state"] == computation_state]
+    return records
 
 
-@functools.cache
+@ttl_cache(ttl=10 * 60, maxsize=128)
 def search_computations(
     capsule_or_pipeline_id: str | uuid.UUID,
     name: str | None = None,
@@ -556,13 +1024,17 @@ def search_computations(
     - with no filters, this may be slow:
         - test with 1300 computations took ~1.5s to get the response and ~8s to
           make the `codeocean.computation.Computation` models from json
+        - models are kept in memory for each capsule or pipeline and are only
+          re-created for new or changed records, so subsequent calls (with any
+          filters or `ttl_hash`) mostly cost the request
     - sorted by ascending creation time
     - `in_progress` True/False can be used to filter on whether the computation
       has ended
     - `attached_data_asset_id` can be used to filter on whether the computation was run
       with the given data asset attached as an input
-    - by default, this function caches the result indefinitely: supply with a
-      `aind_session.utils.ttl_hash(sec)` to cache for a given number of seconds
+        - to check many data assets, use `search_computations_by_data_asset`
+    - by default, this function caches the result for 10 minutes: supply with a
+      `aind_session.utils.get_ttl_hash(sec)` to cache for a shorter period
 
     Examples
     --------
@@ -583,7 +1055,7 @@ def search_computations(
     >>> computations = search_computations(pipeline_id, name="Run With Parameters 4689084")
     >>> computations = search_computations(pipeline_id, attached_data_asset_id="83636983-f80d-42d6-a075-09b60c6abd5e")
     """
-    del ttl_hash  # only used for functools.cache
+    del ttl_hash  # only used for caching
     if date and (start_date or end_date):
         raise ValueError(
             f"Cannot filter by specific date and date range at the same time: {date=}, {start_date=}, {end_date=}"
@@ -591,15 +1063,11 @@ def search_computations(
 
     capsule_or_pipeline_id = get_normalized_uuid(capsule_or_pipeline_id)
 
-    t0 = time.time()
-    records = (
-        get_codeocean_client()
-        .session.get(f"capsules/{capsule_or_pipeline_id}/computations")
-        .json()
-    )
-    logger.debug(
-        f"{len(records)} computation records returned from server in {time.time() - t0:.3f}s"
-    )
+    index = _fetch_computation_index(capsule_or_pipeline_id)
+    if attached_data_asset_id is not None:
+        records = index.get_records_for_data_asset(attached_data_asset_id)
+    else:
+        records = index.get_records()
     if name is not None:
         records = [record for record in records if record["name"] == name]
     if date is not None:
@@ -619,55 +1087,72 @@ def search_computations(
             <= datetime.datetime.fromtimestamp(record["created"])
             <= npc_session.DatetimeRecord(end_date).dt
         ]
-    if attached_data_asset_id is not None:
-        records = [
-            record
-            for record in records
-            if any(
-                input_data_asset["id"] == attached_data_asset_id
-                for input_data_asset in record.get("data_assets", [])
-            )
-        ]
-    if has_results is not None:
-        records = [record for record in records if record["has_results"]]
-    if in_progress is not None:
-        records = [
-            record
-            for record in records
-            if (
-                record["state"]
-                in (
-                    codeocean.computation.ComputationState.Completed,
-                    codeocean.computation.ComputationState.Failed,
-                )
-                and in_progress is False
-            )
-            or (
-                record["state"]
-                in (
-                    codeocean.computation.ComputationState.Running,
-                    codeocean.computation.ComputationState.Initializing,
-                    codeocean.computation.ComputationState.Finalizing,
-                )
-                and in_progress is True
-            )
-        ]
-    if computation_state is not None:
-        records = [record for record in records if record["state"] == computation_state]
+    records = _filter_computation_records(
+        records,
+        has_results=has_results,
+        in_progress=in_progress,
+        computation_state=computation_state,
+    )
     t0 = time.time()
     computations = tuple(
         sorted(
-            [codeocean.computation.Computation.from_dict(record) for record in records],
+            [index.get_model(record) for record in records],
             key=lambda c: c.created,
         )
     )
     logger.debug(
-        f"{len(computations)} computation models created in {time.time() - t0:.3f}s"
+        f"{len(computations)} computation models retrieved in {time.time() - t0:.3f}s"
     )
     return computations
 
 
-@functools.cache
+def search_computations_by_data_asset(
+    capsule_or_pipeline_id: str | uuid.UUID,
+    data_asset_ids: Iterable[str | uuid.UUID],
+    has_results: bool | None = None,
+    in_progress: bool | None = None,
+    computation_state: codeocean.computation.ComputationState | None = None,
+) -> dict[str, tuple[codeocean.computation.Computation, ...]]:
+    """
+    Find the computations of a capsule or pipeline that had each data asset
+    attached as an input, with one request for all data assets.
+
+    - returns a dict mapping each normalized data asset ID to its computations,
+      sorted by ascending creation time (empty if there are none)
+    - `has_results`, `in_progress` and `computation_state` filter computations
+      in the same way as `search_computations`
+    - always fetches the latest computation records: use for checking many data
+      assets at once (e.g. which of a set of sessions are currently being
+      processed), rather than calling `search_computations` for each
+
+    Examples
+    --------
+    >>> pipeline_id = "1f8f159a-7670-47a9-baf1-078905fc9c2e"
+    >>> asset_id = "83636983-f80d-42d6-a075-09b60c6abd5e"
+    >>> computations = search_computations_by_data_asset(pipeline_id, [asset_id], in_progress=True)
+    >>> list(computations)
+    ['83636983-f80d-42d6-a075-09b60c6abd5e']
+    """
+    index = _fetch_computation_index(get_normalized_uuid(capsule_or_pipeline_id))
+    asset_id_to_computations = {}
+    for asset_id in data_asset_ids:
+        asset_id = get_normalized_uuid(asset_id)
+        records = _filter_computation_records(
+            index.get_records_for_data_asset(asset_id),
+            has_results=has_results,
+            in_progress=in_progress,
+            computation_state=computation_state,
+        )
+        asset_id_to_computations[asset_id] = tuple(
+            sorted(
+                (index.get_model(record) for record in records),
+                key=lambda c: c.created,
+            )
+        )
+    return asset_id_to_computations
+
+
+@ttl_cache(ttl=10 * 60, maxsize=64)
 def get_subject_data_assets(
     subject_id: str | int,
     ttl_hash: int | None = None,
@@ -681,11 +1166,17 @@ def get_subject_data_assets(
     - `subject_id` will be cast to a string for searching
     - subject ID is not required to be a labtracks MID
     - assets are sorted by ascending creation date
+    - assets found by searching CodeOcean are `LazyDataAsset` instances, which
+      only create a full model when fields other than id, name, created or tags
+      are accessed
+    - if the local catalog is enabled, and no additional search parameters are
+      provided, results are taken from the catalog without making requests (see
+      `aind_session.utils.get_catalog()`)
     - provide additional search parameters to filter results, as schematized in `codeocean.data_asset.DataAssetSearchParams`:
     https://github.com/codeocean/codeocean-sdk-python/blob/4d9cf7342360820f3d9bd59470234be3e477883e/src/codeocean/data_asset.py#L199
 
     - `ttl_hash` is used to cache the result for a given number of seconds (time-to-live)
-        - default None means cache indefinitely
+        - default None means cache for 10 minutes
         - use `aind_utils.get_ttl_hash(seconds)` to generate a new ttl_hash periodically
 
     Examples
@@ -709,44 +1200,52 @@ def get_subject_data_assets(
         raise ValueError(
             "Cannot provide 'query' as a search parameter: a new query will be created using 'subject id' field to search for assets"
         )
+    if not search_params and (
+        catalog := aind_session.utils.catalog_utils.get_catalog(require_enabled=True)
+    ):
+        try:
+            return catalog.get_subject_data_assets(subject_id)
+        except sqlite3.Error as exc:
+            logger.warning(
+                f"Failed to read {catalog!r}: searching CodeOcean instead ({exc!r})"
+            )
     search_params["query"] = get_data_asset_search_query(subject_id=subject_id)
     t0 = time.time()
-    # get assets from CodeOcean:
-    from_co = search_data_assets(search_params) + search_data_assets(
-        {"query": str(subject_id)}
-    )
-    co_asset_ids = {asset.id for asset in from_co}
-    # get assets from DocDB:
-    try:
-        docdb_asset_ids = (
-            aind_session.utils.docdb_utils.get_codeocean_data_asset_ids_from_docdb(
-                subject_id=subject_id,
-                ttl_hash=ttl_hash,
-            )
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        # get asset IDs from DocDB while results from CodeOcean are arriving:
+        docdb_future = executor.submit(
+            bind_context(
+                aind_session.utils.docdb_utils.get_codeocean_data_asset_ids_from_docdb
+            ),
+            subject_id=subject_id,
+            ttl_hash=ttl_hash,
         )
-    except requests.exceptions.RequestException as exc:
+        # use json results and only create full models when needed: results of
+        # the two searches overlap, so de-duplicate by ID
+        from_co: dict[str, LazyDataAsset] = {}
+        for result in itertools.chain(
+            iter_data_assets(search_params, as_dict=True),
+            iter_data_assets({"query": str(subject_id)}, as_dict=True),
+        ):
+            if result["id"] not in from_co:
+                from_co[result["id"]] = LazyDataAsset(result)
+        try:
+            docdb_asset_ids = docdb_future.result()
+        except requests.exceptions.RequestException as exc:
+            logger.warning(
+                f"Failed to get data assets for {subject_id=} from DocDB: {exc=!r}"
+            )
+            docdb_asset_ids = []
+    docdb_only_asset_ids = tuple(
+        dict.fromkeys(id_ for id_ in docdb_asset_ids if id_ not in from_co)
+    )
+    from_docdb = get_data_asset_models(docdb_only_asset_ids)
+    if len(from_docdb) < len(docdb_only_asset_ids):
         logger.warning(
-            f"Failed to get data assets for {subject_id=} from DocDB: {exc=!r}"
+            f"Not authorized to access {len(docdb_only_asset_ids) - len(from_docdb)}"
+            f" data asset ID(s) obtained from DocDB: {subject_id=}"
         )
-        docdb_asset_ids = []
-    from_docdb = []
-    if docdb_asset_ids:
-        for id_ in docdb_asset_ids:
-            if id_ in co_asset_ids:
-                continue
-            try:
-                asset = get_data_asset_model(id_)
-            except (requests.HTTPError, CodeOceanError) as exc:
-                status_code = _get_status(exc)
-                if status_code in (401, 404):
-                    logger.warning(
-                        f"Not authorized to access data asset ID obtained from DocDB: {subject_id=}, {id_=}"
-                    )
-                    continue
-                raise
-            else:
-                from_docdb.append(asset)
-    assets = from_co + tuple(from_docdb)
+    assets = (*from_co.values(), *from_docdb)
     logger.debug(
         f"Got {len(assets)} data asset(s) for subject {subject_id!r} in {time.time() - t0:.3f}s"
     )
@@ -757,7 +1256,7 @@ def get_subject_data_assets(
     return sort_by_created(assets)
 
 
-@functools.cache
+@ttl_cache(ttl=10 * 60, maxsize=1024)
 def get_data_assets(
     name_startswith: str,
     ttl_hash: int | None = None,
@@ -767,11 +1266,14 @@ def get_data_assets(
     Get all data assets whose names start with the search term.
 
     - assets are sorted by ascending creation date
+    - if the local catalog is enabled, and no additional search parameters are
+      provided, results are taken from the catalog without making requests (see
+      `aind_session.utils.get_catalog()`)
     - provide additional search parameters to filter results, as schematized in `codeocean.data_asset.DataAssetSearchParams`:
     https://github.com/codeocean/codeocean-sdk-python/blob/4d9cf7342360820f3d9bd59470234be3e477883e/src/codeocean/data_asset.py#L199
 
     - `ttl_hash` is used to cache the result for a given number of seconds (time-to-live)
-        - default None means cache indefinitely
+        - default None means cache for 10 minutes
         - use `aind_utils.get_ttl_hash(seconds)` to generate a new ttl_hash periodically
 
     Examples
@@ -793,22 +1295,28 @@ def get_data_assets(
 
     >>> assert get_data_assets('SmartSPIM_738819_2024-06-21_13-48-58')
     """
-    del ttl_hash  # only used for functools.cache
+    del ttl_hash  # only used for caching
     if "query" in search_params:
         raise ValueError(
             "Cannot provide 'query' as a search parameter: a new query will be created using the 'name' field to search for assets"
         )
+    if not search_params and (
+        catalog := aind_session.utils.catalog_utils.get_catalog(require_enabled=True)
+    ):
+        try:
+            return catalog.get_data_assets(name_startswith)
+        except sqlite3.Error as exc:
+            logger.warning(
+                f"Failed to read {catalog!r}: searching CodeOcean instead ({exc!r})"
+            )
     search_params["query"] = get_data_asset_search_query(name=name_startswith[:20])
     search_params["sort_field"] = codeocean.data_asset.DataAssetSortBy.Created
     search_params["sort_order"] = codeocean.components.SortOrder.Ascending
 
     t0 = time.time()
-    search_results: tuple[dict[str, Any], ...] = search_data_assets(
-        search_params, as_dict=True
-    )
     assets = [
         codeocean.data_asset.DataAsset.from_dict(result)
-        for result in search_results
+        for result in iter_data_assets(search_params, as_dict=True)
         if str(result["name"]).startswith(name_startswith)
     ]
     logger.debug(
@@ -817,6 +1325,7 @@ def get_data_assets(
     return sort_by_created(assets)
 
 
+@explain_step
 def is_raw_data_asset(
     asset_id_or_model: str | uuid.UUID | codeocean.data_asset.DataAsset,
 ) -> bool:
@@ -824,11 +1333,13 @@ def is_raw_data_asset(
     Determine if a data asset is raw data based on custom metadata or tags or
     name.
 
-    In order of precedence:
-    - custom metadata with "data level": "raw data" is considered raw data
-    - tags containing "raw" are considered raw data
-    - if no custom metadata or tags are present, the asset name is checked: if it
-    is a session ID alone, with no suffixes, it is considered raw data
+    An asset is considered raw data if any of:
+    - tags contain "raw"
+    - the asset name is a session ID alone, with no suffixes
+    - custom metadata has "data level": "raw data"
+
+    Tags and name are checked first, as they're available without creating the
+    full model of a `LazyDataAsset`.
 
     Examples
     --------
@@ -838,43 +1349,36 @@ def is_raw_data_asset(
     False
     """
     asset = get_data_asset_model(asset_id_or_model)
-    if asset.custom_metadata and asset.custom_metadata.get("data level") == "raw data":
-        logger.debug(
-            f"{asset.id=} determined to be raw data based on custom_metadata containing 'data level': 'raw data'"
-        )
-        return True
-    else:
-        logger.debug(f"{asset.id=} has no custom metadata")
     if asset.tags and any("raw" in tag for tag in asset.tags):
         logger.debug(
             f"{asset.id=} determined to be raw data based on tag(s) containing 'raw'"
         )
         return True
-    else:
-        logger.debug(f"{asset.id=} has no tags")
-    logger.info(
-        f"No custom metadata or tags for {asset.id=}: determining if raw data asset based on name alone"
-    )
     try:
         session_id = str(npc_session.AINDSessionRecord(asset.name))
     except ValueError:
         logger.debug(
             f"{asset.id=} name does not contain a valid session ID: {asset.name=}"
         )
-        return False
     else:
         if session_id == asset.name:
             logger.debug(
                 f"{asset.id=} name is a session ID alone, with no additional suffixes: it is considered raw data {asset.name=}"
             )
             return True
-        else:
-            logger.debug(
-                f"{asset.id=} name is not a session ID alone: it is not considered raw data {asset.name=}"
-            )
-            return False
+    if asset.custom_metadata and asset.custom_metadata.get("data level") == "raw data":
+        logger.debug(
+            f"{asset.id=} determined to be raw data based on custom_metadata containing 'data level': 'raw data'"
+        )
+        return True
+    logger.debug(
+        f"{asset.id=} has no tags, name or custom metadata indicating raw data: it is"
+        " not considered raw data"
+    )
+    return False
 
 
+@explain_step
 def get_output_text(
     asset_or_computation_id: (
         str
@@ -918,7 +1422,8 @@ def get_output_text(
         return requests.get(
             get_codeocean_client()
             .computations.get_result_file_download_url(computation.id, "output")
-            .url
+            .url,
+            hooks={"response": get_response_hook("s3")},
         ).text
     else:
         asset = get_data_asset_model(asset_or_computation_id)
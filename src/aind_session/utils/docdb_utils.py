@@ -4,20 +4,25 @@ from __future__ import annotations
 
 import functools
 import logging
+import threading
 import time
 import uuid
-from collections.abc import Mapping
-from typing import Any
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from typing import Any, TypeVar, overload
 
 import aind_data_access_api.document_db
 import requests  # type: ignore # to avoid checking types/installing types-requests
-import requests.adapters  # type: ignore # to avoid checking types/installing types-requests
 import urllib3
 
 import aind_session.utils.codeocean_utils
+from aind_session.utils.cache_utils import ttl_cache
+from aind_session.utils.misc_utils import get_http_adapter
+from aind_session.utils.stats_utils import instrument_session
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 DEFAULT_DOCDB_RETRY = urllib3.Retry(
     total=5,
     backoff_factor=1,
@@ -45,16 +50,17 @@ def get_docdb_api_client(
         session = requests.Session()
         session.mount(
             prefix="https://",
-            adapter=requests.adapters.HTTPAdapter(max_retries=retries),
+            adapter=get_http_adapter(retries),
         )
         kwargs["session"] = session
+    instrument_session(kwargs["session"], "docdb")
     t0 = time.time()
     client = aind_data_access_api.document_db.MetadataDbClient(**kwargs)
     logger.debug(f"Initialized DocumentDB client in {time.time() - t0:.2f} s")
     return client
 
 
-@functools.cache
+@ttl_cache(ttl=12 * 3600, maxsize=64)
 def get_subject_docdb_records(
     subject_id: str | int,
     ttl_hash: int | None = None,
@@ -63,6 +69,9 @@ def get_subject_docdb_records(
     Retrieve all records from the DocumentDB "data_assets" collection that are
     associated with a given subject_id. Records are sorted by ascending creation time.
 
+    - to process records as they arrive, or fetch only some fields, use
+      `iter_subject_docdb_records`
+
     Examples
     --------
     >>> records = get_subject_docdb_records(676909)
@@ -78,15 +87,197 @@ def get_subject_docdb_records(
         sort={"created": 1},
     )
     logger.debug(
-        f"Retrieved {len(records)} records for subject {subject_id} from DocumentDB in {time.time() - t0:.2f} s"
+        f"Retrieved {len(records)} records for subject {subject_id} from DocumentDB"
+        f" in {time.time() - t0:.2f} s"
     )
     return tuple(records)
 
 
-@functools.cache
+def iter_subject_docdb_records(
+    subject_id: str | int,
+    page_size: int = 100,
+    projection: dict[str, Any] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield records from the DocumentDB "data_assets" collection that are
+    associated with a given subject_id, fetching `page_size` records at a time.
+    Records are sorted by ascending creation time.
+
+    - see `iter_docdb_records` for details of paging and projection
+
+    Examples
+    --------
+    >>> records = iter_subject_docdb_records(676909, projection={"name": 1})
+    >>> next(records)['name']
+    'behavior_676909_2023-10-24_15-15-50'
+    """
+    yield from iter_docdb_records(
+        {"subject.subject_id": str(subject_id)},
+        page_size=page_size,
+        projection=projection,
+    )
+
+
+def iter_docdb_records(
+    filter_query: dict[str, Any] | None = None,
+    page_size: int = 100,
+    projection: dict[str, Any] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield records from the DocumentDB "data_assets" collection that match a
+    filter query (None matches all records), fetching `page_size` records at a
+    time. Records are sorted by ascending creation time.
+
+    - pages are only requested as records are consumed, so stopping early avoids
+      fetching the rest
+    - pages are found by the last record's creation time and ID, rather than an
+      offset, so each page is a cheap indexed query
+    - `projection` limits the fields returned, in the MongoDB format (e.g.
+      `{"name": 1}`): `_id` and `created` are always included, as they're
+      needed for paging
+
+    Examples
+    --------
+    >>> query = {"name": {"$regex": "^ecephys_676909"}}
+    >>> records = iter_docdb_records(query, projection={"name": 1})
+    >>> next(records)['name']
+    'ecephys_676909_2023-12-13_13-43-40'
+    """
+    if page_size < 1:
+        raise ValueError(f"page_size must be at least 1: {page_size=}")
+    if projection and any(projection.values()):
+        projection = {**projection, "_id": 1, "created": 1}
+    elif projection:
+        # exclusion projection: make sure paging fields aren't excluded
+        projection = {
+            k: v for k, v in projection.items() if k not in ("_id", "created")
+        } or None
+    filter_query = filter_query or {}
+    page_query = filter_query
+    count = 0
+    t0 = time.time()
+    while True:
+        records = get_docdb_api_client().retrieve_docdb_records(
+            filter_query=page_query,
+            projection=projection,
+            sort={"created": 1, "_id": 1},
+            limit=page_size,
+        )
+        count += len(records)
+        yield from records
+        if len(records) < page_size:
+            break
+        last = records[-1]
+        page_query = {
+            "$and": [
+                filter_query,
+                {
+                    "$or": [
+                        {"created": {"$gt": last["created"]}},
+                        {"created": last["created"], "_id": {"$gt": last["_id"]}},
+                    ]
+                },
+            ]
+        }
+    logger.debug(
+        f"Retrieved {count} records matching {filter_query} from DocumentDB"
+        f" in {time.time() - t0:.2f} s"
+    )
+
+
+class _LazySequence(Sequence[_T]):
+    """A read-only sequence backed by an iterator, which is only advanced as
+    items are accessed.
+
+    - items are kept once fetched, so the sequence can be indexed and iterated
+      repeatedly
+    - `len()` and negative indices consume the whole iterator
+    - safe to share between threads
+    """
+
+    def __init__(self, iterable: Iterable[_T]) -> None:
+        self._iterator: Iterator[_T] | None = iter(iterable)
+        self._items: list[_T] = []
+        self._lock = threading.Lock()
+
+    def _fetch_until(self, size: int | None) -> None:
+        """Fetch items until there are at least `size`, or all if None."""
+        with self._lock:
+            while self._iterator is not None and (
+                size is None or len(self._items) < size
+            ):
+                try:
+                    self._items.append(next(self._iterator))
+                except StopIteration:
+                    self._iterator = None
+
+    @overload
+    def __getitem__(self, index: int) -> _T: ...
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[_T]: ...
+    def __getitem__(self, index: int | slice) -> _T | Sequence[_T]:
+        if isinstance(index, slice):
+            if (index.start or 0) < 0 or index.stop is None or index.stop < 0:
+                self._fetch_until(None)
+            else:
+                self._fetch_until(index.stop)
+            return tuple(self._items[index])
+        self._fetch_until(None if index < 0 else index + 1)
+        return self._items[index]
+
+    def __len__(self) -> int:
+        self._fetch_until(None)
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[_T]:
+        i = 0
+        while True:
+            self._fetch_until(i + 1)
+            if i >= len(self._items):
+                return
+            yield self._items[i]
+            i += 1
+
+    def __bool__(self) -> bool:
+        self._fetch_until(1)
+        return bool(self._items)
+
+    def __repr__(self) -> str:
+        remaining = "" if self._iterator is None else ", ..."
+        return f"{self.__class__.__name__}({len(self._items)} fetched{remaining})"
+
+
+@ttl_cache(ttl=12 * 3600, maxsize=64)
+def get_lazy_subject_docdb_records(
+    subject_id: str | int,
+    ttl_hash: int | None = None,
+    page_size: int = 100,
+) -> Sequence[dict[str, Any]]:
+    """
+    All records from the DocumentDB "data_assets" collection that are associated
+    with a given subject_id, as a sequence that fetches pages of records as they
+    are accessed. Records are sorted by ascending creation time.
+
+    - same records as `get_subject_docdb_records`, but the first records are
+      available after one page is fetched, and records that are never accessed
+      are never fetched
+    - fetched records are cached with the sequence
+
+    Examples
+    --------
+    >>> records = get_lazy_subject_docdb_records(676909)
+    >>> records[0]['name']
+    'behavior_676909_2023-10-24_15-15-50'
+    """
+    del ttl_hash
+    return _LazySequence(iter_subject_docdb_records(subject_id, page_size=page_size))
+
+
+@ttl_cache(ttl=12 * 3600, maxsize=1024)
 def get_docdb_record(
     data_asset_name_or_id: str | uuid.UUID,
     ttl_hash: int | None = None,
+    fields: tuple[str, ...] | None = None,
 ) -> dict[str, Any]:
     """
     Retrieve a single record from the DocumentDB "data_assets" collection that has the
@@ -97,6 +288,11 @@ def get_docdb_record(
 
     - if multiple records are found, the most-recently created record is returned
     - if no record is found, an empty dict is returned
+    - to get records for many names or IDs, use `get_docdb_records`
+    - `fields` limits the top-level fields returned (`_id` and `created` are
+      always included), which can be much faster than fetching full records
+        - if the full record is already cached, the fields are taken from it
+          without making a request
 
     Examples
     --------
@@ -112,8 +308,37 @@ def get_docdb_record(
     >>> assert get_docdb_record('7c45df9f-7c52-469f-9574-0b337ea838f4') # one external_links
     >>> assert get_docdb_record('282063a7-943e-4590-bbb6-507da5df9ef8') # multiple external_links
     >>> assert get_docdb_record('47308d52-98dc-42fd-995e-1ac58a686fd1') # legacy external_links format
+
+    Get only specific fields:
+    >>> get_docdb_record("ecephys_676909_2023-12-13_13-43-40", fields=("location",))["location"]
+    's3://aind-ephys-data/ecephys_676909_2023-12-13_13-43-40'
     """
-    del ttl_hash
+    if fields is None:
+        return _retrieve_docdb_record(data_asset_name_or_id)
+    fields = (*fields, "_id", "created")
+    if (record := _peek_docdb_record(data_asset_name_or_id, ttl_hash)) is not None:
+        logger.debug(f"Using cached full record for {data_asset_name_or_id!r}")
+        return {k: v for k, v in record.items() if k in fields}
+    return _retrieve_docdb_record(
+        data_asset_name_or_id, projection=dict.fromkeys(fields, 1)
+    )
+
+
+def _peek_docdb_record(
+    data_asset_name_or_id: str | uuid.UUID, ttl_hash: int | None
+) -> dict[str, Any] | None:
+    """The full record cached by `get_docdb_record`, or None if not cached."""
+    try:
+        return get_docdb_record.cache_peek(data_asset_name_or_id, ttl_hash=ttl_hash)
+    except KeyError:
+        return None
+
+
+def _retrieve_docdb_record(
+    data_asset_name_or_id: str | uuid.UUID,
+    projection: dict[str, int] | None = None,
+) -> dict[str, Any]:
+    """Query DocumentDB for `get_docdb_record`, without caching."""
     asset_id = asset_name = None
     try:
         asset_id = aind_session.utils.codeocean_utils.get_normalized_uuid(
@@ -125,6 +350,7 @@ def get_docdb_record(
         # retrieve records by asset ID
         records = get_docdb_api_client().retrieve_docdb_records(
             filter_query={"external_links.Code Ocean": asset_id},
+            projection=projection,
             sort={"created": 1},
         )
         if len(records) > 0:
@@ -154,6 +380,7 @@ def get_docdb_record(
         filter_query={
             "name": asset_name,
         },
+        projection=projection,
         sort={"created": 1},
     )
     if len(records) == 0:
@@ -169,7 +396,134 @@ def get_docdb_record(
     return records[-1]
 
 
-@functools.cache
+DOCDB_BATCH_SIZE = 100
+"""Maximum number of values in a single `$in` query to DocumentDB."""
+
+
+def _get_latest_docdb_records(
+    field: str,
+    values: Iterable[str],
+    get_keys: Callable[[dict[str, Any]], Iterable[str]],
+    projection: dict[str, Any] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Most-recently created DocumentDB record for each value of `field`, with
+    one query per `DOCDB_BATCH_SIZE` values.
+
+    - `get_keys` returns the value(s) of `field` in a record
+    - values without a record are not included in the result
+    """
+    values = tuple(dict.fromkeys(values))
+    value_to_record: dict[str, dict[str, Any]] = {}
+    t0 = time.time()
+    for i in range(0, len(values), DOCDB_BATCH_SIZE):
+        batch = values[i : i + DOCDB_BATCH_SIZE]
+        records = get_docdb_api_client().retrieve_docdb_records(
+            filter_query={field: {"$in": list(batch)}},
+            projection=projection,
+            sort={"created": 1},
+        )
+        # sorted by ascending creation time: later records replace earlier ones
+        for record in records:
+            for key in get_keys(record):
+                if key in batch:
+                    value_to_record[key] = record
+    logger.debug(
+        f"Retrieved records for {len(value_to_record)}/{len(values)} values of"
+        f" {field!r} from DocumentDB in {time.time() - t0:.2f} s"
+    )
+    return value_to_record
+
+
+def get_docdb_records(
+    names_or_ids: Iterable[str | uuid.UUID],
+    projection: dict[str, Any] | None = None,
+) -> dict[str | uuid.UUID, dict[str, Any]]:
+    """
+    Retrieve records from the DocumentDB "data_assets" collection for many data
+    asset names and/or IDs, with a few batched queries.
+
+    - equivalent to calling `get_docdb_record` for each input, but records are
+      queried with `$in` filters on `name` and `external_links.Code Ocean`,
+      up to `DOCDB_BATCH_SIZE` values at a time
+    - for IDs without a record, asset names are fetched from CodeOcean
+      concurrently, then all names are looked up in one pass
+    - returns a dict mapping each input to the most-recently created record, or
+      an empty dict if no record is found
+    - `projection` limits the fields returned, in the MongoDB format (e.g.
+      `{"location": 1}`): `name`, `created` and `external_links` are always
+      included in an inclusion projection, as they're needed to match records to
+      inputs
+
+    Examples
+    --------
+    >>> session_id = "ecephys_676909_2023-12-13_13-43-40"
+    >>> records = get_docdb_records([session_id, "16d46411-540a-4122-b47f-8cb2a15d593a"])
+    >>> all(records.values())
+    True
+    >>> records = get_docdb_records([session_id], projection={"location": 1})
+    >>> records[session_id]["location"]
+    's3://aind-ephys-data/ecephys_676909_2023-12-13_13-43-40'
+    """
+    inputs = tuple(dict.fromkeys(names_or_ids))
+    if projection and any(projection.values()):
+        projection = {
+            **projection,
+            **dict.fromkeys(("name", "created", "external_links"), 1),
+        }
+    input_to_id: dict[str | uuid.UUID, str] = {}
+    input_to_name: dict[str | uuid.UUID, str] = {}
+    for name_or_id in inputs:
+        try:
+            input_to_id[name_or_id] = (
+                aind_session.utils.codeocean_utils.get_normalized_uuid(name_or_id)
+            )
+        except ValueError:
+            input_to_name[name_or_id] = str(name_or_id)
+
+    id_to_record = _get_latest_docdb_records(
+        "external_links.Code Ocean",
+        input_to_id.values(),
+        get_keys=extract_codeocean_data_asset_ids_from_docdb_record,
+        projection=projection,
+    )
+    if missing_ids := [id_ for id_ in input_to_id.values() if id_ not in id_to_record]:
+        logger.debug(
+            f"No records found for {len(missing_ids)} asset IDs in DocumentDB, however"
+            " records are currently incomplete (2024-08). Getting asset names from"
+            " CodeOcean API, then looking up DocumentDB records by name instead."
+        )
+    # IDs not found in CodeOcean (or not accessible) are skipped, and get an
+    # empty record, as from `get_docdb_record`:
+    id_to_name = {
+        asset.id: asset.name
+        for asset in aind_session.utils.codeocean_utils.get_data_asset_models(
+            missing_ids
+        )
+    }
+    name_to_record = _get_latest_docdb_records(
+        "name",
+        (*input_to_name.values(), *id_to_name.values()),
+        get_keys=lambda record: (record["name"],),
+        projection=projection,
+    )
+    records: dict[str | uuid.UUID, dict[str, Any]] = {}
+    for name_or_id in inputs:
+        if name_or_id in input_to_id:
+            id_ = input_to_id[name_or_id]
+            record = id_to_record.get(id_) or name_to_record.get(
+                id_to_name.get(id_, ""), {}
+            )
+        else:
+            record = name_to_record.get(input_to_name[name_or_id], {})
+        records[name_or_id] = record
+    logger.debug(
+        f"Found records for {sum(bool(r) for r in records.values())}/{len(records)}"
+        " inputs in DocumentDB"
+    )
+    return records
+
+
+@ttl_cache(ttl=10 * 60, maxsize=256)
 def get_codeocean_data_asset_ids_from_docdb(
     partial_name: str | None = None,
     subject_id: str | int | None = None,
@@ -1,10 +1,138 @@
 from __future__ import annotations
 
 import logging
+import os
+import pathlib
+import threading
 import time
+import weakref
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests.adapters
+    import urllib3
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENCY = 8
+"""Default for `get_max_concurrency()`."""
+
+DEFAULT_TCP_KEEPALIVE: dict[str, int] = {"idle": 60, "interval": 20, "count": 5}
+"""Default for `get_tcp_keepalive()`: the same as the CodeOcean SDK's adapter."""
+
+_max_concurrency: int | None = None
+_http_adapters: weakref.WeakSet[requests.adapters.HTTPAdapter] = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+def get_max_concurrency() -> int:
+    """Maximum number of requests in flight at once.
+
+    - one setting shared by the thread pools that make requests concurrently and
+      the connection pools of the CodeOcean and DocumentDB clients, so every
+      worker can re-use a pooled connection instead of opening a new one (and
+      discarding it when the pool is full)
+    - defaults to 8 (`DEFAULT_MAX_CONCURRENCY`): set
+      `AIND_SESSION_MAX_CONCURRENCY` to change the default, or use
+      `set_max_concurrency()` to change it for this process
+
+    Examples
+    --------
+    >>> get_max_concurrency() >= 1
+    True
+    """
+    if _max_concurrency is not None:
+        return _max_concurrency
+    return int(os.getenv("AIND_SESSION_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+
+
+def set_max_concurrency(max_concurrency: int) -> None:
+    """Change the maximum number of requests in flight at once for this process
+    (see `get_max_concurrency()`).
+
+    - applies to thread pools created afterwards
+    - connection pools of existing HTTP clients are resized: their open
+      connections are closed
+
+    Examples
+    --------
+    >>> previous = get_max_concurrency()
+    >>> set_max_concurrency(16)
+    >>> get_max_concurrency()
+    16
+    >>> set_max_concurrency(previous)
+    """
+    global _max_concurrency
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1: {max_concurrency=}")
+    with _lock:
+        _max_concurrency = max_concurrency
+        if _http_adapters:
+            import requests.adapters
+        for adapter in tuple(_http_adapters):
+            adapter.close()
+            adapter.init_poolmanager(
+                requests.adapters.DEFAULT_POOLSIZE,
+                max_concurrency,
+                block=requests.adapters.DEFAULT_POOLBLOCK,
+            )
+    logger.debug(f"Set max concurrency to {max_concurrency}")
+
+
+def get_tcp_keepalive() -> dict[str, int]:
+    """TCP keep-alive options for connections made by `get_http_adapter()`:
+    seconds idle before the first probe, seconds between probes, and the number
+    of unanswered probes before a connection is dropped.
+
+    - keeps idle pooled connections open (e.g. through NAT gateways and load
+      balancers that drop silent connections), and detects dead ones
+    - defaults to `DEFAULT_TCP_KEEPALIVE`: set `AIND_SESSION_TCP_KEEPALIVE_IDLE`,
+      `AIND_SESSION_TCP_KEEPALIVE_INTERVAL` or `AIND_SESSION_TCP_KEEPALIVE_COUNT`
+      to change each default
+
+    Examples
+    --------
+    >>> sorted(get_tcp_keepalive())
+    ['count', 'idle', 'interval']
+    """
+    return {
+        name: int(os.getenv(f"AIND_SESSION_TCP_KEEPALIVE_{name.upper()}", default))
+        for name, default in DEFAULT_TCP_KEEPALIVE.items()
+    }
+
+
+def get_http_adapter(
+    retries: int | urllib3.Retry = 0,
+    **keepalive: int,
+) -> requests.adapters.HTTPAdapter:
+    """An HTTP adapter with TCP keep-alive and a connection pool sized to
+    `get_max_concurrency()`, for mounting on a `requests.Session`.
+
+    - the pool is resized by `set_max_concurrency()`
+    - keep-alive options from `get_tcp_keepalive()` can be overridden with
+      `idle`, `interval` and `count` keyword arguments
+
+    Examples
+    --------
+    >>> adapter = get_http_adapter(retries=3, idle=120)
+    >>> adapter.max_retries.total
+    3
+    """
+    # imported here so that importing this module doesn't import requests
+    import requests.adapters
+    import requests_toolbelt.adapters.socket_options
+
+    with _lock:
+        adapter = requests_toolbelt.adapters.socket_options.TCPKeepAliveAdapter(
+            max_retries=retries,
+            pool_connections=requests.adapters.DEFAULT_POOLSIZE,
+            pool_maxsize=get_max_concurrency(),
+            pool_block=requests.adapters.DEFAULT_POOLBLOCK,
+            **(get_tcp_keepalive() | keepalive),
+        )
+        _http_adapters.add(adapter)
+    return adapter
+
 
 def get_ttl_hash(seconds: float = 10 * 60) -> int:
     """Return the same value within `seconds` time period.
@@ -14,3 +142,20 @@ def get_ttl_hash(seconds: float = 10 * 60) -> int:
     From https://stackoverflow.com/a/55900800
     """
     return round(time.time() / seconds)
+
+
+def get_cache_dir() -> pathlib.Path:
+    """Dir for files cached on local disk, shared across processes.
+
+    - defaults to `~/.cache/aind_session`, but can be overridden by setting
+      `AIND_SESSION_CACHE_DIR`
+    - the dir is not created by this function
+
+    Examples
+    --------
+    >>> get_cache_dir().name
+    'aind_session'
+    """
+    if path := os.getenv("AIND_SESSION_CACHE_DIR"):
+        return pathlib.Path(path)
+    return pathlib.Path.home() / ".cache" / "aind_session"
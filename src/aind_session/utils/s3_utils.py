@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import concurrent.futures
 import functools
+import json
 import logging
+import math
+import os
+import pathlib
+import threading
+import time
+from collections.abc import Iterable
+from typing import ClassVar
 
 import npc_io
 import upath
 
+import aind_session.utils.misc_utils
+from aind_session.utils.cache_utils import ttl_cache
+from aind_session.utils.stats_utils import bind_context
+
 logger = logging.getLogger(__name__)
 
 S3_DATA_BUCKET_NAMES = (
@@ -20,27 +33,322 @@ S3_DATA_BUCKET_NAMES = (
 """Known S3 bucket names for data associated with CodeOcean assets."""
 
 
+DEFAULT_BUCKET_INDEX_MAX_AGE: float = 3600
+"""Seconds before the listing of a bucket in the index is considered stale."""
+
+
+class BucketIndex:
+    """In-memory index of the top-level dir names in known data buckets on S3, for
+    resolving names to buckets without an S3 request per name.
+
+    - each bucket is listed once (a delimited listing of its root, paginated by
+      S3), then lookups are answered from memory
+    - buckets are refreshed individually when their listing is older than
+      `max_age` seconds, so a refresh only re-lists stale buckets
+    - names found by other means can be added with `add()` without re-listing
+    - a bucket that fails to list (e.g. a transient error or missing
+      permissions) is left unindexed, so lookups fall back to checking paths
+      directly, and is retried after `LIST_ERROR_TTL` seconds
+    - the index can be saved to, and loaded from, a local json file so that new
+      processes start with a populated index
+
+    Examples
+    --------
+    >>> index = BucketIndex(buckets=("aind-ephys-data",))
+    >>> index.get_bucket('ecephys_676909_2023-12-13_13-43-40')      # doctest: +SKIP
+    'aind-ephys-data'
+    """
+
+    LIST_ERROR_TTL: ClassVar[float] = 60
+    """Seconds before a bucket that failed to list is listed again."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        buckets: Iterable[str] = S3_DATA_BUCKET_NAMES,
+        max_age: float = DEFAULT_BUCKET_INDEX_MAX_AGE,
+    ) -> None:
+        self.path = pathlib.Path(path) if path is not None else None
+        self.buckets = tuple(buckets)
+        self.max_age = max_age
+        self._names: dict[str, set[str]] = {}
+        self._updated: dict[str, float] = {}
+        self._failed: dict[str, float] = {}
+        self._lock = threading.RLock()
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.buckets})"
+
+    def is_stale(self, bucket: str) -> bool:
+        """Whether the bucket has never been listed, or was listed more than
+        `max_age` seconds ago (or failed to list more than `LIST_ERROR_TTL`
+        seconds ago)."""
+        if bucket in self._failed:
+            return time.time() - self._failed[bucket] > self.LIST_ERROR_TTL
+        return time.time() - self._updated.get(bucket, -math.inf) > self.max_age
+
+    @staticmethod
+    def list_bucket(bucket: str) -> set[str]:
+        """Names of all top-level dirs and files in the bucket."""
+        t0 = time.time()
+        fs = upath.UPath(f"s3://{bucket}").fs
+        names = {p.rstrip("/").rsplit("/", 1)[-1] for p in fs.ls(bucket, detail=False)}
+        # the listing is now held by the index: don't keep a second copy in
+        # fsspec's listings cache
+        fs.invalidate_cache(bucket)
+        logger.debug(
+            f"Listed {len(names)} top-level names in {bucket} in {time.time() - t0:.2f} s"
+        )
+        return names
+
+    def refresh(
+        self, buckets: Iterable[str] | None = None, force: bool = False
+    ) -> None:
+        """Re-list stale buckets (or all `buckets` if `force=True`) concurrently,
+        then save the index if it has a path.
+
+        - errors listing a bucket are logged, and the bucket is left unindexed
+        """
+        with self._lock:
+            to_list = tuple(
+                bucket
+                for bucket in (self.buckets if buckets is None else buckets)
+                if force or self.is_stale(bucket)
+            )
+            if not to_list:
+                return
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(
+                    len(to_list),
+                    aind_session.utils.misc_utils.get_max_concurrency(),
+                )
+            ) as executor:
+                futures = {
+                    bucket: executor.submit(self.list_bucket, bucket)
+                    for bucket in to_list
+                }
+            now = time.time()
+            for bucket, future in futures.items():
+                try:
+                    names = future.result()
+                except Exception as exc:
+                    logger.warning(
+                        f"Failed to list {bucket} (retrying after "
+                        f"{self.LIST_ERROR_TTL} s): {exc!r}"
+                    )
+                    self._names.pop(bucket, None)
+                    self._updated.pop(bucket, None)
+                    self._failed[bucket] = now
+                    continue
+                self._failed.pop(bucket, None)
+                self._names[bucket] = names
+                self._updated[bucket] = now
+            if self.path is not None:
+                self.save()
+
+    def add(self, bucket: str, name: str) -> None:
+        """Record a top-level name found in a bucket without re-listing it.
+
+        - ignored for buckets that haven't been listed, which would otherwise
+          appear to contain only this name
+        """
+        with self._lock:
+            if bucket in self._names:
+                self._names[bucket].add(name)
+
+    def contains(self, bucket: str, name: str) -> bool | None:
+        """Whether the bucket contains the top-level name, or None if the bucket
+        has not been listed."""
+        if bucket not in self._names:
+            return None
+        return name in self._names[bucket]
+
+    def get_bucket(self, name: str) -> str | None:
+        """First bucket, in order of priority, that contains the top-level name,
+        or None if not found in any bucket.
+
+        - stale buckets are refreshed first
+        - None is also returned if a bucket of higher priority than any match is
+          unindexed (e.g. it failed to list), as the index can't rule it out
+        """
+        self.refresh()
+        for bucket in self.buckets:
+            if (contains := self.contains(bucket, name)) is None:
+                return None
+            if contains:
+                return bucket
+        return None
+
+    def save(self) -> None:
+        """Write the index to `path`, replacing the file atomically so concurrent
+        readers never see a partial file."""
+        if self.path is None:
+            raise ValueError(f"No path set for {self!r}")
+        with self._lock:
+            data = {
+                bucket: {
+                    "updated": self._updated.get(bucket, 0),
+                    "names": sorted(names),
+                }
+                for bucket, names in self._names.items()
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+        logger.debug(f"Saved {self!r} to {self.path.as_posix()}")
+
+    def load(self) -> None:
+        """Read the index from `path`, replacing any listings held in memory."""
+        if self.path is None:
+            raise ValueError(f"No path set for {self!r}")
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError) as exc:
+            logger.warning(
+                f"Failed to load {self!r} from {self.path.as_posix()}: {exc!r}"
+            )
+            return
+        with self._lock:
+            for bucket, entry in data.items():
+                self._names[bucket] = set(entry["names"])
+                self._updated[bucket] = entry["updated"]
+        logger.debug(f"Loaded {self!r} from {self.path.as_posix()}")
+
+
+def is_bucket_index_enabled() -> bool:
+    """Whether names are resolved to S3 buckets with a `BucketIndex`.
+
+    - disabled by default: set `AIND_SESSION_S3_INDEX=1` to enable, or use
+      `set_bucket_index_enabled()`
+    """
+    return _bucket_index_enabled
+
+
+def set_bucket_index_enabled(enabled: bool) -> None:
+    """Turn resolution of names to S3 buckets with a `BucketIndex` on or off for
+    this process."""
+    global _bucket_index_enabled
+    _bucket_index_enabled = enabled
+
+
+_bucket_index_enabled: bool = os.getenv("AIND_SESSION_S3_INDEX", "0").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
+
 @functools.cache
+def _get_bucket_index(path: pathlib.Path) -> BucketIndex:
+    return BucketIndex(path)
+
+
+def get_bucket_index() -> BucketIndex | None:
+    """The index of known data buckets used by `get_source_dir_by_name` and
+    `get_data_asset_source_dir`, or None if disabled.
+
+    - persisted in `aind_session.utils.get_cache_dir()`
+
+    Examples
+    --------
+    >>> set_bucket_index_enabled(True)
+    >>> get_bucket_index().buckets == S3_DATA_BUCKET_NAMES
+    True
+    >>> set_bucket_index_enabled(False)
+    """
+    if not is_bucket_index_enabled():
+        return None
+    return _get_bucket_index(
+        aind_session.utils.misc_utils.get_cache_dir() / "s3_index.json"
+    )
+
+
+@ttl_cache(ttl=10 * 60, maxsize=1024, cache_errors=(FileNotFoundError,), error_ttl=60)
 def get_source_dir_by_name(name: str, ttl_hash: int | None = None) -> upath.UPath:
     """Checks known S3 buckets for a dir with the given name.
 
+    - buckets are checked concurrently: if the dir exists in multiple buckets,
+      the first in `S3_DATA_BUCKET_NAMES` is returned
     - raises `FileNotFoundError` if the dir is not found
+        - this negative result is cached for 1 minute, so repeated lookups for
+          sessions that have not been uploaded are fast
+    - if enabled, a `BucketIndex` is checked first (see `get_bucket_index()`):
+      names missing from it (e.g. uploaded since the buckets were last listed)
+      are looked up in each bucket, and added to the index if found
 
     Examples
     --------
     >>> get_source_dir_by_name('ecephys_676909_2023-12-13_13-43-40').as_posix()
     's3://aind-ephys-data/ecephys_676909_2023-12-13_13-43-40'
     """
-    del ttl_hash  # only used for functools.cache
+    del ttl_hash  # only used for caching
 
-    for s3_bucket in S3_DATA_BUCKET_NAMES:
-        path = upath.UPath(f"s3://{s3_bucket}/{name}")
-        if path.exists():
-            logger.debug(f"Found dir matching {name!r} in {path.parent.as_posix()}")
-            return path
+    if (index := get_bucket_index()) is not None:
+        if (bucket := index.get_bucket(name)) is not None:
+            logger.debug(f"Found dir matching {name!r} in {bucket} index")
+            return upath.UPath(f"s3://{bucket}/{name}")
+        logger.debug(f"No dir matching {name!r} in index: checking each bucket")
+
+    paths = tuple(
+        upath.UPath(f"s3://{s3_bucket}/{name}") for s3_bucket in S3_DATA_BUCKET_NAMES
+    )
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=min(len(paths), aind_session.utils.misc_utils.get_max_concurrency())
+    )
+    try:
+        futures = tuple(executor.submit(bind_context(path.exists)) for path in paths)
+        # wait in order of bucket priority: a hit can only be returned once all
+        # higher-priority buckets have been ruled out
+        for s3_bucket, path, future in zip(S3_DATA_BUCKET_NAMES, paths, futures):
+            if future.result():
+                logger.debug(f"Found dir matching {name!r} in {path.parent.as_posix()}")
+                if index is not None:
+                    index.add(s3_bucket, name)
+                return path
+    finally:
+        # don't wait for probes of lower-priority buckets that are still running
+        executor.shutdown(wait=False, cancel_futures=True)
     raise FileNotFoundError(f"No dir named {name!r} found in known data buckets on S3")
 
 
+@ttl_cache(ttl=10 * 60, maxsize=1024)
+def get_subdir_names(
+    path: npc_io.PathLike, ttl_hash: int | None = None
+) -> tuple[str, ...]:
+    """Names of the dirs directly inside `path`, from a single listing.
+
+    - on S3, a delimited listing returns the top-level "dirs" (common prefixes)
+      in one request, instead of a request per entry to check if it's a dir
+    - results are cached for 10 minutes, so modality dirs of a session's raw data
+      dir are only listed once
+    - raises `FileNotFoundError` if `path` doesn't exist
+
+    Examples
+    --------
+    >>> names = get_subdir_names('s3://aind-ephys-data/ecephys_676909_2023-12-13_13-43-40')
+    >>> 'ecephys_clipped' in names
+    True
+    """
+    del ttl_hash  # only used for caching
+    path = npc_io.from_pathlike(path)
+    t0 = time.time()
+    names = tuple(
+        sorted(
+            entry["name"].rstrip("/").rsplit("/", 1)[-1]
+            for entry in path.fs.ls(path.path, detail=True)
+            if entry["type"] == "directory"
+        )
+    )
+    logger.debug(
+        f"Listed {len(names)} dirs in {path.as_posix()} in {time.time() - t0:.2f} s"
+    )
+    return names
+
+
 def get_bucket_and_prefix(path: npc_io.PathLike) -> tuple[str, str]:
     """Extract the bucket and prefix from an S3 path.
 
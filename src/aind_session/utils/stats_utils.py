@@ -0,0 +1,660 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import copy
+import functools
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import types
+import urllib.parse
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING, Any, NamedTuple, TypeVar
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_T = TypeVar("_T")
+
+
+class CallStats(NamedTuple):
+    """Requests made to one endpoint of a backend, from one calling function."""
+
+    backend: str
+    endpoint: str
+    caller: str
+    calls: int
+    errors: int
+    seconds: float
+    """Total time spent waiting for responses."""
+
+
+class CacheStats(NamedTuple):
+    """Lookups in one cache."""
+
+    name: str
+    hits: int
+    misses: int
+
+
+class Report:
+    """Counts and timings of requests to CodeOcean, DocumentDB and S3, by backend,
+    endpoint and calling function, plus cache hits and misses.
+
+    - `print(report)` shows a summary table
+
+    Examples
+    --------
+    >>> report = Report()
+    >>> report.record_call("codeocean", "GET data_assets/{id}", "caller", 0.25)
+    >>> report.record_call("codeocean", "GET data_assets/{id}", "caller", 0.25)
+    >>> report.record_cache("get_data_asset_model", hit=False)
+    >>> report.count("codeocean"), report.time("codeocean")
+    (2, 0.5)
+    >>> report.calls[0].calls
+    2
+    >>> report.caches
+    (CacheStats(name='get_data_asset_model', hits=0, misses=1),)
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[tuple[str, str, str], list[Any]] = {}
+        self._caches: dict[str, list[int]] = {}
+        self._t0 = time.perf_counter()
+        self._t1: float | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(requests={self.count()}, "
+            f"request_seconds={self.time():.3f}, seconds={self.seconds:.3f})"
+        )
+
+    def record_call(
+        self,
+        backend: str,
+        endpoint: str,
+        caller: str,
+        seconds: float,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            entry = self._calls.setdefault((backend, endpoint, caller), [0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += error
+            entry[2] += seconds
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        with self._lock:
+            self._caches.setdefault(name, [0, 0])[0 if hit else 1] += 1
+
+    def stop(self) -> None:
+        """Fix the wall time of the report."""
+        if self._t1 is None:
+            self._t1 = time.perf_counter()
+
+    def copy(self) -> Report:
+        with self._lock:
+            report = copy.copy(self)
+            report._lock = threading.Lock()
+            report._calls = {k: list(v) for k, v in self._calls.items()}
+            report._caches = {k: list(v) for k, v in self._caches.items()}
+        report.stop()
+        return report
+
+    @property
+    def seconds(self) -> float:
+        """Wall time covered by the report."""
+        return (self._t1 or time.perf_counter()) - self._t0
+
+    @property
+    def calls(self) -> tuple[CallStats, ...]:
+        """All requests, grouped by backend, endpoint and caller, with the
+        most time-consuming first."""
+        with self._lock:
+            calls = [CallStats(*k, *v) for k, v in self._calls.items()]
+        return tuple(sorted(calls, key=lambda c: c.seconds, reverse=True))
+
+    @property
+    def caches(self) -> tuple[CacheStats, ...]:
+        with self._lock:
+            caches = [CacheStats(k, *v) for k, v in self._caches.items()]
+        return tuple(sorted(caches, key=lambda c: c.name))
+
+    def _select(
+        self,
+        backend: str | None = None,
+        endpoint: str | None = None,
+        caller: str | None = None,
+    ) -> list[CallStats]:
+        return [
+            c
+            for c in self.calls
+            if backend in (None, c.backend)
+            and endpoint in (None, c.endpoint)
+            and caller in (None, c.caller)
+        ]
+
+    def count(
+        self,
+        backend: str | None = None,
+        endpoint: str | None = None,
+        caller: str | None = None,
+    ) -> int:
+        """Number of requests made, optionally filtered."""
+        return sum(c.calls for c in self._select(backend, endpoint, caller))
+
+    def time(
+        self,
+        backend: str | None = None,
+        endpoint: str | None = None,
+        caller: str | None = None,
+    ) -> float:
+        """Total seconds spent waiting for responses, optionally filtered."""
+        return sum(c.seconds for c in self._select(backend, endpoint, caller))
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.count()} requests, {self.time():.3f} s waiting for responses,"
+            f" {self.seconds:.3f} s elapsed",
+        ]
+        backends = sorted({c.backend for c in self.calls})
+        if backends:
+            lines += [
+                "",
+                f"{'backend':<12}{'requests':>10}{'errors':>8}{'seconds':>10}",
+            ]
+            for backend in backends:
+                calls = self._select(backend)
+                lines.append(
+                    f"{backend:<12}{sum(c.calls for c in calls):>10}"
+                    f"{sum(c.errors for c in calls):>8}{sum(c.seconds for c in calls):>10.3f}"
+                )
+            lines += [
+                "",
+                f"{'backend':<12}{'endpoint':<40}{'caller':<64}{'requests':>10}{'seconds':>10}",
+            ]
+            for c in self.calls:
+                lines.append(
+                    f"{c.backend:<12}{c.endpoint:<40}{c.caller:<64}{c.calls:>10}{c.seconds:>10.3f}"
+                )
+        if self.caches:
+            lines += ["", f"{'cache':<76}{'hits':>10}{'misses':>10}"]
+            for cache in self.caches:
+                lines.append(f"{cache.name:<76}{cache.hits:>10}{cache.misses:>10}")
+        return "\n".join(lines)
+
+
+_lock = threading.Lock()
+_process_report = Report()
+_active_reports: tuple[Report, ...] = ()
+"""Reports that are recording: updated by replacement, so it can be read without
+the lock."""
+
+
+def is_stats_enabled() -> bool:
+    """Whether requests and cache lookups are counted for `stats()`.
+
+    - disabled by default: set `AIND_SESSION_STATS=1` to enable, or use
+      `set_stats_enabled()`
+    - `profile()` records regardless
+    """
+    return _process_report in _active_reports
+
+
+def set_stats_enabled(enabled: bool) -> None:
+    """Turn counting of requests and cache lookups for `stats()` on or off for
+    this process.
+
+    - enabling also instruments s3fs, so S3 requests are counted (see
+      `instrument_s3fs()`)
+
+    Examples
+    --------
+    >>> set_stats_enabled(True)
+    >>> is_stats_enabled()
+    True
+    >>> set_stats_enabled(False)
+    """
+    global _active_reports
+    if enabled:
+        instrument_s3fs()
+    with _lock:
+        reports = tuple(r for r in _active_reports if r is not _process_report)
+        _active_reports = (_process_report, *reports) if enabled else reports
+
+
+def stats() -> Report:
+    """Requests made to CodeOcean, DocumentDB and S3, and cache hits and misses,
+    while stats are enabled (see `set_stats_enabled()`), since the process
+    started or `reset_stats()` was called.
+
+    - a snapshot: it is not updated by later requests
+    - see `profile()` to record a specific block of code
+
+    Examples
+    --------
+    >>> report = stats()
+    >>> report.count() >= 0
+    True
+    """
+    return _process_report.copy()
+
+
+def reset_stats() -> None:
+    """Discard everything recorded for `stats()`."""
+    global _process_report, _active_reports
+    with _lock:
+        previous, _process_report = _process_report, Report()
+        _active_reports = tuple(
+            _process_report if r is previous else r for r in _active_reports
+        )
+
+
+@contextlib.contextmanager
+def profile() -> Iterator[Report]:
+    """Record requests and cache lookups made while the block runs, from any
+    thread.
+
+    - the report is updated as requests are made, and its wall time is fixed
+      when the block exits
+
+    Examples
+    --------
+    >>> import aind_session
+    >>> with profile() as report:
+    ...     _ = aind_session.Session('ecephys_676909_2023-12-13_13-43-40').raw_data_dir
+    >>> report.count('docdb') > 0
+    True
+    >>> print(report)  # doctest: +SKIP
+    """
+    global _active_reports
+    instrument_s3fs()
+    report = Report()
+    with _lock:
+        _active_reports = (*_active_reports, report)
+    try:
+        yield report
+    finally:
+        with _lock:
+            _active_reports = tuple(r for r in _active_reports if r is not report)
+        report.stop()
+
+
+class ExplainNode:
+    """A step in resolving a value, with the steps and requests it made.
+
+    - `kind` is 'root', 'step' (a function call) or 'request' (to a backend)
+    - `cache` is 'hit' or 'miss' for functions with a cache, otherwise None
+    - `seconds` is the time taken, including children
+    - `print(node)` shows the tree
+    """
+
+    def __init__(self, name: str, kind: str = "step") -> None:
+        self.name = name
+        self.kind = kind
+        self.cache: str | None = None
+        self.seconds = 0.0
+        self.error: str | None = None
+        self.children: list[ExplainNode] = []
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name!r}, kind={self.kind!r})"
+
+    def add(self, child: ExplainNode) -> ExplainNode:
+        """Append a child (from any thread) and return it."""
+        with self._lock:
+            self.children.append(child)
+        return child
+
+    def walk(self) -> Iterator[ExplainNode]:
+        """This node and all its descendants, depth-first."""
+        yield self
+        for child in tuple(self.children):
+            yield from child.walk()
+
+    def find(self, name: str) -> tuple[ExplainNode, ...]:
+        """All descendants whose name ends with `name`."""
+        return tuple(
+            node
+            for node in self.walk()
+            if node is not self and node.name.endswith(name)
+        )
+
+    @property
+    def label(self) -> str:
+        label = self.name
+        if self.cache:
+            label += f" [cache {self.cache}]"
+        if self.error:
+            label += f" [{self.error}]"
+        return f"{label} {self.seconds * 1000:.1f} ms"
+
+    def __str__(self) -> str:
+        lines = [self.label]
+
+        def add_lines(node: ExplainNode, prefix: str) -> None:
+            children = tuple(node.children)
+            for i, child in enumerate(children):
+                last = i == len(children) - 1
+                lines.append(f"{prefix}{'└── ' if last else '├── '}{child.label}")
+                add_lines(child, prefix + ("    " if last else "│   "))
+
+        add_lines(self, "")
+        return "\n".join(lines)
+
+
+_explain_node: contextvars.ContextVar[ExplainNode | None] = contextvars.ContextVar(
+    "aind_session_explain_node", default=None
+)
+
+
+@contextlib.contextmanager
+def explain() -> Iterator[ExplainNode]:
+    """Record the tree of steps taken to resolve values in the block, with the
+    time taken, cache status and requests made at each step.
+
+    - steps are functions with a cache, and functions marked with
+      `explain_step`, such as `Session.raw_data_dir`
+    - only steps in the current thread and in worker threads started with
+      `bind_context` are included
+
+    Examples
+    --------
+    >>> import aind_session
+    >>> session = aind_session.Session('ecephys_676909_2023-12-13_13-43-40')
+    >>> with explain() as tree:
+    ...     _ = session.raw_data_dir
+    >>> tree.children[0].name
+    'session.Session.raw_data_dir'
+    >>> print(tree)  # doctest: +SKIP
+    explain 215.2 ms
+    └── session.Session.raw_data_dir 215.2 ms
+        └── session.Session._get_docdb_fields 215.1 ms
+            └── docdb_utils.get_docdb_record [cache miss] 215.0 ms
+                └── docdb: GET v1/metadata_index/data_assets/find 214.4 ms
+    """
+    instrument_s3fs()
+    root = ExplainNode("explain", kind="root")
+    token = _explain_node.set(root)
+    t0 = time.perf_counter()
+    try:
+        yield root
+    finally:
+        root.seconds = time.perf_counter() - t0
+        _explain_node.reset(token)
+
+
+@contextlib.contextmanager
+def record_step(name: str) -> Iterator[ExplainNode | None]:
+    """Add a step to the tree being explained, if any, for the duration of the
+    block: yields None otherwise."""
+    if (parent := _explain_node.get()) is None:
+        yield None
+        return
+    node = parent.add(ExplainNode(name))
+    token = _explain_node.set(node)
+    t0 = time.perf_counter()
+    try:
+        yield node
+    except BaseException as exc:
+        node.error = exc.__class__.__name__
+        raise
+    finally:
+        node.seconds = time.perf_counter() - t0
+        _explain_node.reset(token)
+
+
+def get_step_name(func: Callable[..., Any]) -> str:
+    """Short name of a function for the tree shown by `explain()`.
+
+    Examples
+    --------
+    >>> get_step_name(get_step_name)
+    'stats_utils.get_step_name'
+    """
+    return f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+
+def explain_step(func: _F) -> _F:
+    """Decorator that shows calls to a function as a step in the tree recorded
+    by `explain()`.
+
+    - functions decorated with `ttl_cache` are shown automatically
+    - for properties, apply beneath `@property`
+    """
+    name = get_step_name(func)
+
+    @functools.wraps(func)
+    def wrapper(*args: object, **kwargs: object) -> object:
+        if _explain_node.get() is None:
+            return func(*args, **kwargs)
+        with record_step(name):
+            return func(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def bind_context(func: Callable[..., _T]) -> Callable[..., _T]:
+    """Run `func` in a copy of the current context, wherever it's called from.
+
+    - use when submitting to a thread pool, so steps and requests in worker
+      threads appear in the tree recorded by `explain()`
+
+    Examples
+    --------
+    >>> import concurrent.futures
+    >>> with explain() as tree, concurrent.futures.ThreadPoolExecutor() as executor:
+    ...     _ = list(executor.map(bind_context(explain_step(abs)), [-1, -2]))
+    >>> len(tree.children)
+    2
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args: object, **kwargs: object) -> _T:
+        # each call needs its own copy: a context can't be entered by two threads
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def _is_recording() -> bool:
+    return bool(_active_reports) or _explain_node.get() is not None
+
+
+def record_call(
+    backend: str,
+    endpoint: str,
+    seconds: float,
+    error: bool = False,
+    caller: str | None = None,
+) -> None:
+    """Record a request in all active reports, and in the tree being explained.
+
+    - `caller` defaults to the innermost aind_session function in the current
+      thread's stack
+    """
+    if (node := _explain_node.get()) is not None:
+        request = node.add(ExplainNode(f"{backend}: {endpoint}", kind="request"))
+        request.seconds = seconds
+        request.error = "error" if error else None
+    if not (reports := _active_reports):
+        return
+    if caller is None:
+        caller = get_caller()
+    for report in reports:
+        report.record_call(backend, endpoint, caller, seconds, error)
+
+
+def record_cache(name: str, hit: bool) -> None:
+    """Record a cache lookup in all active reports, and on the step being
+    explained (the first lookup in a step determines its status)."""
+    if (node := _explain_node.get()) is not None and node.cache is None:
+        node.cache = "hit" if hit else "miss"
+    for report in _active_reports:
+        report.record_cache(name, hit)
+
+
+_SKIPPED_MODULES = (__name__, "aind_session.utils.cache_utils")
+
+_caller: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "aind_session_caller", default=None
+)
+"""Caller of a blocking call that's run in another thread (e.g. by fsspec)."""
+
+
+def get_caller() -> str:
+    """Qualified name of the innermost aind_session function in the current
+    stack, excluding instrumentation and caching wrappers.
+
+    Examples
+    --------
+    >>> def f():
+    ...     return get_caller()
+    >>> f()
+    '<unknown>'
+    """
+    frame: types.FrameType | None = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("aind_session") and module not in _SKIPPED_MODULES:
+            code = frame.f_code
+            return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return _caller.get() or "<unknown>"
+
+
+_ID_PATTERN = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+
+
+def get_endpoint(method: str, url: str) -> str:
+    """Method and URL path, with IDs replaced, so requests to the same endpoint are
+    grouped.
+
+    Examples
+    --------
+    >>> get_endpoint("GET", "https://codeocean.allenneuraldynamics.org/api/v1/data_assets/16d46411-540a-4122-b47f-8cb2a15d593a")
+    'GET data_assets/{id}'
+    >>> get_endpoint("GET", "https://api.allenneuraldynamics.org/v1/metadata_index/data_assets/find?filter=%7B%7D")
+    'GET v1/metadata_index/data_assets/find'
+    """
+    path = urllib.parse.urlparse(url).path.removeprefix("/api/v1/").lstrip("/")
+    return f"{method} {_ID_PATTERN.sub('{id}', path)}"
+
+
+def get_response_hook(backend: str) -> Callable[..., None]:
+    """A `requests` response hook that records each request for `backend`.
+
+    - time is measured from sending the request until the response headers
+      are parsed (`response.elapsed`)
+
+    Examples
+    --------
+    >>> import requests
+    >>> session = requests.Session()
+    >>> session.hooks["response"].insert(0, get_response_hook("docdb"))
+    """
+
+    def hook(response: requests.Response, *args: object, **kwargs: object) -> None:
+        if not _is_recording():
+            return
+        record_call(
+            backend,
+            get_endpoint(response.request.method or "", response.url),
+            response.elapsed.total_seconds(),
+            error=response.status_code >= 400,
+        )
+
+    return hook
+
+
+def instrument_session(session: requests.Session, backend: str) -> requests.Session:
+    """Record all requests made with `session` for `backend`.
+
+    - the hook runs before any existing hooks, which may raise on errors
+    """
+    hooks = session.hooks.setdefault("response", [])
+    if not any(getattr(h, "backend", None) == backend for h in hooks):
+        hook = get_response_hook(backend)
+        hook.backend = backend  # type: ignore[attr-defined]
+        hooks.insert(0, hook)
+    return session
+
+
+def instrument_s3fs() -> None:
+    """Record every S3 API call made by s3fs.
+
+    - patches `s3fs.S3FileSystem._call_s3` and `fsspec.asyn.sync` for the whole
+      process, so it's only called once recording is requested: by
+      `set_stats_enabled(True)`, `profile()` or `explain()`
+    - s3fs makes its calls in fsspec's event loop thread, so the caller's name
+      is passed to that thread via a context variable set when fsspec runs a
+      blocking call
+    - safe to call more than once
+    """
+    try:
+        import fsspec.asyn
+        import s3fs
+    except ImportError:
+        return
+    if getattr(s3fs.S3FileSystem._call_s3, "_aind_session_instrumented", False):
+        return
+    s3fs.S3FileSystem._call_s3 = _wrap_call_s3(s3fs.S3FileSystem._call_s3)
+    fsspec.asyn.sync = _wrap_sync(fsspec.asyn.sync)
+
+
+def _wrap_call_s3(call_s3: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(call_s3)
+    async def wrapper(
+        self: object, method: str, *args: object, **kwargs: object
+    ) -> object:
+        if not _is_recording():
+            return await call_s3(self, method, *args, **kwargs)
+        t0 = time.perf_counter()
+        error = False
+        try:
+            return await call_s3(self, method, *args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            record_call("s3", method, time.perf_counter() - t0, error=error)
+
+    wrapper._aind_session_instrumented = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _wrap_sync(sync: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(sync)
+    def wrapper(*args: object, **kwargs: object) -> object:
+        if not _is_recording():
+            return sync(*args, **kwargs)
+        token = _caller.set(get_caller())
+        try:
+            return sync(*args, **kwargs)
+        finally:
+            _caller.reset(token)
+
+    return wrapper
+
+
+set_stats_enabled(
+    os.getenv("AIND_SESSION_STATS", "0").lower() in ("1", "true", "yes", "on")
+)
+
+
+if __name__ == "__main__":
+    from aind_session import testmod
+
+    testmod()
@@ -0,0 +1,729 @@
+"""
+Local stand-ins for the CodeOcean API, DocumentDB and S3, so tests and
+benchmarks can run without network access or credentials.
+
+- `FakeCodeOceanServer`: an HTTP server on localhost implementing the CodeOcean
+  REST endpoints used by aind_session, which is pointed to by setting
+  `CODE_OCEAN_DOMAIN`
+- `FakeDocDBClient`: replaces the `MetadataDbClient`, supporting the subset of
+  MongoDB queries used by aind_session
+- `FakeS3FileSystem`: an in-memory filesystem registered for `s3://` paths
+
+Each counts the requests it receives and can add a simulated latency to every
+request. Use the `fake_services` fixture to set them all up, then load data made
+with `make_fake_data()`.
+"""
+
+from __future__ import annotations
+
+import collections
+import copy
+import dataclasses
+import datetime
+import http.server
+import json
+import re
+import shutil
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import Any, ClassVar
+
+import codeocean.computation
+import codeocean.data_asset
+import pytest
+from fsspec.implementations.memory import MemoryFileSystem
+from fsspec.registry import _registry as fsspec_registry
+
+import aind_session.utils
+import aind_session.utils.docdb_utils
+
+RAW_DATA_BUCKET = "aind-ephys-data"
+RESULTS_BUCKET = "codeocean-s3datasetsbucket-1u41qdg42ur9"
+SORTING_PIPELINE_ID = "00000000-0000-0000-0000-00000000c0de"
+
+
+# data ------------------------------------------------------------------------ #
+
+
+@dataclasses.dataclass
+class FakeData:
+    """Consistent records for the fake services, as returned by the real APIs."""
+
+    data_assets: list[dict[str, Any]] = dataclasses.field(default_factory=list)
+    docdb_records: list[dict[str, Any]] = dataclasses.field(default_factory=list)
+    computations: dict[str, list[dict[str, Any]]] = dataclasses.field(
+        default_factory=dict
+    )
+    s3_files: dict[str, bytes] = dataclasses.field(default_factory=dict)
+    """Contents of files, keyed by path without protocol (`bucket/prefix/name`)."""
+    session_ids: dict[str, list[str]] = dataclasses.field(default_factory=dict)
+    """Session IDs for each subject ID, in ascending order."""
+
+
+def make_fake_data(
+    n_subjects: int = 10,
+    sessions_per_subject: int = 10,
+    sorters: Iterable[str] = ("kilosort2_5", "kilosort4"),
+    first_subject_id: int = 600000,
+) -> FakeData:
+    """Generate ecephys sessions with a raw data asset and one sorted data asset
+    per sorter, plus matching DocumentDB records, S3 files and sorting pipeline
+    computations.
+
+    - every other DocumentDB record for a raw asset lacks `location`, as older
+      records do, so both ways of finding the raw data dir are exercised
+
+    >>> data = make_fake_data(n_subjects=2, sessions_per_subject=3)
+    >>> len(data.data_assets), len(data.docdb_records)
+    (18, 18)
+    >>> data.session_ids['600000'][0]
+    'ecephys_600000_2023-01-01_12-00-00'
+    """
+    sorters = tuple(sorters)
+    data = FakeData()
+    start = datetime.datetime(2023, 1, 1, 12)
+    for subject_idx in range(n_subjects):
+        subject_id = str(first_subject_id + subject_idx)
+        data.session_ids[subject_id] = []
+        for session_idx in range(sessions_per_subject):
+            dt = start + datetime.timedelta(days=session_idx, minutes=subject_idx)
+            session_id = f"ecephys_{subject_id}_{dt:%Y-%m-%d_%H-%M-%S}"
+            data.session_ids[subject_id].append(session_id)
+            raw = _make_data_asset_record(
+                name=session_id,
+                created=dt + datetime.timedelta(hours=1),
+                subject_id=subject_id,
+                data_level="raw data",
+                bucket=RAW_DATA_BUCKET,
+                prefix=session_id,
+            )
+            data.data_assets.append(raw)
+            data.s3_files[f"{RAW_DATA_BUCKET}/{session_id}/data_description.json"] = (
+                json.dumps({"name": session_id}).encode()
+            )
+            data.docdb_records.append(
+                _make_docdb_record(
+                    raw,
+                    subject_id,
+                    location=(
+                        f"s3://{RAW_DATA_BUCKET}/{session_id}"
+                        if session_idx % 2 == 0
+                        else None
+                    ),
+                )
+            )
+            for sorter_idx, sorter in enumerate(sorters):
+                sorted_dt = dt + datetime.timedelta(days=1, hours=sorter_idx)
+                asset_id = _make_id(f"{session_id}/{sorter}")
+                sorted_asset = _make_data_asset_record(
+                    name=f"{session_id}_sorted_{sorted_dt:%Y-%m-%d_%H-%M-%S}",
+                    created=sorted_dt,
+                    subject_id=subject_id,
+                    data_level="derived",
+                    bucket=RESULTS_BUCKET,
+                    prefix=asset_id,
+                    asset_id=asset_id,
+                    asset_type=codeocean.data_asset.DataAssetType.Result,
+                )
+                data.data_assets.append(sorted_asset)
+                data.docdb_records.append(_make_docdb_record(sorted_asset, subject_id))
+                data.s3_files[f"{RESULTS_BUCKET}/{asset_id}/processing.json"] = (
+                    json.dumps(
+                        {
+                            "processing_pipeline": {
+                                "data_processes": [
+                                    {
+                                        "name": "Spike sorting",
+                                        "parameters": {"sorter_name": sorter},
+                                    }
+                                ]
+                            }
+                        }
+                    ).encode()
+                )
+                data.s3_files[f"{RESULTS_BUCKET}/{asset_id}/output"] = (
+                    b"FULL PIPELINE time:  1000.00s\n"
+                )
+                data.computations.setdefault(SORTING_PIPELINE_ID, []).append(
+                    {
+                        "id": _make_id(f"{session_id}/{sorter}/computation"),
+                        "created": int(sorted_dt.timestamp()) - 3600,
+                        "name": f"Run {len(data.computations.get(SORTING_PIPELINE_ID, []))}",
+                        "run_time": 3600,
+                        "state": codeocean.computation.ComputationState.Completed,
+                        "has_results": True,
+                        "data_assets": [{"id": raw["id"], "mount": "ecephys"}],
+                    }
+                )
+    return data
+
+
+def _make_id(key: str) -> str:
+    """Reproducible UUIDs, so data is the same in every run."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+
+
+def _make_data_asset_record(
+    name: str,
+    created: datetime.datetime,
+    subject_id: str,
+    data_level: str,
+    bucket: str,
+    prefix: str,
+    asset_id: str | None = None,
+    asset_type: codeocean.data_asset.DataAssetType = codeocean.data_asset.DataAssetType.Dataset,
+) -> dict[str, Any]:
+    return codeocean.data_asset.DataAsset(
+        id=asset_id or _make_id(name),
+        created=int(created.timestamp()),
+        name=name,
+        mount=name,
+        state=codeocean.data_asset.DataAssetState.Ready,
+        type=asset_type,
+        last_used=0,
+        tags=["ecephys", "raw" if data_level == "raw data" else "derived"],
+        source_bucket=codeocean.data_asset.SourceBucket(
+            origin=codeocean.data_asset.DataAssetOrigin.AWS,
+            bucket=bucket,
+            prefix=prefix,
+        ),
+        custom_metadata={"subject id": subject_id, "data level": data_level},
+    ).to_dict()
+
+
+def _make_docdb_record(
+    data_asset: Mapping[str, Any], subject_id: str, location: str | None = None
+) -> dict[str, Any]:
+    record = {
+        "_id": _make_id(f"{data_asset['name']}/docdb"),
+        "name": data_asset["name"],
+        "created": datetime.datetime.fromtimestamp(
+            data_asset["created"], tz=datetime.timezone.utc
+        ).isoformat(),
+        "subject": {"subject_id": subject_id},
+        "external_links": {"Code Ocean": [data_asset["id"]]},
+    }
+    if location:
+        record["location"] = location
+    return record
+
+
+# CodeOcean ------------------------------------------------------------------- #
+
+
+class FakeCodeOceanServer:
+    """A CodeOcean REST API on localhost, serving data assets and computations
+    from memory.
+
+    Implements:
+    - `POST data_assets/search` (query terms `name:`, `tag:`, custom metadata
+      fields like `subject id:`, or free text; sorting; offset/limit paging)
+    - `GET data_assets/{id}`
+    - `GET computations/{id}`
+    - `GET capsules/{id}/computations`
+    """
+
+    DEFAULT_SEARCH_LIMIT = 100
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.data_assets: dict[str, dict[str, Any]] = {}
+        self.computations: dict[str, list[dict[str, Any]]] = {}
+        self.latency = latency
+        """Seconds added to the handling of every request."""
+        self.requests: collections.Counter[str] = collections.Counter()
+        """Number of requests received, keyed by method and route."""
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), self._make_handler()
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="FakeCodeOceanServer", daemon=True
+        )
+
+    @property
+    def domain(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> FakeCodeOceanServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def load(self, data: FakeData) -> None:
+        self.data_assets.update({asset["id"]: asset for asset in data.data_assets})
+        for capsule_id, computations in data.computations.items():
+            self.computations.setdefault(capsule_id, []).extend(computations)
+
+    def _make_handler(self) -> type[http.server.BaseHTTPRequestHandler]:
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep connections alive, as the real API
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                fake._handle(self, "GET")
+
+            def do_POST(self) -> None:
+                fake._handle(self, "POST")
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
+
+    def _handle(self, handler: http.server.BaseHTTPRequestHandler, method: str) -> None:
+        path = urllib.parse.urlparse(handler.path).path.removeprefix("/api/v1/")
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = json.loads(handler.rfile.read(length)) if length else None
+        route = re.sub(r"[0-9a-f]{8}-[0-9a-f-]{27}", "{id}", path)
+        with self._lock:
+            self.requests[f"{method} {route}"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        status, response = self._route(method, route, path, body)
+        content = json.dumps(response).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    def _route(self, method: str, route: str, path: str, body: Any) -> tuple[int, Any]:
+        parts = path.split("/")
+        if method == "POST" and route == "data_assets/search":
+            return 200, self._search_data_assets(body or {})
+        if method == "GET" and route == "data_assets/{id}":
+            if asset := self.data_assets.get(parts[1]):
+                return 200, asset
+        elif method == "GET" and route == "computations/{id}":
+            for computation in self._iter_computations():
+                if computation["id"] == parts[1]:
+                    return 200, computation
+        elif method == "GET" and route == "capsules/{id}/computations":
+            return 200, self.computations.get(parts[1], [])
+        return 404, {"message": f"Not found: {method} {path}"}
+
+    def _iter_computations(self) -> Iterator[dict[str, Any]]:
+        for computations in self.computations.values():
+            yield from computations
+
+    def _search_data_assets(self, params: Mapping[str, Any]) -> dict[str, Any]:
+        terms = _parse_search_query(params.get("query") or "")
+        results = [
+            asset
+            for asset in self.data_assets.values()
+            if (params.get("type") in (None, asset["type"]))
+            and all(_matches_search_term(asset, *term) for term in terms)
+        ]
+        if sort_field := params.get("sort_field"):
+            results.sort(
+                key=lambda asset: asset.get(sort_field) or 0,
+                reverse=params.get("sort_order") == "desc",
+            )
+        offset = params.get("offset") or 0
+        limit = params.get("limit") or self.DEFAULT_SEARCH_LIMIT
+        return {
+            "has_more": offset + limit < len(results),
+            "results": results[offset : offset + limit],
+        }
+
+
+def _parse_search_query(query: str) -> list[tuple[str | None, str]]:
+    """Split a CodeOcean search query into `(field, value)` terms: field is None
+    for free text.
+
+    >>> _parse_search_query("subject id:676909 name:ecephys_676909")
+    [('subject id', '676909'), ('name', 'ecephys_676909')]
+    >>> _parse_search_query("676909")
+    [(None, '676909')]
+    """
+    if ":" not in query:
+        return [(None, word) for word in query.split()]
+    return [
+        (field.strip(), value)
+        for field, value in re.findall(r"(?:^|\s)([^:\s][^:]*?):\s*(\S+)", query)
+    ]
+
+
+def _matches_search_term(
+    asset: Mapping[str, Any], field: str | None, value: str
+) -> bool:
+    value = value.lower()
+    custom_metadata = asset.get("custom_metadata") or {}
+    if field is None:
+        return any(
+            value in str(v).lower()
+            for v in (
+                asset["name"],
+                *(asset.get("tags") or ()),
+                *custom_metadata.values(),
+            )
+        )
+    if field == "name":
+        return value in asset["name"].lower()
+    if field == "tag":
+        return value in (tag.lower() for tag in asset.get("tags") or ())
+    return str(custom_metadata.get(field, "")).lower() == value
+
+
+# DocumentDB ------------------------------------------------------------------ #
+
+
+class FakeDocDBClient:
+    """In-memory replacement for `aind_data_access_api.document_db.MetadataDbClient`.
+
+    Supports the MongoDB features used by aind_session: dotted field names,
+    matching elements of arrays, `$and`, `$or`, `$in`, `$regex`, `$exists`,
+    comparison operators, inclusion/exclusion projections, multi-key sorts and
+    limits.
+    """
+
+    def __init__(
+        self, records: Iterable[dict[str, Any]] = (), latency: float = 0.0
+    ) -> None:
+        self.records: list[dict[str, Any]] = list(records)
+        self.latency = latency
+        """Seconds added to every request."""
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def retrieve_docdb_records(
+        self,
+        filter_query: dict[str, Any] | None = None,
+        projection: dict[str, Any] | None = None,
+        sort: dict[str, int] | None = None,
+        limit: int = 0,
+        paginate: bool | None = None,
+        paginate_batch_size: int | None = None,
+        paginate_max_iterations: int | None = None,
+    ) -> list[dict[str, Any]]:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        records = [r for r in self.records if _matches_query(r, filter_query or {})]
+        for key, direction in reversed(list((sort or {}).items())):
+            records.sort(key=lambda r: _sort_key(r, key), reverse=direction < 0)
+        if limit:
+            records = records[:limit]
+        return [_project(r, projection) for r in records]
+
+
+def _get_values(record: Any, key: str) -> list[Any]:
+    """Values at a dotted path, with arrays along the path expanded, as MongoDB
+    matches them."""
+    values = [record]
+    for part in key.split("."):
+        next_values = []
+        for value in values:
+            if isinstance(value, Mapping) and part in value:
+                next_values.append(value[part])
+            elif isinstance(value, list):
+                next_values.extend(
+                    v[part] for v in value if isinstance(v, Mapping) and part in v
+                )
+        values = next_values
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _matches_query(record: Mapping[str, Any], query: Mapping[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches_query(record, q) for q in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches_query(record, q) for q in condition):
+                return False
+        elif not _matches_condition(_get_values(record, key), condition):
+            return False
+    return True
+
+
+def _matches_condition(values: list[Any], condition: Any) -> bool:
+    if not (
+        isinstance(condition, Mapping)
+        and condition
+        and all(k.startswith("$") for k in condition)
+    ):
+        return condition in values
+    for operator, argument in condition.items():
+        if operator == "$eq":
+            matched = argument in values
+        elif operator == "$ne":
+            matched = argument not in values
+        elif operator == "$in":
+            matched = any(v in argument for v in values)
+        elif operator == "$exists":
+            matched = bool(values) == bool(argument)
+        elif operator == "$regex":
+            matched = any(isinstance(v, str) and re.search(argument, v) for v in values)
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            compare = {
+                "$gt": lambda a, b: a > b,
+                "$gte": lambda a, b: a >= b,
+                "$lt": lambda a, b: a < b,
+                "$lte": lambda a, b: a <= b,
+            }[operator]
+            matched = any(
+                type(v) is type(argument) and compare(v, argument) for v in values
+            )
+        else:
+            raise NotImplementedError(f"Unsupported query operator: {operator}")
+        if not matched:
+            return False
+    return True
+
+
+def _sort_key(record: Mapping[str, Any], key: str) -> tuple[bool, Any]:
+    values = _get_values(record, key)
+    return (bool(values), values[0] if values else None)
+
+
+def _project(
+    record: dict[str, Any], projection: Mapping[str, Any] | None
+) -> dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(record)
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if not include:
+        projected = copy.deepcopy(record)
+        for key in (k for k, v in projection.items() if not v):
+            *parents, last = key.split(".")
+            parent: Any = projected
+            for part in parents:
+                parent = parent.get(part, {}) if isinstance(parent, Mapping) else {}
+            if isinstance(parent, dict):
+                parent.pop(last, None)
+        return projected
+    if projection.get("_id", 1):
+        include.add("_id")
+    projected: dict[str, Any] = {}
+    for key in include:
+        *parents, last = key.split(".")
+        source: Any = record
+        target = projected
+        for part in parents:
+            if not isinstance(source, Mapping) or part not in source:
+                break
+            source = source[part]
+            target = target.setdefault(part, {})
+        else:
+            if isinstance(source, Mapping) and last in source:
+                target[last] = copy.deepcopy(source[last])
+    return projected
+
+
+# S3 -------------------------------------------------------------------------- #
+
+
+class FakeS3FileSystem(MemoryFileSystem):
+    """An in-memory filesystem registered for `s3://` paths, so `upath.UPath`
+    objects for S3 work without network access.
+
+    - paths are `bucket/key`, as with s3fs
+    - listing, getting info and opening files count as requests
+    """
+
+    protocol = ("s3", "s3a")
+    root_marker = ""
+    store: ClassVar[dict[str, Any]] = {}
+    pseudo_dirs: ClassVar[list[str]] = [""]
+    latency: ClassVar[float] = 0.0
+    requests: ClassVar[collections.Counter[str]] = collections.Counter()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _strip_protocol(cls, path: Any) -> Any:
+        if isinstance(path, list):
+            return [cls._strip_protocol(p) for p in path]
+        path = str(path)
+        for protocol in cls.protocol:
+            path = path.removeprefix(f"{protocol}://")
+        return path.rstrip("/")
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.store.clear()
+        cls.pseudo_dirs[:] = [""]
+        cls.requests.clear()
+        cls.latency = 0.0
+
+    @classmethod
+    def _request(cls, name: str) -> None:
+        with cls._lock:
+            cls.requests[name] += 1
+        if cls.latency:
+            time.sleep(cls.latency)
+
+    def ls(self, path: str, detail: bool = True, **kwargs: Any) -> list[Any]:
+        self._request("ls")
+        return super().ls(path, detail=detail, **kwargs)
+
+    def info(self, path: str, **kwargs: Any) -> dict[str, Any]:
+        self._request("info")
+        return super().info(path, **kwargs)
+
+    def _open(self, path: str, mode: str = "rb", **kwargs: Any) -> Any:
+        self._request("open")
+        return super()._open(path, mode=mode, **kwargs)
+
+    def cat_file(
+        self, path: str, start: Any = None, end: Any = None, **kwargs: Any
+    ) -> bytes:
+        self._request("cat_file")
+        return super().cat_file(path, start=start, end=end, **kwargs)
+
+
+# fixtures -------------------------------------------------------------------- #
+
+
+@dataclasses.dataclass
+class FakeServices:
+    codeocean: FakeCodeOceanServer
+    docdb: FakeDocDBClient
+    s3: type[FakeS3FileSystem]
+
+    def load(self, data: FakeData) -> None:
+        """Add data assets, records, computations and files to all services."""
+        self.codeocean.load(data)
+        self.docdb.records.extend(data.docdb_records)
+        fs = self.s3()
+        for path, content in data.s3_files.items():
+            fs.pipe_file(path, content)
+        self.reset_requests()
+
+    @property
+    def latency(self) -> float:
+        return self.codeocean.latency
+
+    @latency.setter
+    def latency(self, seconds: float) -> None:
+        self.codeocean.latency = self.docdb.latency = self.s3.latency = seconds
+
+    def reset_requests(self) -> None:
+        self.codeocean.requests.clear()
+        self.docdb.requests = 0
+        self.s3.requests.clear()
+
+    def requests(self) -> dict[str, int]:
+        """Number of requests made to each service since the last reset."""
+        return {
+            "codeocean": sum(self.codeocean.requests.values()),
+            "docdb": self.docdb.requests,
+            "s3": sum(self.s3.requests.values()),
+        }
+
+
+def clear_caches() -> None:
+    """Clear every in-memory cache in aind_session, so the next lookup makes
+    requests, as in a new process."""
+    seen: set[int] = set()
+
+    def clear(obj: Any) -> None:
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        if isinstance(obj, staticmethod):
+            obj = obj.__func__
+        if callable(getattr(obj, "cache_clear", None)):
+            obj.cache_clear()
+        if isinstance(obj, type) and obj.__module__.startswith("aind_session"):
+            for value in vars(obj).values():
+                clear(value)
+
+    for name, module in list(sys.modules.items()):
+        if name.startswith("aind_session"):
+            for value in list(vars(module).values()):
+                clear(value)
+
+
+@pytest.fixture
+def fake_services(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Iterator[FakeServices]:
+    """CodeOcean, DocumentDB and S3 stand-ins, in place of the real services."""
+    FakeS3FileSystem.reset()
+    with FakeCodeOceanServer() as codeocean_server:
+        docdb = FakeDocDBClient()
+        monkeypatch.setenv("CODE_OCEAN_API_TOKEN", "cop_fake")
+        monkeypatch.setenv("CODE_OCEAN_DOMAIN", codeocean_server.domain)
+        monkeypatch.setenv("AIND_SESSION_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(
+            aind_session.utils.docdb_utils,
+            "get_docdb_api_client",
+            lambda *args, **kwargs: docdb,
+        )
+        monkeypatch.setitem(fsspec_registry, "s3", FakeS3FileSystem)
+        monkeypatch.setitem(fsspec_registry, "s3a", FakeS3FileSystem)
+        clear_caches()
+        try:
+            yield FakeServices(codeocean_server, docdb, FakeS3FileSystem)
+        finally:
+            clear_caches()
+            FakeS3FileSystem.reset()
+
+
+@dataclasses.dataclass
+class BenchmarkResult:
+    name: str
+    seconds: float
+    requests: dict[str, int]
+
+
+_benchmark_results: list[BenchmarkResult] = []
+
+
+@pytest.fixture(scope="session")
+def fake_data_factory() -> Any:
+    """`make_fake_data`, for test modules (which can't import from conftest)."""
+    return make_fake_data
+
+
+@pytest.fixture
+def benchmark(fake_services: FakeServices) -> Any:
+    """Call a function with cold caches (in memory and on disk), recording its wall time and the requests
+    it makes to each service: results are summarized at the end of the run."""
+
+    def run(name: str, func: Any, *args: Any, **kwargs: Any) -> Any:
+        clear_caches()
+        shutil.rmtree(aind_session.utils.get_cache_dir(), ignore_errors=True)
+        fake_services.reset_requests()
+        t0 = time.perf_counter()
+        result = func(*args, **kwargs)
+        _benchmark_results.append(
+            BenchmarkResult(name, time.perf_counter() - t0, fake_services.requests())
+        )
+        return result
+
+    run.results = _benchmark_results
+    return run
+
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    if not _benchmark_results:
+        return
+    terminalreporter.section("aind_session benchmarks")
+    terminalreporter.write_line(
+        f"{'benchmark':<56} {'seconds':>8} {'codeocean':>10} {'docdb':>6} {'s3':>6}"
+    )
+    for result in _benchmark_results:
+        terminalreporter.write_line(
+            f"{result.name:<56} {result.seconds:>8.3f} {result.requests['codeocean']:>10}"
+            f" {result.requests['docdb']:>6} {result.requests['s3']:>6}"
+        )
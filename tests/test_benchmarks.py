@@ -0,0 +1,246 @@
+"""
+Benchmarks of wall time and the number of requests made to CodeOcean,
+DocumentDB and S3 for common lookups, using the local stand-ins in `conftest.py`.
+
+- each lookup starts with cold caches, as in a new process
+- catalog size and simulated latency are configured with environment
+  variables:
+    - `AIND_SESSION_BENCHMARK_SUBJECTS`: number of subjects (default 50)
+    - `AIND_SESSION_BENCHMARK_SESSIONS`: sessions per subject (default 20)
+    - `AIND_SESSION_BENCHMARK_LATENCY`: seconds per request (default 0)
+    - `AIND_SESSION_BENCHMARK_IMPORT_SECONDS`: maximum time to import the
+      package and parse a session ID (default 0.3)
+- results are summarized at the end of the test run
+- wall times are only reported, as they vary between machines and with load:
+  set `AIND_SESSION_BENCHMARK_ASSERT_TIMES=1` to also fail tests that are slower
+  than expected
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from typing import Any
+
+import pytest
+
+import aind_session
+
+N_SUBJECTS = int(os.getenv("AIND_SESSION_BENCHMARK_SUBJECTS", 50))
+SESSIONS_PER_SUBJECT = int(os.getenv("AIND_SESSION_BENCHMARK_SESSIONS", 20))
+LATENCY = float(os.getenv("AIND_SESSION_BENCHMARK_LATENCY", 0))
+SORTERS = ("kilosort2_5", "kilosort4")
+IMPORT_SECONDS = float(os.getenv("AIND_SESSION_BENCHMARK_IMPORT_SECONDS", 0.3))
+ASSERT_TIMES = os.getenv("AIND_SESSION_BENCHMARK_ASSERT_TIMES", "0").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
+
+@pytest.fixture(scope="module")
+def fake_data(fake_data_factory: Any) -> Any:
+    return fake_data_factory(
+        n_subjects=N_SUBJECTS,
+        sessions_per_subject=SESSIONS_PER_SUBJECT,
+        sorters=SORTERS,
+    )
+
+
+@pytest.fixture
+def services(fake_services: Any, fake_data: Any) -> Any:
+    fake_services.load(fake_data)
+    fake_services.latency = LATENCY
+    return fake_services
+
+
+@pytest.fixture
+def subject_id(fake_data: Any) -> str:
+    return list(fake_data.session_ids)[-1]
+
+
+def test_get_sessions(
+    services: Any, benchmark: Any, fake_data: Any, subject_id: str
+) -> None:
+    sessions = benchmark(
+        f"get_sessions ({SESSIONS_PER_SUBJECT} sessions)",
+        aind_session.get_sessions,
+        subject_id,
+    )
+    assert [s.id for s in sessions] == fake_data.session_ids[subject_id]
+
+
+@pytest.mark.parametrize("session_idx", [0, 1], ids=["docdb-location", "raw-asset"])
+def test_raw_data_dir(
+    services: Any, benchmark: Any, fake_data: Any, subject_id: str, session_idx: int
+) -> None:
+    session_id = fake_data.session_ids[subject_id][session_idx]
+    path = benchmark(
+        f"Session.raw_data_dir ({'with' if session_idx % 2 == 0 else 'without'} location)",
+        lambda: aind_session.Session(session_id).raw_data_dir,
+    )
+    assert path.as_posix() == f"s3://aind-ephys-data/{session_id}"
+
+
+def test_sorted_data_assets(
+    services: Any, benchmark: Any, fake_data: Any, subject_id: str
+) -> None:
+    session_id = fake_data.session_ids[subject_id][0]
+    assets = benchmark(
+        "EcephysExtension.sorted_data_assets",
+        lambda: aind_session.Session(session_id).ecephys.sorted_data_assets,
+    )
+    assert len(assets) == len(SORTERS)
+    assert all(asset.name.startswith(f"{session_id}_sorted") for asset in assets)
+
+
+def test_sorter_names(
+    services: Any, benchmark: Any, fake_data: Any, subject_id: str
+) -> None:
+    session_id = fake_data.session_ids[subject_id][0]
+    names = benchmark(
+        "EcephysExtension.sorter.names",
+        lambda: aind_session.Session(session_id).ecephys.sorter.names,
+    )
+    assert names == tuple(sorted(SORTERS))
+
+
+def test_sorter_names_all_sessions(
+    services: Any, benchmark: Any, fake_data: Any, subject_id: str
+) -> None:
+    def get_all_sorter_names() -> set[str]:
+        return {
+            name
+            for session in aind_session.get_sessions(subject_id)
+            for name in session.ecephys.sorter.names
+        }
+
+    names = benchmark(
+        f"EcephysExtension.sorter.names (x{SESSIONS_PER_SUBJECT} sessions)",
+        get_all_sorter_names,
+    )
+    assert names == set(SORTERS)
+
+
+def test_requests_do_not_scale_with_catalog_size(
+    fake_services: Any, benchmark: Any, fake_data_factory: Any
+) -> None:
+    requests = []
+    for n_subjects in (2, 20):
+        fake_services.codeocean.data_assets.clear()
+        fake_services.docdb.records.clear()
+        data = fake_data_factory(n_subjects=n_subjects, sessions_per_subject=3)
+        fake_services.load(data)
+        session_id = data.session_ids["600000"][1]  # no location in DocumentDB
+        benchmark(
+            f"Session.raw_data_dir (without location, {n_subjects} subjects)",
+            lambda: aind_session.Session(session_id).raw_data_dir,
+        )
+        requests.append(benchmark.results[-1].requests)
+    assert requests[0] == requests[1]
+
+
+def test_search_computations(services: Any, benchmark: Any, fake_data: Any) -> None:
+    pipeline_id = next(iter(fake_data.computations))
+    computations = benchmark(
+        "search_computations (sorting pipeline)",
+        aind_session.search_computations,
+        pipeline_id,
+        has_results=True,
+    )
+    assert len(computations) == len(fake_data.computations[pipeline_id])
+
+
+def test_get_sessions_filtering(
+    fake_services: Any,
+    benchmark: Any,
+    fake_data_factory: Any,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    import npc_session
+
+    # a raw asset and 9 sorted assets for each of 500 sessions:
+    sorters = tuple(f"kilosort4_{idx}" for idx in range(9))
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=500, sorters=sorters)
+    fake_services.load(data)
+    subject_id = next(iter(data.session_ids))
+    # compare filtering alone, without fetching assets:
+    assets = aind_session.utils.get_subject_data_assets(subject_id)
+    monkeypatch.setattr(
+        aind_session.utils, "get_subject_data_assets", lambda *_, **__: assets
+    )
+    filters = dict(platform="ecephys", start_date="2024-01-01", end_date="2025-01-01")
+
+    def get_sessions_per_asset() -> tuple[aind_session.Session, ...]:
+        """Previous implementation: parses every asset name into a session record,
+        and the filter arguments for every asset."""
+        sessions = set()
+        for asset in assets:
+            try:
+                session = npc_session.AINDSessionRecord(asset.name)
+            except ValueError:
+                continue
+            if session.platform != filters["platform"]:
+                continue
+            if session.dt <= npc_session.DatetimeRecord(filters["start_date"]).dt:
+                continue
+            if session.dt >= npc_session.DatetimeRecord(filters["end_date"]).dt:
+                continue
+            sessions.add(aind_session.Session(session.id))
+        return tuple(sorted(sessions, key=lambda s: s.dt))
+
+    expected = benchmark(
+        f"get_sessions filtering, per asset ({len(assets)} assets)",
+        get_sessions_per_asset,
+    )
+    sessions = benchmark(
+        f"get_sessions filtering ({len(assets)} assets)",
+        aind_session.get_sessions,
+        subject_id,
+        **filters,
+    )
+    assert sessions and sessions == expected
+    baseline, result = benchmark.results[-2:]
+    if ASSERT_TIMES:
+        assert result.seconds < baseline.seconds
+
+
+IMPORT_SCRIPT = """
+import json, sys, time
+t0 = time.perf_counter()
+import aind_session
+session_id = aind_session.Session("ecephys_676909_2023-12-13_13-43-40").id
+seconds = time.perf_counter() - t0
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_import_time(benchmark: Any) -> None:
+    def import_in_new_process() -> dict[str, Any]:
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(result.stdout)
+
+    result = benchmark(
+        "import aind_session + Session.id (new process)", import_in_new_process
+    )
+    # heavy dependencies are only imported when needed:
+    for module in (
+        "aind_codeocean_pipeline_monitor",
+        "aind_data_access_api",
+        "codeocean",
+        "npc_io",
+        "s3fs",
+        "aind_session.extensions.ecephys",
+        "aind_session.utils.codeocean_utils",
+    ):
+        assert module not in result["modules"]
+    if ASSERT_TIMES:
+        assert result["seconds"] < IMPORT_SECONDS
@@ -1,10 +1,28 @@
+from __future__ import annotations
+
+import asyncio
 import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Any
 
+import codeocean.computation
+import codeocean.data_asset
 import pytest
+import requests
 
+import aind_session.aio
+import aind_session.utils.cache_utils
+import aind_session.utils.catalog_utils
 import aind_session.utils.codeocean_utils
+import aind_session.utils.s3_utils
+import aind_session.utils.stats_utils
 from aind_session.extensions.ecephys import EcephysExtension
 
 
@@ -14,6 +32,42 @@ def test_import_package() -> None:
     assert aind_session.__name__ == "aind_session"
 
 
+def test_lazy_exports() -> None:
+    assert aind_session.Session is aind_session.session.Session
+    assert aind_session.ecephys is EcephysExtension
+    assert aind_session.Session.ecephys is EcephysExtension
+    assert aind_session.lims is aind_session.Session.lims
+    # importing an extension's submodule doesn't replace the class on the package:
+    session = aind_session.Session("ecephys_676909_2023-12-13_13-43-40")
+    assert isinstance(session.ecephys, EcephysExtension)
+    assert aind_session.extensions.ecephys is EcephysExtension
+    assert aind_session.extensions.lims is aind_session.Session.lims
+    assert aind_session.get_ttl_hash is aind_session.utils.misc_utils.get_ttl_hash
+    assert "get_sessions" in dir(aind_session)
+    # `import *` provides the same names as before imports were lazy:
+    namespace: dict[str, Any] = {}
+    exec("from aind_session import *", namespace)
+    assert {"Session", "get_sessions", "get_data_assets"} <= set(namespace)
+    assert set(aind_session.utils.__all__) <= set(aind_session.__all__)
+    for name in aind_session.__all__:
+        assert getattr(aind_session, name) is not None
+    with pytest.raises(AttributeError):
+        _ = aind_session.not_an_attribute
+    with pytest.raises(AttributeError):
+        _ = aind_session.utils.not_an_attribute
+    # unknown names don't import any submodules:
+    script = (
+        "import sys, aind_session\n"
+        "for module in (aind_session, aind_session.utils):\n"
+        "    assert not hasattr(module, 'not_an_attribute')\n"
+        "print(sorted(m for m in sys.modules if m.startswith('aind_session.')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "['aind_session.utils']"
+
+
 @pytest.mark.parametrize(
     ("processing", "expected"),
     (
@@ -59,3 +113,1231 @@ def test_get_sorter_name_from_processing_json_locations(
         EcephysExtension.get_sorter_name("00000000-0000-0000-0000-000000000000")
         == expected
     )
+
+
+def _make_data_asset(
+    asset_id: str = "00000000-0000-0000-0000-000000000001",
+    name: str = "ecephys_676909_2023-12-13_13-43-40",
+    created: int = 1702620828,
+    state: str = "ready",
+) -> codeocean.data_asset.DataAsset:
+    return codeocean.data_asset.DataAsset(
+        id=asset_id,
+        created=created,
+        name=name,
+        mount=name,
+        state=codeocean.data_asset.DataAssetState(state),
+        type=codeocean.data_asset.DataAssetType.Dataset,
+        last_used=0,
+    )
+
+
+def test_persistent_model_cache(tmp_path: Path) -> None:
+    cache = aind_session.utils.cache_utils.PersistentModelCache(
+        tmp_path / "models.sqlite", ttl=60, max_bytes=10_000
+    )
+    asset = _make_data_asset()
+    cache.put(asset)
+    assert cache.get(asset.id) == asset
+
+    # a second instance (e.g. in another process) sees the same entries
+    other = aind_session.utils.cache_utils.PersistentModelCache(
+        tmp_path / "models.sqlite"
+    )
+    assert other.get(asset.id) == asset
+
+    # assets that are not ready are not stored
+    draft = _make_data_asset(
+        asset_id="00000000-0000-0000-0000-000000000002", state="draft"
+    )
+    cache.put(draft)
+    assert cache.get(draft.id) is None
+
+    # stale entries are ignored
+    cache.ttl = 0
+    assert cache.get(asset.id) is None
+
+
+def test_persistent_model_cache_eviction(tmp_path: Path) -> None:
+    cache = aind_session.utils.cache_utils.PersistentModelCache(
+        tmp_path / "models.sqlite", max_bytes=2_000
+    )
+    assets = [
+        _make_data_asset(asset_id=f"00000000-0000-0000-0000-{i:012d}")
+        for i in range(10)
+    ]
+    for asset in assets:
+        cache.put(asset)
+    cache.evict()
+    assert cache.get(assets[-1].id) == assets[-1]
+    assert cache.get(assets[0].id) is None
+
+
+def test_get_data_asset_model_uses_model_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AIND_SESSION_CACHE_DIR", str(tmp_path))
+    asset = _make_data_asset()
+    calls: list[str] = []
+
+    class DataAssets:
+        def get_data_asset(self, asset_id: str) -> codeocean.data_asset.DataAsset:
+            calls.append(asset_id)
+            return asset
+
+    class Client:
+        data_assets = DataAssets()
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "get_codeocean_client", lambda: Client()
+    )
+    assert aind_session.utils.codeocean_utils.get_data_asset_model(asset.id) == asset
+    assert aind_session.utils.codeocean_utils.get_data_asset_model(asset.id) == asset
+    assert calls == [asset.id]
+
+    aind_session.utils.cache_utils.set_model_cache_enabled(False)
+    try:
+        aind_session.utils.codeocean_utils.get_data_asset_model(asset.id)
+    finally:
+        aind_session.utils.cache_utils.set_model_cache_enabled(True)
+    assert calls == [asset.id, asset.id]
+
+
+def test_get_data_asset_models_order_and_skipping(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    ids = [f"00000000-0000-0000-0000-{i:012d}" for i in range(20)]
+
+    def get_data_asset_model(asset_id: str) -> codeocean.data_asset.DataAsset:
+        if asset_id == ids[3]:
+            response = requests.Response()
+            response.status_code = 401
+            raise requests.HTTPError(response=response)
+        return _make_data_asset(asset_id=asset_id, created=-ids.index(asset_id))
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils,
+        "get_data_asset_model",
+        get_data_asset_model,
+    )
+    assets = aind_session.utils.codeocean_utils.get_data_asset_models(
+        ids, max_workers=4
+    )
+    assert [asset.id for asset in assets] == ids[:3] + ids[4:]
+    assert [
+        asset.id for asset in aind_session.utils.codeocean_utils.sort_by_created(ids)
+    ] == list(reversed(ids[:3] + ids[4:]))
+
+
+def test_get_data_asset_models_skips_not_found(
+    fake_services: Any, fake_data_factory: Any
+) -> None:
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=2)
+    fake_services.load(data)
+    ids = [asset["id"] for asset in data.data_assets]
+    unknown_id = "00000000-0000-0000-0000-000000000000"
+    with pytest.raises(ValueError):
+        aind_session.utils.codeocean_utils.get_data_asset_model(unknown_id)
+    # a 404 for one asset doesn't abort the batch:
+    assets = aind_session.utils.codeocean_utils.get_data_asset_models(
+        [ids[0], unknown_id, *ids[1:]]
+    )
+    assert [asset.id for asset in assets] == ids
+
+
+def test_is_raw_data_asset_stays_lazy() -> None:
+    LazyDataAsset = aind_session.utils.codeocean_utils.LazyDataAsset
+    raw = LazyDataAsset(_make_data_asset().to_dict())
+    assert aind_session.utils.is_raw_data_asset(raw)
+    assert raw._model is None, "name alone should identify raw data"
+    sorted_asset = LazyDataAsset(
+        {
+            **_make_data_asset().to_dict(),
+            "name": "ecephys_676909_2023-12-13_13-43-40_sorted_2023-12-14_00-00-00",
+        }
+    )
+    assert not aind_session.utils.is_raw_data_asset(sorted_asset)
+    assert sorted_asset.custom_metadata is None
+
+
+def test_ttl_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[tuple[str, int | None]] = []
+
+    @aind_session.utils.cache_utils.ttl_cache(ttl=60, maxsize=3)
+    def get(name: str, ttl_hash: int | None = None) -> str:
+        calls.append((name, ttl_hash))
+        return name.upper()
+
+    assert get("a") == get(name="a") == "A"
+    assert calls == [("a", None)]
+
+    # a new ttl_hash computes a new result, stored alongside the previous one,
+    # so callers using different ttl_hash periods don't evict each other
+    get("a", ttl_hash=1)
+    get("a", ttl_hash=1)
+    assert calls[-1] == ("a", 1) and len(calls) == 2
+    assert get.cache_info().currsize == 2
+    get("a")
+    assert len(calls) == 2
+
+    # least-recently used results are evicted beyond maxsize
+    for name in "bcd":
+        get(name)
+    assert get.cache_info().currsize == 3
+    get("a", ttl_hash=1)
+    assert calls[-1] == ("a", 1) and len(calls) == 6
+
+    # results expire after ttl
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    get("d")
+    assert calls[-1] == ("d", None) and len(calls) == 7
+
+    # invalidating removes results for any ttl_hash
+    get("d", ttl_hash=2)
+    assert get.cache_invalidate("d")
+    assert get.cache_info().currsize == 1
+    assert not get.cache_invalidate("z")
+    info = get.cache_info()
+    assert (info.hits, info.misses) == (3, 8)
+
+
+def test_ttl_cache_maxbytes() -> None:
+    @aind_session.utils.cache_utils.ttl_cache(ttl=None, maxsize=None, maxbytes=10_000)
+    def get(n: int) -> str:
+        return "x" * n
+
+    for n in range(10):
+        get(n * 1000 + 1)
+    info = get.cache_info()
+    assert info.nbytes is not None and info.nbytes <= 10_000
+    assert 0 < info.currsize < 10
+
+
+def test_get_source_dir_by_name_priority_and_negative_cache(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    buckets = aind_session.utils.s3_utils.S3_DATA_BUCKET_NAMES
+    existing = {f"s3://{buckets[3]}/a", f"s3://{buckets[5]}/a"}
+    probed: list[str] = []
+
+    class FakePath(str):
+        @property
+        def parent(self) -> str:
+            return FakePath(self.rsplit("/", 1)[0])
+
+        def as_posix(self) -> str:
+            return str(self)
+
+        def exists(self) -> bool:
+            probed.append(str(self))
+            # the higher-priority hit is slowest to respond
+            time.sleep(0.05 if self.startswith(f"s3://{buckets[3]}/") else 0)
+            return str(self) in existing
+
+    monkeypatch.setattr(
+        aind_session.utils.s3_utils.upath, "UPath", FakePath, raising=True
+    )
+    get_source_dir_by_name = aind_session.utils.s3_utils.get_source_dir_by_name
+    get_source_dir_by_name.cache_clear()
+    try:
+        assert get_source_dir_by_name("a") == f"s3://{buckets[3]}/a"
+
+        with pytest.raises(FileNotFoundError):
+            get_source_dir_by_name("b")
+        n_probes = len(probed)
+        with pytest.raises(FileNotFoundError):
+            get_source_dir_by_name("b")
+        assert len(probed) == n_probes, "negative result should be cached"
+    finally:
+        get_source_dir_by_name.cache_clear()
+
+
+def test_bucket_index(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    buckets = ("high", "low")
+    contents = {"high": {"a"}, "low": {"a", "b"}}
+    listed: list[str] = []
+
+    def list_bucket(bucket: str) -> set[str]:
+        listed.append(bucket)
+        return set(contents[bucket])
+
+    monkeypatch.setattr(
+        aind_session.utils.s3_utils.BucketIndex,
+        "list_bucket",
+        staticmethod(list_bucket),
+    )
+    index = aind_session.utils.s3_utils.BucketIndex(
+        tmp_path / "index.json", buckets=buckets
+    )
+    assert index.contains("high", "a") is None
+    assert index.get_bucket("a") == "high"
+    assert index.get_bucket("b") == "low"
+    assert index.get_bucket("c") is None
+    assert sorted(listed) == ["high", "low"], "each bucket should be listed once"
+
+    index.add("high", "c")
+    assert index.get_bucket("c") == "high"
+
+    # only stale buckets are re-listed
+    index._updated["low"] = 0
+    index.refresh()
+    assert sorted(listed) == ["high", "low", "low"]
+
+    # a new index loads the saved listings without listing buckets
+    reloaded = aind_session.utils.s3_utils.BucketIndex(
+        tmp_path / "index.json", buckets=buckets
+    )
+    assert reloaded.get_bucket("b") == "low"
+    assert len(listed) == 3
+
+
+def test_bucket_index_list_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    listed: list[str] = []
+
+    def list_bucket(bucket: str) -> set[str]:
+        listed.append(bucket)
+        if bucket == "high":
+            raise PermissionError(bucket)
+        return {"a"}
+
+    monkeypatch.setattr(
+        aind_session.utils.s3_utils.BucketIndex,
+        "list_bucket",
+        staticmethod(list_bucket),
+    )
+    index = aind_session.utils.s3_utils.BucketIndex(buckets=("high", "low"))
+    # the unindexed bucket can't be ruled out, so lookups fall back to probing:
+    assert index.get_bucket("a") is None
+    assert index.contains("high", "a") is None
+    index.add("high", "a")
+    assert index.contains("high", "a") is None
+    assert index.get_bucket("b") is None
+    assert sorted(listed) == ["high", "low"], "failed bucket retried too soon"
+
+    index._failed["high"] -= index.LIST_ERROR_TTL + 1
+    index.get_bucket("a")
+    assert sorted(listed) == ["high", "high", "low"]
+
+
+def test_source_dir_missing_from_bucket_index(
+    fake_services: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    s3_utils = aind_session.utils.s3_utils
+    monkeypatch.setattr(s3_utils, "_bucket_index_enabled", True)
+    for bucket in s3_utils.S3_DATA_BUCKET_NAMES:
+        fake_services.s3().pipe_file(f"s3://{bucket}/README.txt", b"")
+    fake_services.s3().pipe_file("s3://aind-ephys-data/a/data.txt", b"")
+    index = s3_utils.get_bucket_index()
+    assert index is not None and index.get_bucket("a") == "aind-ephys-data"
+    # uploaded after the buckets were listed:
+    fake_services.s3().pipe_file("s3://aind-ephys-data/b/data.txt", b"")
+    assert index.get_bucket("b") is None
+    path = s3_utils.get_source_dir_by_name("b")
+    assert path.as_posix() == "s3://aind-ephys-data/b"
+    assert index.get_bucket("b") == "aind-ephys-data"
+    with pytest.raises(FileNotFoundError):
+        s3_utils.get_source_dir_by_name("c")
+
+
+@pytest.mark.parametrize("max_concurrent_pages", [1, 4])
+@pytest.mark.parametrize("as_dict", [False, True])
+def test_search_data_assets_pages(
+    monkeypatch: pytest.MonkeyPatch, as_dict: bool, max_concurrent_pages: int
+) -> None:
+    page_size = 10
+    all_assets = [
+        _make_data_asset(f"{i:08d}-0000-0000-0000-000000000000", f"asset_{i}", i)
+        for i in range(35)
+    ]
+    offsets: list[int] = []
+
+    def search(params: codeocean.data_asset.DataAssetSearchParams) -> tuple:
+        offsets.append(params.offset)
+        # later pages respond first
+        time.sleep(0.01 * (5 - params.offset // page_size))
+        results = all_assets[params.offset : params.offset + params.limit]
+        return results, params.offset + params.limit < len(all_assets)
+
+    class DataAssets:
+        def search_data_assets(self, params):
+            results, has_more = search(params)
+            return codeocean.data_asset.DataAssetSearchResults(
+                has_more=has_more, results=results
+            )
+
+    class Session:
+        def post(self, url: str, **kwargs: Any) -> requests.Response:
+            results, has_more = search(
+                codeocean.data_asset.DataAssetSearchParams.from_dict(kwargs["json"])
+            )
+            response = requests.Response()
+            response._content = json.dumps(
+                {"has_more": has_more, "results": [a.to_dict() for a in results]}
+            ).encode()
+            return response
+
+    class Client:
+        data_assets = DataAssets()
+        session = Session()
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "get_codeocean_client", lambda: Client()
+    )
+    assets = aind_session.utils.codeocean_utils.search_data_assets(
+        {"query": "name:asset"},
+        as_dict=as_dict,
+        page_size=page_size,
+        max_concurrent_pages=max_concurrent_pages,
+    )
+    ids = [a["id"] if as_dict else a.id for a in assets]
+    assert ids == [a.id for a in all_assets]
+    assert set(range(0, 40, page_size)) <= set(offsets)
+    assert max(offsets) < (4 + max_concurrent_pages) * page_size
+
+    with pytest.raises(ValueError):
+        aind_session.utils.codeocean_utils.search_data_assets(
+            {"query": "name:asset"},
+            as_dict=as_dict,
+            page_size=page_size,
+            max_pages=2,
+            max_concurrent_pages=max_concurrent_pages,
+        )
+
+
+def test_search_data_assets_short_page(monkeypatch: pytest.MonkeyPatch) -> None:
+    # the API can return a short page that isn't the last, e.g. when results
+    # are filtered after paging:
+    pages = [
+        [_make_data_asset(f"{i:08d}-0000-0000-0000-000000000000") for i in (0, 1)],
+        [_make_data_asset(f"{i:08d}-0000-0000-0000-000000000000") for i in (2,)],
+    ]
+
+    class DataAssets:
+        def search_data_assets(self, params):
+            page = params.offset // params.limit
+            return codeocean.data_asset.DataAssetSearchResults(
+                has_more=page + 1 < len(pages),
+                results=pages[page] if page < len(pages) else [],
+            )
+
+    class Client:
+        data_assets = DataAssets()
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "get_codeocean_client", lambda: Client()
+    )
+    # without prefetching, pages are requested until the API reports no more:
+    assets = aind_session.utils.codeocean_utils.search_data_assets(
+        {"query": "name:asset"}, page_size=3, max_concurrent_pages=1
+    )
+    assert len(assets) == 3
+
+
+def test_iter_data_assets_stops_early(monkeypatch: pytest.MonkeyPatch) -> None:
+    offsets: list[int] = []
+
+    class DataAssets:
+        def search_data_assets(self, params):
+            offsets.append(params.offset)
+            return codeocean.data_asset.DataAssetSearchResults(
+                has_more=True,
+                results=[
+                    _make_data_asset(name=f"asset_{params.offset + i}")
+                    for i in range(params.limit)
+                ],
+            )
+
+    class Client:
+        data_assets = DataAssets()
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "get_codeocean_client", lambda: Client()
+    )
+    assets = aind_session.utils.codeocean_utils.iter_data_assets(
+        {"query": "name:asset"}, page_size=10
+    )
+    assert [next(assets).name for _ in range(3)] == ["asset_0", "asset_1", "asset_2"]
+    assets.close()
+    assert offsets == [0]
+
+
+def test_get_subject_data_assets_lazy_and_deduplicated(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    results = [
+        _make_data_asset(f"{i:08d}-0000-0000-0000-000000000000", f"asset_{i}", 10 - i)
+        for i in range(3)
+    ]
+
+    class Session:
+        def post(self, url: str, **kwargs: Any) -> requests.Response:
+            response = requests.Response()
+            response._content = json.dumps(
+                {"has_more": False, "results": [a.to_dict() for a in results]}
+            ).encode()
+            return response
+
+    class Client:
+        session = Session()
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "get_codeocean_client", lambda: Client()
+    )
+    monkeypatch.setattr(
+        aind_session.utils.docdb_utils,
+        "get_codeocean_data_asset_ids_from_docdb",
+        lambda **kwargs: [results[0].id],
+    )
+    get_subject_data_assets = aind_session.utils.codeocean_utils.get_subject_data_assets
+    get_subject_data_assets.cache_clear()
+    try:
+        assets = get_subject_data_assets(676909)
+    finally:
+        get_subject_data_assets.cache_clear()
+    assert [a.name for a in assets] == ["asset_2", "asset_1", "asset_0"]
+    assert all(a._model is None for a in assets), "full models should not be created"
+    assert assets[0].state == codeocean.data_asset.DataAssetState.Ready
+    assert assets[0] == results[2]
+
+
+def test_search_computations_reuses_models(monkeypatch: pytest.MonkeyPatch) -> None:
+    records = [
+        {
+            "id": f"{i:08d}-0000-0000-0000-000000000000",
+            "created": i,
+            "name": f"Run {i}",
+            "run_time": 0,
+            "state": "running" if i == 0 else "completed",
+            "has_results": i != 0,
+        }
+        for i in range(5)
+    ]
+
+    class Session:
+        def get(self, url: str) -> requests.Response:
+            response = requests.Response()
+            response._content = json.dumps(records).encode()
+            return response
+
+    class Client:
+        session = Session()
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "get_codeocean_client", lambda: Client()
+    )
+    parsed: list[str] = []
+    from_dict = codeocean.computation.Computation.from_dict
+
+    def counting_from_dict(record: dict, *args: Any, **kwargs: Any) -> Any:
+        parsed.append(record["id"])
+        return from_dict(record, *args, **kwargs)
+
+    monkeypatch.setattr(
+        codeocean.computation.Computation, "from_dict", counting_from_dict
+    )
+    pipeline_id = "00000000-0000-0000-0000-00000000000f"
+    search_computations = aind_session.utils.codeocean_utils.search_computations
+
+    assert len(search_computations(pipeline_id, ttl_hash=1)) == 5
+    assert len(parsed) == 5
+    assert len(search_computations(pipeline_id, in_progress=True, ttl_hash=2)) == 1
+    assert len(parsed) == 5, "unchanged records should not be parsed again"
+
+    records[0] = {**records[0], "state": "completed", "has_results": True}
+    assert not search_computations(pipeline_id, in_progress=True, ttl_hash=3)
+    assert len(search_computations(pipeline_id, ttl_hash=4)) == 5
+    assert parsed[5:] == [records[0]["id"]], "only the changed record is parsed"
+    search_computations.cache_clear()
+
+
+def test_search_computations_by_data_asset(monkeypatch: pytest.MonkeyPatch) -> None:
+    asset_ids = [f"{i:08d}-0000-0000-0000-00000000000a" for i in range(3)]
+    records = [
+        {
+            "id": f"{i:08d}-0000-0000-0000-000000000000",
+            "created": 10 - i,
+            "name": f"Run {i}",
+            "run_time": 0,
+            "state": "running" if i < 2 else "completed",
+            "data_assets": [{"id": asset_ids[i % 2], "mount": "ecephys"}],
+        }
+        for i in range(4)
+    ]
+    requests_made: list[str] = []
+
+    class Session:
+        def get(self, url: str) -> requests.Response:
+            requests_made.append(url)
+            response = requests.Response()
+            response._content = json.dumps(records).encode()
+            return response
+
+    class Client:
+        session = Session()
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "get_codeocean_client", lambda: Client()
+    )
+    pipeline_id = "00000000-0000-0000-0000-0000000000ff"
+    result = aind_session.utils.codeocean_utils.search_computations_by_data_asset(
+        pipeline_id, asset_ids
+    )
+    assert len(requests_made) == 1
+    assert [c.name for c in result[asset_ids[0]]] == ["Run 2", "Run 0"]
+    assert [c.name for c in result[asset_ids[1]]] == ["Run 3", "Run 1"]
+    assert result[asset_ids[2]] == ()
+
+    in_progress = aind_session.utils.codeocean_utils.search_computations_by_data_asset(
+        pipeline_id, asset_ids, in_progress=True
+    )
+    assert [c.name for c in in_progress[asset_ids[0]]] == ["Run 0"]
+    sorting = EcephysExtension.get_current_sorting_pipeline_computations_by_data_asset(
+        asset_ids[:2], pipeline_id=pipeline_id
+    )
+    assert {k: [c.name for c in v] for k, v in sorting.items()} == {
+        asset_ids[0]: ["Run 0"],
+        asset_ids[1]: ["Run 1"],
+    }
+    assert len(requests_made) == 3, "should be one request per call"
+    assert [
+        c.name
+        for c in aind_session.utils.codeocean_utils.search_computations(
+            pipeline_id, attached_data_asset_id=asset_ids[1], ttl_hash=1
+        )
+    ] == ["Run 3", "Run 1"]
+    aind_session.utils.codeocean_utils.search_computations.cache_clear()
+
+
+def test_aio(monkeypatch: pytest.MonkeyPatch) -> None:
+    threads: set[int] = set()
+
+    def get_data_assets(name_startswith: str, **kwargs: Any) -> tuple:
+        threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return (name_startswith,)
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "get_data_assets", get_data_assets
+    )
+    session = aind_session.aio.Session("ecephys_676909_2023-12-13_13-43-40")
+
+    async def main() -> tuple:
+        return (
+            await session.platform,
+            await session.subject.id,
+            await asyncio.gather(
+                *(aind_session.aio.get_data_assets(f"name_{i}") for i in range(8))
+            ),
+        )
+
+    t0 = time.time()
+    platform, subject_id, results = asyncio.run(main())
+    assert platform == "ecephys"
+    assert subject_id == "676909"
+    assert results == [(f"name_{i}",) for i in range(8)]
+    assert time.time() - t0 < 8 * 0.05, "calls should run concurrently"
+    assert threading.get_ident() not in threads
+
+    calls: list[tuple] = []
+
+    def get_docdb_record(name: str, **kwargs: Any) -> dict:
+        calls.append((name, kwargs))
+        return {"name": name}
+
+    monkeypatch.setattr(
+        aind_session.utils.docdb_utils, "get_docdb_record", get_docdb_record
+    )
+    record = asyncio.run(aind_session.aio.get_docdb_record("a", fields=("location",)))
+    assert record == {"name": "a"}
+    assert calls == [("a", {"ttl_hash": None, "fields": ("location",)})]
+
+
+def test_resolve_sessions(monkeypatch: pytest.MonkeyPatch) -> None:
+    session_ids = [
+        "ecephys_676909_2023-12-13_13-43-40",
+        "ecephys_676909_2023-12-14_12-43-11",
+        "behavior_676910_2023-10-24_15-15-50",
+    ]
+    docdb_queries: list[dict] = []
+
+    class DocDBClient:
+        def retrieve_docdb_records(self, filter_query: dict, **kwargs: Any) -> list:
+            docdb_queries.append(filter_query)
+            return [
+                {"name": session_ids[0], "created": 0, "external_links": {}},
+                {"name": session_ids[0], "created": 1, "location": "s3://a/b"},
+            ]
+
+    subject_queries: list[str] = []
+
+    def get_subject_data_assets(subject_id: str) -> tuple:
+        subject_queries.append(subject_id)
+        return tuple(
+            _make_data_asset(name=session_id, created=i)
+            for i, session_id in enumerate(session_ids[:2])
+            if subject_id in session_id
+        )
+
+    monkeypatch.setattr(
+        aind_session.utils.docdb_utils, "get_docdb_api_client", lambda: DocDBClient()
+    )
+    monkeypatch.setattr(
+        aind_session.utils, "get_subject_data_assets", get_subject_data_assets
+    )
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils,
+        "search_data_assets",
+        lambda *args, **kwargs: pytest.fail("should not search per session"),
+    )
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils,
+        "iter_data_assets",
+        lambda *args, **kwargs: iter(()),
+    )
+    aind_session.utils.get_docdb_record.cache_clear()
+    aind_session.utils.get_data_assets.cache_clear()
+    try:
+        sessions = aind_session.resolve_sessions(
+            [*session_ids, session_ids[0]], fields=("docdb", "data_assets")
+        )
+        assert [s.id for s in sessions] == session_ids
+        assert len(docdb_queries) == 1
+        assert docdb_queries[0]["name"]["$in"] == session_ids
+        assert sorted(subject_queries) == ["676909", "676910"]
+
+        # properties are served from the cache
+        assert sessions[0].docdb["location"] == "s3://a/b"
+        assert sessions[1].docdb == {}
+        assert [a.name for a in sessions[1].data_assets] == [session_ids[1]]
+        assert sessions[2].data_assets == ()
+        assert len(docdb_queries) == 1
+    finally:
+        aind_session.utils.get_docdb_record.cache_clear()
+        aind_session.utils.get_data_assets.cache_clear()
+
+    with pytest.raises(ValueError):
+        aind_session.resolve_sessions(session_ids, fields=("modalities",))
+
+
+def test_get_docdb_records(monkeypatch: pytest.MonkeyPatch) -> None:
+    ids = [f"{i:08d}-0000-0000-0000-000000000000" for i in range(3)]
+    records = [
+        {"name": "session_a", "created": 0, "external_links": {}},
+        {"name": "session_a", "created": 1, "external_links": {}},
+        {"name": "session_b", "created": 2, "external_links": {"Code Ocean": [ids[0]]}},
+        {"name": "session_c", "created": 3, "external_links": []},
+    ]
+    queries: list[dict] = []
+
+    class DocDBClient:
+        def retrieve_docdb_records(self, filter_query: dict, **kwargs: Any) -> list:
+            queries.append(filter_query)
+            ((field, condition),) = filter_query.items()
+            if field == "name":
+                return [r for r in records if r["name"] in condition["$in"]]
+            return [
+                r
+                for r in records
+                if set(condition["$in"])
+                & set(
+                    aind_session.utils.extract_codeocean_data_asset_ids_from_docdb_record(
+                        r
+                    )
+                )
+            ]
+
+    monkeypatch.setattr(
+        aind_session.utils.docdb_utils, "get_docdb_api_client", lambda: DocDBClient()
+    )
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils,
+        "get_data_asset_models",
+        # ids[2] is not accessible in CodeOcean
+        lambda asset_ids: tuple(
+            _make_data_asset(asset_id, name="session_c")
+            for asset_id in asset_ids
+            if asset_id == ids[1]
+        ),
+    )
+    result = aind_session.utils.docdb_utils.get_docdb_records(
+        ["session_a", ids[0], ids[1], ids[2], "session_x"]
+    )
+    assert result == {
+        "session_a": records[1],
+        ids[0]: records[2],
+        ids[1]: records[3],
+        ids[2]: {},
+        "session_x": {},
+    }
+    assert len(queries) == 2, "one query by ID, then one by name for all misses"
+
+
+def test_get_docdb_records_unknown_id(
+    fake_services: Any, fake_data_factory: Any
+) -> None:
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=2)
+    fake_services.load(data)
+    session_id = next(iter(data.session_ids.values()))[0]
+    unknown_id = "00000000-0000-0000-0000-000000000000"
+    records = aind_session.utils.get_docdb_records([session_id, unknown_id])
+    assert records[session_id]["name"] == session_id
+    assert records[unknown_id] == {} == aind_session.utils.get_docdb_record(unknown_id)
+
+
+def test_get_docdb_record_fields(monkeypatch: pytest.MonkeyPatch) -> None:
+    record = {
+        "_id": "a",
+        "name": "session_a",
+        "created": 0,
+        "location": "s3://bucket/session_a",
+        "processing": {"large": "blob"},
+    }
+    projections: list[dict | None] = []
+
+    class DocDBClient:
+        def retrieve_docdb_records(
+            self, projection: dict | None = None, **kwargs: Any
+        ) -> list:
+            projections.append(projection)
+            if projection is None:
+                return [record]
+            return [{k: v for k, v in record.items() if k in projection}]
+
+    monkeypatch.setattr(
+        aind_session.utils.docdb_utils, "get_docdb_api_client", lambda: DocDBClient()
+    )
+    get_docdb_record = aind_session.utils.docdb_utils.get_docdb_record
+    get_docdb_record.cache_clear()
+    try:
+        expected = {"_id": "a", "created": 0, "location": "s3://bucket/session_a"}
+        assert get_docdb_record("session_a", fields=("location",)) == expected
+        assert projections == [{"location": 1, "_id": 1, "created": 1}]
+
+        assert get_docdb_record("session_a") == record
+        get_docdb_record.cache_invalidate("session_a", fields=("location",))
+        assert get_docdb_record("session_a", fields=("location",)) == expected
+        assert len(projections) == 2, "fields should be taken from the full record"
+    finally:
+        get_docdb_record.cache_clear()
+
+
+def test_iter_subject_docdb_records(monkeypatch: pytest.MonkeyPatch) -> None:
+    # duplicate creation times check that paging uses _id as a tie-breaker
+    records = [
+        {"_id": f"{i:02d}", "created": f"2024-01-0{1 + i // 2}", "name": f"r{i}"}
+        for i in range(7)
+    ]
+    limits: list[int] = []
+
+    class DocDBClient:
+        def retrieve_docdb_records(
+            self, filter_query: dict, limit: int = 0, **kwargs: Any
+        ) -> list:
+            limits.append(limit)
+
+            def matches(record: dict) -> bool:
+                if "$and" not in filter_query:
+                    return True
+                after, tie = filter_query["$and"][1]["$or"]
+                return record["created"] > after["created"]["$gt"] or (
+                    record["created"] == tie["created"]
+                    and record["_id"] > tie["_id"]["$gt"]
+                )
+
+            return [r for r in records if matches(r)][:limit]
+
+    monkeypatch.setattr(
+        aind_session.utils.docdb_utils, "get_docdb_api_client", lambda: DocDBClient()
+    )
+    assert (
+        list(aind_session.utils.docdb_utils.iter_subject_docdb_records(1, page_size=2))
+        == records
+    )
+    assert len(limits) == 4
+
+    limits.clear()
+    lazy = aind_session.utils.docdb_utils.get_lazy_subject_docdb_records(
+        1, ttl_hash=0, page_size=3
+    )
+    assert lazy[1] == records[1]
+    assert len(limits) == 1, "only the first page should be fetched"
+    assert list(lazy) == records
+    assert len(lazy) == 7 and lazy[-1] == records[-1] and lazy[5:] == tuple(records[5:])
+    assert len(limits) == 3
+    aind_session.utils.docdb_utils.get_lazy_subject_docdb_records.cache_clear()
+
+    # the public property stays a tuple: laziness is opt-in
+    subject = aind_session.Subject(2)
+    assert isinstance(subject.docdb, tuple)
+    assert subject.lazy_docdb[0] == records[0]
+    aind_session.utils.docdb_utils.get_lazy_subject_docdb_records.cache_clear()
+    aind_session.utils.docdb_utils.get_subject_docdb_records.cache_clear()
+
+
+def test_catalog(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    assets = [
+        _make_data_asset(f"{i:08d}-0000-0000-0000-000000000000", name, created)
+        for i, (name, created) in enumerate(
+            [
+                ("ecephys_676909_2023-12-13_13-43-40", 2),
+                ("ecephys_676909_2023-12-13_13-43-40_sorted", 3),
+                ("ecephys_676909_2023-12-14_12-43-11", 1),
+                ("unrelated_name", 0),
+            ]
+        )
+    ]
+    records = [
+        {
+            "_id": "r0",
+            "name": "ecephys_676909_2023-12-13_13-43-40",
+            "created": "2023-12-13",
+            "subject": {"subject_id": "676909"},
+            "external_links": {"Code Ocean": [assets[3].id, assets[2].id]},
+        }
+    ]
+    search_kwargs: list[dict] = []
+
+    def iter_data_assets(*args: Any, **kwargs: Any) -> Iterator[dict]:
+        search_kwargs.append(kwargs)
+        return iter(a.to_dict() for a in assets)
+
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils, "iter_data_assets", iter_data_assets
+    )
+    monkeypatch.setattr(
+        aind_session.utils.docdb_utils,
+        "iter_docdb_records",
+        lambda *args, **kwargs: iter(records),
+    )
+    monkeypatch.setenv("AIND_SESSION_CACHE_DIR", str(tmp_path))
+    catalog = aind_session.utils.catalog_utils.get_catalog()
+    assert not catalog.is_refreshed() and catalog.is_stale()
+    catalog.refresh()
+    info = catalog.info()
+    assert (info.data_assets_count, info.docdb_records_count) == (4, 1)
+    assert not catalog.is_stale()
+    assert search_kwargs[0]["max_pages"] >= 10**6, "all pages should be fetched"
+
+    # no requests are made when the catalog is enabled:
+    monkeypatch.setattr(
+        aind_session.utils.codeocean_utils,
+        "iter_data_assets",
+        lambda *args, **kwargs: pytest.fail("should not search CodeOcean"),
+    )
+    # linked IDs are queried in batches:
+    monkeypatch.setattr(aind_session.utils.catalog_utils, "CATALOG_BATCH_SIZE", 1)
+    aind_session.utils.catalog_utils.set_catalog_enabled(True)
+    try:
+        get_data_assets = aind_session.utils.codeocean_utils.get_data_assets
+        assert [
+            a.id for a in get_data_assets("ecephys_676909_2023-12-13_13-43-40", 0)
+        ] == [assets[0].id, assets[1].id]
+        get_subject_data_assets = (
+            aind_session.utils.codeocean_utils.get_subject_data_assets
+        )
+        assert [a.name for a in get_subject_data_assets(676909, 0)] == [
+            assets[3].name,  # linked from DocumentDB
+            assets[2].name,
+            assets[0].name,
+            assets[1].name,
+        ]
+        # a catalog older than the max age isn't used:
+        monkeypatch.setattr(aind_session.utils.catalog_utils, "_catalog_max_age", 0)
+        assert (
+            aind_session.utils.catalog_utils.get_catalog(require_enabled=True) is None
+        )
+    finally:
+        aind_session.utils.catalog_utils.set_catalog_enabled(False)
+        get_data_assets.cache_clear()
+        get_subject_data_assets.cache_clear()
+
+
+def test_catalog_unavailable(
+    fake_services: Any,
+    fake_data_factory: Any,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=2)
+    fake_services.load(data)
+    session_id = next(iter(data.session_ids.values()))[0]
+    get_data_assets = aind_session.utils.codeocean_utils.get_data_assets
+
+    # a disabled catalog is never opened or created:
+    assert get_data_assets(session_id)
+    assert not aind_session.utils.catalog_utils.get_catalog_path().exists()
+
+    # an enabled catalog that can't be opened falls back to live queries:
+    unwritable = tmp_path / "not_a_dir"
+    unwritable.touch()
+    monkeypatch.setenv("AIND_SESSION_CACHE_DIR", str(unwritable))
+    monkeypatch.setattr(aind_session.utils.catalog_utils, "_catalog_enabled", True)
+    get_data_assets.cache_clear()
+    assert aind_session.utils.catalog_utils.get_catalog(require_enabled=True) is None
+    assert get_data_assets(session_id)
+
+
+def test_profile(fake_services: Any, fake_data_factory: Any) -> None:
+    data = fake_data_factory(n_subjects=2, sessions_per_subject=2)
+    fake_services.load(data)
+    session_id = data.session_ids["600000"][0]
+    assert not aind_session.utils.is_stats_enabled(), "should be opt-in"
+    aind_session.utils.set_stats_enabled(True)
+    aind_session.utils.reset_stats()
+    with aind_session.utils.profile() as report:
+        assets = aind_session.utils.get_data_assets(session_id)
+        assert aind_session.utils.get_data_assets(session_id) == assets
+    assert report.count("codeocean", "POST data_assets/search") == (
+        fake_services.codeocean.requests["POST data_assets/search"]
+    )
+    assert {c.caller for c in report.calls} >= {
+        "aind_session.utils.codeocean_utils._get_data_asset_search_page"
+    }
+    cache = {c.name: c for c in report.caches}[
+        "aind_session.utils.codeocean_utils.get_data_assets"
+    ]
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert "POST data_assets/search" in str(report)
+
+    # process-wide stats include the same requests, until reset:
+    assert aind_session.utils.stats().count("codeocean") == report.count("codeocean")
+    aind_session.utils.reset_stats()
+    assert aind_session.utils.stats().count() == 0
+    aind_session.utils.set_stats_enabled(False)
+    aind_session.utils.get_data_assets(session_id, ttl_hash=1)
+    assert aind_session.utils.stats().count() == 0
+
+    # other HTTP backends are recorded via a hook on their session:
+    session = aind_session.utils.instrument_session(requests.Session(), "docdb")
+    with aind_session.utils.profile() as report:
+        session.get(
+            f"{fake_services.codeocean.domain}/api/v1/data_assets/{assets[0].id}"
+        )
+        session.get(f"{fake_services.codeocean.domain}/api/v1/data_assets/missing")
+    assert report.count("docdb", "GET data_assets/{id}") == 1
+    assert sum(c.errors for c in report.calls) == 1
+
+
+def test_s3fs_instrumented_on_request() -> None:
+    script = (
+        "import s3fs, aind_session.utils.s3_utils, aind_session.utils.stats_utils as s\n"
+        "is_patched = lambda: hasattr(s3fs.S3FileSystem._call_s3, '_aind_session_instrumented')\n"
+        "assert not is_patched(), 'importing should not patch s3fs'\n"
+        "with s.profile(): pass\n"
+        "assert is_patched()\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        check=True,
+        env=os.environ | {"AIND_SESSION_STATS": "0"},
+    )
+
+
+def test_profile_s3_caller(monkeypatch: pytest.MonkeyPatch) -> None:
+    import fsspec.asyn
+
+    stats_utils = aind_session.utils.stats_utils
+    main_thread = threading.current_thread()
+    get_caller = stats_utils.get_caller
+    monkeypatch.setattr(
+        stats_utils,
+        "get_caller",
+        lambda: (
+            "aind_session.caller"
+            if threading.current_thread() is main_thread
+            else get_caller()
+        ),
+    )
+
+    async def call_s3(self: Any, method: str, **kwargs: Any) -> str:
+        return method
+
+    call_s3 = stats_utils._wrap_call_s3(call_s3)
+    sync = stats_utils._wrap_sync(fsspec.asyn.sync)
+    with aind_session.utils.profile() as report:
+        # s3fs runs calls in fsspec's event loop thread:
+        assert sync(fsspec.asyn.get_loop(), call_s3, None, "head_object") == (
+            "head_object"
+        )
+    assert report.calls[0][:4] == ("s3", "head_object", "aind_session.caller", 1)
+
+
+def test_explain(fake_services: Any, fake_data_factory: Any) -> None:
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=2)
+    fake_services.load(data)
+    session = aind_session.Session(data.session_ids["600000"][1])  # no location
+
+    with aind_session.utils.explain() as tree:
+        path = session.raw_data_dir
+    assert path.as_posix() == f"s3://aind-ephys-data/{session.id}"
+    (step,) = tree.children
+    assert step.name == "session.Session.raw_data_dir"
+    assert [child.name for child in step.children] == [
+        "session.Session._get_docdb_fields",
+        "session.Session.raw_data_asset",
+        "codeocean_utils.get_data_asset_source_dir",
+    ]
+    docdb_records = tree.find("docdb_utils.get_docdb_record")
+    assert docdb_records[0].cache == "miss"
+    assert all(node.cache == "hit" for node in docdb_records[1:])
+    # steps in worker threads are included, down to requests:
+    model = tree.find("codeocean_utils.get_data_asset_model")[0]
+    assert model.cache == "miss"
+    assert ("request", "codeocean: GET data_assets/{id}") in [
+        (c.kind, c.name) for c in model.children
+    ]
+    assert tree.seconds >= step.seconds > 0
+    assert "└── session.Session.raw_data_dir" in str(tree)
+
+    # resolved properties are memoized on the session:
+    with aind_session.utils.explain() as tree:
+        _ = session.raw_data_dir
+    (step,) = tree.children
+    assert step.cache == "hit" and not step.children
+
+    session.refresh()
+    with aind_session.utils.explain() as tree:
+        _ = session.raw_data_dir
+    assert tree.children[0].cache == "miss"
+    assert tree.find("docdb_utils.get_docdb_record")[0].cache == "hit"
+    assert not tree.find("codeocean: GET data_assets/{id}")
+
+    # nothing is recorded outside the block:
+    _ = session.raw_data_dir
+    assert len(tree.children) == 1
+
+
+def test_session_instances_are_shared() -> None:
+    import gc
+    import pickle
+
+    session_id = "ecephys_676909_2023-12-13_13-43-40"
+    a = aind_session.Session(session_id)
+    b = aind_session.Session(f"/root/capsule/{session_id}_sorted_2024-03-01_16-02-45")
+    assert a is b
+    assert pickle.loads(pickle.dumps(a)) is a
+    # fixed attributes don't use the instance dict, but extensions can still
+    # attach their namespace objects to it:
+    assert "id" not in vars(a)
+    assert a.ecephys is b.ecephys
+    assert "ecephys" in vars(a)
+
+    # instances aren't kept alive once unused:
+    del a, b
+    gc.collect()
+    assert not any(
+        key[1] == session_id for key in aind_session.Session._instances.keys()
+    )
+
+
+def test_get_sessions_parses_each_session_once(
+    fake_services: Any, fake_data_factory: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=3)
+    fake_services.load(data)
+    created = []
+    init = aind_session.Session._init_from_record
+    monkeypatch.setattr(
+        aind_session.Session,
+        "_init_from_record",
+        lambda self, record: created.append(record.id) or init(self, record),
+    )
+    sessions = aind_session.get_sessions("600000")
+    assert [s.id for s in sessions] == data.session_ids["600000"]
+    # raw and sorted assets share a session: only one object is created for each
+    assert len(created) == len(set(created))
+    assert set(created) <= set(data.session_ids["600000"])
+
+
+def test_modality_dirs_listed_once(fake_services: Any, fake_data_factory: Any) -> None:
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=1)
+    session_id = data.session_ids["600000"][0]
+    for name in ("behavior", "ecephys_clipped", "ecephys_compressed"):
+        data.s3_files[f"aind-ephys-data/{session_id}/{name}/file.bin"] = b""
+    fake_services.load(data)
+    session = aind_session.Session(session_id)
+
+    assert session.modalities == ("behavior", "ecephys")
+    assert fake_services.s3.requests["ls"] == 1
+    asset_id = session.raw_data_asset.id
+    _ = aind_session.utils.get_data_asset_source_dir(asset_id=asset_id)
+    fake_services.reset_requests()
+    clipped, compressed = EcephysExtension.get_clipped_and_compressed_dirs(asset_id)
+    assert clipped is not None and clipped.name == "ecephys_clipped"
+    assert compressed is not None and compressed.name == "ecephys_compressed"
+    # the same listing is re-used, and no dir is checked individually:
+    assert fake_services.requests()["s3"] == 0
+
+
+def test_modalities_missing_raw_data_dir(
+    fake_services: Any, fake_data_factory: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=1)
+    fake_services.load(data)
+    session = aind_session.Session(data.session_ids["600000"][0])
+
+    def get_subdir_names(path: Any, **kwargs: Any) -> tuple[str, ...]:
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(aind_session.utils, "get_subdir_names", get_subdir_names)
+    assert session.modalities == ()
+
+
+def test_session_resolution_cache(
+    fake_services: Any, fake_data_factory: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    data = fake_data_factory(n_subjects=1, sessions_per_subject=2)
+    fake_services.load(data)
+    session = aind_session.Session(data.session_ids["600000"][1])  # no location
+    get_source_dir = aind_session.utils.get_data_asset_source_dir
+    calls = []
+    monkeypatch.setattr(
+        aind_session.utils,
+        "get_data_asset_source_dir",
+        lambda *args, **kwargs: calls.append(1) or get_source_dir(*args, **kwargs),
+    )
+    for _ in range(100):
+        _ = session.raw_data_dir, session.raw_data_asset, session.is_uploaded
+    assert len(calls) == 1
+
+    session.refresh()
+    _ = session.raw_data_dir
+    assert len(calls) == 2
+
+    monkeypatch.setattr(aind_session.Session, "RESOLUTION_TTL", 0)
+    session.refresh()
+    _ = session.raw_data_dir
+    _ = session.raw_data_dir
+    assert len(calls) == 4
+
+    # missing values are memoized too:
+    missing = aind_session.Session("ecephys_600000_2020-01-01_00-00-00")
+    fake_services.reset_requests()
+    assert getattr(missing, "raw_data_asset", None) is None
+    requests = fake_services.requests()
+    assert getattr(missing, "raw_data_asset", None) is None
+    assert fake_services.requests() == requests
+
+
+def test_max_concurrency(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(aind_session.utils.misc_utils, "_max_concurrency", None)
+    monkeypatch.setenv("AIND_SESSION_MAX_CONCURRENCY", "3")
+    assert aind_session.utils.get_max_concurrency() == 3
+    monkeypatch.setenv("AIND_SESSION_TCP_KEEPALIVE_IDLE", "90")
+    adapter = aind_session.utils.get_http_adapter(retries=2, count=3)
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == 3
+    assert adapter.max_retries.total == 2
+    socket_options = adapter.poolmanager.connection_pool_kw["socket_options"]
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in socket_options
+    if sys.platform == "linux":
+        assert (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 90) in socket_options
+        assert (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3) in socket_options
+    # existing connection pools are resized along with the setting, keeping
+    # their socket options:
+    aind_session.utils.set_max_concurrency(5)
+    assert aind_session.utils.get_max_concurrency() == 5
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == 5
+    assert adapter.poolmanager.connection_pool_kw["socket_options"] == socket_options
+    with pytest.raises(ValueError):
+        aind_session.utils.set_max_concurrency(0)